@@ -1,66 +1,598 @@
 from __future__ import annotations
 
 import asyncio
+import bisect
 import logging
-from collections.abc import Awaitable, Callable
+import time
+import weakref
+from collections import deque
+from collections.abc import Awaitable, Callable, Iterable, Mapping
 from typing import Any
 
-from acp_hub.events import Event
+from acp_hub.config import DeliveryPolicy
+from acp_hub.events import Event, bus_dropped, hub_metrics, split_lines
 
 logger = logging.getLogger(__name__)
 
 Handler = Callable[[Event], Awaitable[None]]
 
+DELIVERY_MODES = ("concurrent", "sequential")
+
+# Protocol-critical traffic blocks; bulk output and filesystem noise may be shed.
+DEFAULT_POLICIES: dict[str, DeliveryPolicy] = {
+    "tool.": DeliveryPolicy(capacity=1024, overflow="block"),
+    "agent.jsonrpc": DeliveryPolicy(capacity=1024, overflow="block"),
+    "agent.stdout": DeliveryPolicy(capacity=256, overflow="drop-oldest"),
+    "agent.stderr": DeliveryPolicy(capacity=256, overflow="drop-oldest"),
+    # Few and carrying counts: never shed with the lines they stand in for.
+    "agent.stderr_suppressed": DeliveryPolicy(capacity=256, overflow="block"),
+    "fs.changed": DeliveryPolicy(capacity=256, overflow="coalesce"),
+}
+
+# Upper bound on distinct kinds cached by the dispatch index; kinds are a small closed set
+# in practice, the cap only guards against a publisher minting unbounded kind strings.
+_DISPATCH_CACHE_MAX = 1024
+
+# Subscriber worker tasks, so publishes made from inside a handler never block. Only
+# the worker itself: tasks a handler spawns (tool runs) block like any other publisher.
+_WORKERS: weakref.WeakSet[asyncio.Task[None]] = weakref.WeakSet()
+
+
+def _in_worker() -> bool:
+    return asyncio.current_task() in _WORKERS
+
+
+# Fixed histogram bucket upper bounds in milliseconds; a final bucket catches the rest.
+# fmt: off
+_BUCKET_BOUNDS_MS = (
+    0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 25.0, 50.0,
+    100.0, 250.0, 500.0, 1000.0, 2500.0, 5000.0, 10000.0,
+)
+# fmt: on
+
+# Minimum seconds between "slow handler" warnings for the same subscriber.
+_SLOW_LOG_INTERVAL = 1.0
+
+
+class LatencyHistogram:
+    """Fixed-bucket latency histogram: O(log buckets) to record, constant memory."""
+
+    __slots__ = ("count", "counts", "max_ms", "total_ms")
+
+    def __init__(self) -> None:
+        self.counts = [0] * (len(_BUCKET_BOUNDS_MS) + 1)
+        self.count = 0
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+
+    def record(self, seconds: float) -> None:
+        ms = seconds * 1000.0
+        self.counts[bisect.bisect_left(_BUCKET_BOUNDS_MS, ms)] += 1
+        self.count += 1
+        self.total_ms += ms
+        if ms > self.max_ms:
+            self.max_ms = ms
+
+    def percentile(self, q: float) -> float:
+        """Upper bound of the bucket holding the *q* quantile (capped at the max seen)."""
+        if not self.count:
+            return 0.0
+        target = q * self.count
+        cumulative = 0
+        for i, n in enumerate(self.counts):
+            cumulative += n
+            if cumulative >= target:
+                if i < len(_BUCKET_BOUNDS_MS):
+                    return min(_BUCKET_BOUNDS_MS[i], self.max_ms)
+                break
+        return self.max_ms
+
+    def to_dict(self) -> dict[str, float]:
+        return {
+            "count": self.count,
+            "total_ms": round(self.total_ms, 3),
+            "mean_ms": round(self.total_ms / self.count, 3) if self.count else 0.0,
+            "p50_ms": self.percentile(0.50),
+            "p95_ms": self.percentile(0.95),
+            "p99_ms": self.percentile(0.99),
+            "max_ms": round(self.max_ms, 3),
+        }
+
+
+class HandlerStats:
+    """Delivery counters for one subscription."""
+
+    __slots__ = ("calls", "errors", "lag", "last_slow_log", "latency", "name", "slow")
+
+    def __init__(self, name: str) -> None:
+        self.name = name
+        self.calls = 0
+        self.errors = 0
+        self.slow = 0
+        self.latency = LatencyHistogram()  # time spent inside the handler
+        self.lag = LatencyHistogram()  # publish -> delivery start
+        self.last_slow_log = float("-inf")
+
+    def to_dict(self) -> dict[str, Any]:
+        return {
+            "handler": self.name,
+            "calls": self.calls,
+            "errors": self.errors,
+            "slow": self.slow,
+            "latency": self.latency.to_dict(),
+            "lag": self.lag.to_dict(),
+        }
+
+
+def _handler_name(handler: Handler) -> str:
+    return getattr(handler, "__qualname__", None) or repr(handler)
+
+
+def _per_line(handler: Handler) -> Handler:
+    async def _deliver(event: Event) -> None:
+        for line_event in split_lines(event):
+            await handler(line_event)
+
+    return _deliver
+
+
+def _coalesce_key(event: Event) -> tuple[str, str | None, object]:
+    return event.kind, event.agent_id, event.payload.get("path")
+
+
+class _Lane:
+    """FIFO for one policy class inside a subscription; entries carry a global seq."""
+
+    __slots__ = ("items", "policy", "putters")
+
+    def __init__(self, policy: DeliveryPolicy) -> None:
+        self.policy = policy
+        self.items: deque[tuple[int, float, Event]] = deque()
+        self.putters: deque[asyncio.Future[None]] = deque()
+
+    @property
+    def full(self) -> bool:
+        return len(self.items) >= self.policy.capacity
+
+
+class _Subscription:
+    """
+    One registered handler plus its private delivery queue.
+
+    In concurrent mode every subscription owns a worker task that awaits the handler for
+    one event at a time. Queued events are split into per-policy lanes so each class of
+    event has its own bound; the worker always takes the lowest sequence number across
+    lanes, which keeps delivery order identical to publish order.
+    """
+
+    __slots__ = (
+        "_drainers",
+        "_getter",
+        "_on_drop",
+        "_seq",
+        "budget",
+        "busy",
+        "closed",
+        "durable",
+        "handler",
+        "kind_prefix",
+        "lanes",
+        "size",
+        "stats",
+        "worker",
+    )
+
+    def __init__(
+        self,
+        handler: Handler,
+        kind_prefix: str | None,
+        on_drop: Callable[[Event], None],
+        *,
+        name: str,
+        budget: float | None,
+        durable: bool = False,
+    ) -> None:
+        self.handler = handler
+        self.kind_prefix = kind_prefix
+        self.durable = durable
+        self.stats = HandlerStats(name)
+        self.budget = budget
+        self.lanes: dict[str, _Lane] = {}
+        self.size = 0
+        self.busy = False
+        self.closed = False
+        self.worker: asyncio.Task[None] | None = None
+        self._seq = 0
+        self._on_drop = on_drop
+        self._getter: asyncio.Future[None] | None = None
+        self._drainers: list[asyncio.Future[None]] = []
+
+    @property
+    def idle(self) -> bool:
+        return self.size == 0 and not self.busy
+
+    async def put(
+        self, event: Event, policy_key: str, policy: DeliveryPolicy, *, block: bool
+    ) -> None:
+        """Enqueue *event* in the lane for *policy_key*, applying its overflow policy."""
+        lane = self.lanes.get(policy_key)
+        if lane is None:
+            lane = self.lanes[policy_key] = _Lane(policy)
+        if lane.full and policy.overflow != "block" and not self.durable:
+            if policy.overflow == "coalesce" and self._coalesce(lane, event):
+                return
+            _, _, dropped = lane.items.popleft()
+            self.size -= 1
+            self._on_drop(dropped)
+        while block and lane.full and not self.closed:
+            fut = asyncio.get_running_loop().create_future()
+            lane.putters.append(fut)
+            try:
+                await fut
+            except asyncio.CancelledError:
+                if fut in lane.putters:
+                    lane.putters.remove(fut)
+                raise
+        if self.closed:
+            return
+        self._seq += 1
+        lane.items.append((self._seq, time.perf_counter(), event))
+        self.size += 1
+        self._ensure_worker()
+        _wake(self._getter)
+
+    def _coalesce(self, lane: _Lane, event: Event) -> bool:
+        key = _coalesce_key(event)
+        for i, (seq, enqueued, queued) in enumerate(lane.items):
+            if _coalesce_key(queued) == key:
+                lane.items[i] = (seq, enqueued, event)
+                self._on_drop(queued)
+                return True
+        return False
+
+    def _pop(self) -> tuple[float, Event]:
+        best: _Lane | None = None
+        for lane in self.lanes.values():
+            if lane.items and (best is None or lane.items[0][0] < best.items[0][0]):
+                best = lane
+        assert best is not None
+        _, enqueued, event = best.items.popleft()
+        self.size -= 1
+        if best.putters:
+            _wake(best.putters.popleft())
+        return enqueued, event
+
+    async def drain(self) -> None:
+        """Wait until every queued event has been handled."""
+        if self.idle:
+            return
+        if self.size:
+            self._ensure_worker()
+        elif self.worker is None or self.worker.done():
+            return
+        fut = asyncio.get_running_loop().create_future()
+        self._drainers.append(fut)
+        await fut
+
+    def cancel(self) -> asyncio.Task[None] | None:
+        self.closed = True
+        worker, self.worker = self.worker, None
+        if worker is not None and not worker.done():
+            worker.cancel()
+        for lane in self.lanes.values():
+            lane.items.clear()
+            for fut in lane.putters:
+                _wake(fut)
+            lane.putters.clear()
+        self.size = 0
+        for fut in self._drainers:
+            _wake(fut)
+        self._drainers.clear()
+        return worker
+
+    def _ensure_worker(self) -> None:
+        if self.worker is None or self.worker.done():
+            self.worker = asyncio.get_running_loop().create_task(self._run())
+            _WORKERS.add(self.worker)
+
+    async def _run(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            while not self.size:
+                for fut in self._drainers:
+                    _wake(fut)
+                self._drainers.clear()
+                self._getter = loop.create_future()
+                try:
+                    await self._getter
+                finally:
+                    self._getter = None
+            enqueued, event = self._pop()
+            self.busy = True
+            try:
+                await self.deliver(event, enqueued)
+            finally:
+                self.busy = False
+
+    async def deliver(self, event: Event, enqueued: float) -> None:
+        """Run the handler for *event*, recording lag, latency and failures."""
+        stats = self.stats
+        start = time.perf_counter()
+        stats.lag.record(start - enqueued)
+        try:
+            await self.handler(event)
+        except Exception:
+            stats.errors += 1
+            logger.exception("event handler %s failed for event kind=%s", stats.name, event.kind)
+        elapsed = time.perf_counter() - start
+        stats.calls += 1
+        stats.latency.record(elapsed)
+        if self.budget is not None and elapsed > self.budget:
+            stats.slow += 1
+            if start - stats.last_slow_log >= _SLOW_LOG_INTERVAL:
+                stats.last_slow_log = start
+                logger.warning(
+                    "slow event handler %s: %.1f ms for kind=%s (budget %.1f ms, %d slow so far)",
+                    stats.name,
+                    elapsed * 1000.0,
+                    event.kind,
+                    self.budget * 1000.0,
+                    stats.slow,
+                )
+
+
+def _wake(fut: asyncio.Future[None] | None) -> None:
+    if fut is not None and not fut.done():
+        fut.set_result(None)
+
 
 class EventBus:
     """
     Minimal async event bus.
 
-    Subscribers receive events in registration order. Each handler is awaited
-    sequentially to preserve ordering guarantees. Errors in one handler do not
-    prevent delivery to subsequent handlers.
+    Two delivery modes are supported:
+
+    - ``concurrent`` (default): each subscriber gets its own bounded queue and worker
+      task. ``publish`` returns as soon as the event is enqueued for every matching
+      subscriber, so a slow handler (tool execution, journal fsync) never stalls the
+      agent readers. Order is preserved per subscriber. Publishes issued by a handler
+      itself never wait, to rule out worker-to-worker deadlocks; tasks it spawns are
+      ordinary publishers and respect queue bounds.
+    - ``sequential``: each handler is awaited in registration order inside ``publish``,
+      which gives a global ordering guarantee at the cost of coupling publishers to
+      the slowest subscriber.
+
+    In both modes errors in one handler do not prevent delivery to other handlers.
+
+    Dispatch is indexed: subscribers are grouped by ``kind_prefix`` when the subscriber
+    set changes, and the resolved subscriber tuple for each event kind is cached, so a
+    publish costs O(matching handlers) rather than a scan over every subscriber.
+
+    Queue bounds are set per kind prefix through *policies* (longest prefix wins, merged
+    over ``DEFAULT_POLICIES``); kinds without a policy block at *queue_size*. Events shed
+    by ``drop-oldest``/``coalesce`` policies are counted and reported as periodic
+    ``bus.dropped`` events. Subscribers registered with ``durable=True`` are exempt
+    from shedding.
+
+    Every delivery is instrumented (call count, latency and publish-to-delivery lag
+    histograms, exceptions); see ``stats()``. Handlers slower than
+    *slow_handler_budget* seconds are logged by name, at most once a second each.
     """
 
-    def __init__(self) -> None:
-        self._handlers: list[Handler] = []
-        self._filters: dict[int, str | None] = {}  # handler id -> optional kind prefix filter
+    def __init__(
+        self,
+        *,
+        delivery: str = "concurrent",
+        queue_size: int = 1024,
+        policies: Mapping[str, DeliveryPolicy] | None = None,
+        drop_report_interval: float = 1.0,
+        slow_handler_budget: float | None = 0.1,
+    ) -> None:
+        if delivery not in DELIVERY_MODES:
+            raise ValueError(f"unknown delivery mode: {delivery!r}. Available: {DELIVERY_MODES}")
+        self.delivery = delivery
+        self.queue_size = queue_size
+        self.policies: dict[str, DeliveryPolicy] = {**DEFAULT_POLICIES, **(policies or {})}
+        self.drop_report_interval = drop_report_interval
+        self.slow_handler_budget = slow_handler_budget
+        self._default_policy = DeliveryPolicy(capacity=queue_size, overflow="block")
+        self._subs: list[_Subscription] = []
+        # Dispatch index, rebuilt on subscribe/unsubscribe only.
+        self._unfiltered: tuple[_Subscription, ...] = ()
+        self._by_prefix: dict[str, tuple[_Subscription, ...]] = {}
+        self._prefix_lengths: tuple[int, ...] = ()
+        self._dispatch: dict[str, tuple[_Subscription, ...]] = {}
+        self._policy_cache: dict[str, tuple[str, DeliveryPolicy]] = {}
+        # Drop accounting: counts since the last bus.dropped report, and lifetime totals.
+        self._dropped: dict[str, int] = {}
+        self.dropped_total: dict[str, int] = {}
+        self._drop_reporter: asyncio.Task[None] | None = None
 
     def subscribe(
         self,
         handler: Handler,
         *,
         kind_prefix: str | None = None,
+        per_line: bool = False,
+        durable: bool = False,
     ) -> Callable[[], None]:
         """
         Register *handler* to receive events. Returns an unsubscribe callable.
 
         If *kind_prefix* is given, handler only receives events whose ``kind``
         starts with that prefix (e.g. ``"agent."``).
+
+        Agent stdout/stderr may arrive as coalesced multi-line chunks; pass
+        ``per_line=True`` to have each chunk split back into one event per line.
+
+        A *durable* subscriber (the journal, the run summary) never loses events: every
+        class blocks at its capacity for it, whatever the policy says, so drop-oldest
+        and coalesce only ever shed events for the UI and console.
         """
-        hid = id(handler)
-        self._handlers.append(handler)
-        self._filters[hid] = kind_prefix
+        name = _handler_name(handler)
+        if per_line:
+            handler = _per_line(handler)
+        sub = _Subscription(
+            handler,
+            kind_prefix,
+            self._record_drop,
+            name=name,
+            budget=self.slow_handler_budget,
+            durable=durable,
+        )
+        self._subs.append(sub)
+        self._rebuild_index()
 
         def _unsub() -> None:
             try:
-                self._handlers.remove(handler)
+                self._subs.remove(sub)
             except ValueError:
-                pass
-            self._filters.pop(hid, None)
+                return
+            self._rebuild_index()
+            sub.cancel()
 
         return _unsub
 
+    def _rebuild_index(self) -> None:
+        by_prefix: dict[str, list[_Subscription]] = {}
+        unfiltered: list[_Subscription] = []
+        for sub in self._subs:
+            if sub.kind_prefix is None:
+                unfiltered.append(sub)
+            else:
+                by_prefix.setdefault(sub.kind_prefix, []).append(sub)
+        self._unfiltered = tuple(unfiltered)
+        self._by_prefix = {prefix: tuple(subs) for prefix, subs in by_prefix.items()}
+        self._prefix_lengths = tuple(sorted({len(prefix) for prefix in by_prefix}))
+        self._dispatch = {}
+
+    def _resolve(self, kind: str) -> tuple[_Subscription, ...]:
+        """Return the subscribers for *kind* in registration order (cached)."""
+        subs = self._dispatch.get(kind)
+        if subs is not None:
+            return subs
+        matched = set(self._unfiltered)
+        for n in self._prefix_lengths:
+            if n > len(kind):
+                break
+            matched.update(self._by_prefix.get(kind[:n], ()))
+        subs = tuple(sub for sub in self._subs if sub in matched)
+        if len(self._dispatch) >= _DISPATCH_CACHE_MAX:
+            self._dispatch.clear()
+        self._dispatch[kind] = subs
+        return subs
+
+    def policy_for(self, kind: str) -> tuple[str, DeliveryPolicy]:
+        """Return ``(prefix, policy)`` for *kind*; the prefix is ``""`` for the default."""
+        cached = self._policy_cache.get(kind)
+        if cached is not None:
+            return cached
+        best = ""
+        for prefix in self.policies:
+            if kind.startswith(prefix) and len(prefix) > len(best):
+                best = prefix
+        resolved = (best, self.policies[best]) if best else ("", self._default_policy)
+        if len(self._policy_cache) >= _DISPATCH_CACHE_MAX:
+            self._policy_cache.clear()
+        self._policy_cache[kind] = resolved
+        return resolved
+
     async def publish(self, event: Event) -> None:
         """Fan out *event* to all matching subscribers."""
-        for handler in list(self._handlers):
-            prefix = self._filters.get(id(handler))
-            if prefix is not None and not event.kind.startswith(prefix):
-                continue
-            try:
-                await handler(event)
-            except Exception:
-                logger.exception("event handler %r failed for event kind=%s", handler, event.kind)
+        await self._publish(event, block=not _in_worker())
+
+    async def publish_many(self, events: Iterable[Event]) -> None:
+        """
+        Fan out a batch of *events*, in order.
+
+        Equivalent to calling ``publish`` for each event, but the per-call setup is
+        paid once per batch.
+        """
+        block = not _in_worker()
+        for event in events:
+            await self._publish(event, block=block)
+
+    async def _publish(self, event: Event, *, block: bool) -> None:
+        subs = self._resolve(event.kind)
+        if self.delivery == "sequential":
+            for sub in subs:
+                await sub.deliver(event, time.perf_counter())
+            return
+
+        if not subs:
+            return
+        policy_key, policy = self.policy_for(event.kind)
+        for sub in subs:
+            await sub.put(event, policy_key, policy, block=block)
+
+    def _record_drop(self, event: Event) -> None:
+        self._dropped[event.kind] = self._dropped.get(event.kind, 0) + 1
+        self.dropped_total[event.kind] = self.dropped_total.get(event.kind, 0) + 1
+        if self._drop_reporter is None or self._drop_reporter.done():
+            self._drop_reporter = asyncio.get_running_loop().create_task(self._report_drops())
+
+    async def _report_drops(self) -> None:
+        while True:
+            await asyncio.sleep(self.drop_report_interval)
+            if not await self._flush_drops():
+                return
+
+    async def _flush_drops(self) -> bool:
+        if not self._dropped:
+            return False
+        counts, self._dropped = self._dropped, {}
+        await self.publish(bus_dropped(ts=time.time(), counts=counts))
+        return True
+
+    async def drain(self) -> None:
+        """
+        Wait until all queued events have been delivered.
+
+        Handlers may publish follow-up events while we wait, so keep going until every
+        subscriber is idle at the same time.
+        """
+        while True:
+            busy = [sub for sub in self._subs if not sub.idle]
+            if not busy:
+                return
+            for sub in busy:
+                await sub.drain()
+
+    async def aclose(self) -> None:
+        """Report outstanding drops, deliver everything still queued, then stop workers."""
+        if self._drop_reporter is not None:
+            self._drop_reporter.cancel()
+            self._drop_reporter = None
+        await self._flush_drops()
+        await self.drain()
+        workers = [w for w in (sub.cancel() for sub in self._subs) if w is not None]
+        if workers:
+            await asyncio.gather(*workers, return_exceptions=True)
+
+    def stats(self) -> dict[str, Any]:
+        """Snapshot of per-handler delivery statistics and lifetime drop counts."""
+        handlers = []
+        for sub in self._subs:
+            entry = sub.stats.to_dict()
+            entry["kind_prefix"] = sub.kind_prefix
+            entry["queued"] = sub.size
+            handlers.append(entry)
+        return {"handlers": handlers, "dropped": dict(self.dropped_total)}
+
+    async def run_metrics(
+        self, interval: float, *, extra: Callable[[], dict[str, Any]] | None = None
+    ) -> None:
+        """
+        Publish a ``hub.metrics`` snapshot of ``stats()`` every *interval* seconds, with
+        whatever *extra* returns merged in.
+        """
+        while True:
+            await asyncio.sleep(interval)
+            stats = self.stats()
+            if extra is not None:
+                stats.update(extra())
+            await self.publish(hub_metrics(ts=time.time(), stats=stats))
 
     @property
     def handler_count(self) -> int:
-        return len(self._handlers)
+        return len(self._subs)
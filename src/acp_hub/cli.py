@@ -1,13 +1,15 @@
 from __future__ import annotations
 
 import argparse
+import itertools
 import json
 import platform
 import sys
+from datetime import datetime
 from pathlib import Path
 
 from acp_hub import __version__
-from acp_hub.config import ConfigError, load_config
+from acp_hub.config import JOURNAL_FORMATS, ConfigError, load_config
 
 
 def _default_config_path() -> str:
@@ -35,7 +37,13 @@ def _build_parser() -> argparse.ArgumentParser:
 
     # The core command: send a task to agents and display results.
     run_parser = sub.add_parser("run", help="Send a task to agents and display results.")
-    run_parser.add_argument("--task", "-t", required=True, help="Task prompt to send to agent(s).")
+    run_parser.add_argument(
+        "--task",
+        "-t",
+        action="append",
+        required=True,
+        help="Task prompt to send to agent(s); repeat to run several tasks in one session.",
+    )
     run_parser.add_argument(
         "--agent",
         default=None,
@@ -48,9 +56,128 @@ def _build_parser() -> argparse.ArgumentParser:
         help="Routing mode for multi-agent tasks.",
     )
 
+    replay_parser = sub.add_parser(
+        "replay", help="Stream a recorded journal through the event bus (and report events/s)."
+    )
+    replay_parser.add_argument("journal", type=Path, help="Journal to replay (any format).")
+    pace = replay_parser.add_mutually_exclusive_group()
+    pace.add_argument(
+        "--speed",
+        type=float,
+        default=1.0,
+        help="Playback speed multiplier; 1 keeps the recorded timing (default: 1).",
+    )
+    pace.add_argument(
+        "--fast", action="store_true", help="Publish as fast as the bus accepts events."
+    )
+    replay_parser.add_argument(
+        "--tui", action="store_true", help="Render the replay in the Textual UI."
+    )
+    replay_parser.add_argument(
+        "--quiet",
+        action="store_true",
+        help="Do not print events (measure the bus and any --journal-out only).",
+    )
+    replay_parser.add_argument(
+        "--journal-out",
+        type=Path,
+        default=None,
+        help="Also journal the replayed stream here (using the config's journal settings).",
+    )
+    replay_parser.add_argument(
+        "--kind", action="append", default=None, help="Only replay this kind (repeatable)."
+    )
+    replay_parser.add_argument("--agent", default=None, help="Only replay events of this agent.")
+    replay_parser.add_argument(
+        "--since-ts", type=float, default=None, help="Skip events before this UNIX time."
+    )
+
+    journal_parser = sub.add_parser("journal", help="Inspect and transform event journals.")
+    journal_sub = journal_parser.add_subparsers(dest="journal_cmd", required=True)
+    convert_parser = journal_sub.add_parser(
+        "convert", help="Convert a journal between JSONL and binary (lossless)."
+    )
+    convert_parser.add_argument("src", type=Path, help="Journal to read (any format).")
+    convert_parser.add_argument("dst", type=Path, help="File to write.")
+    convert_parser.add_argument(
+        "--to",
+        choices=JOURNAL_FORMATS,
+        default=None,
+        help="Output format (default: the opposite of the input's).",
+    )
+
+    query_parser = journal_sub.add_parser(
+        "query", help="Filter or aggregate a journal, scanning segments in parallel."
+    )
+    query_parser.add_argument("journal", type=Path, help="Journal to query (any format).")
+    query_parser.add_argument(
+        "--kind", action="append", default=None, help="Event kind (repeatable)."
+    )
+    query_parser.add_argument("--agent", default=None, help="Agent id.")
+    query_parser.add_argument(
+        "--since",
+        type=_parse_time,
+        default=None,
+        help="Start time: UNIX seconds or ISO 8601 (local time).",
+    )
+    query_parser.add_argument(
+        "--until",
+        type=_parse_time,
+        default=None,
+        help="End time (exclusive): UNIX seconds or ISO 8601.",
+    )
+    query_parser.add_argument(
+        "--contains", default=None, help="Substring of the payload's JSON text."
+    )
+    query_parser.add_argument("--correlation-id", default=None, help="Tool correlation id.")
+    query_parser.add_argument(
+        "--aggregate",
+        default=None,
+        help="Report counts per kind, tool latency p50/p95, or bytes per agent "
+        "(counts, latency or bytes).",
+    )
+    query_parser.add_argument(
+        "--format", choices=["ndjson", "table"], default="ndjson", help="Output format."
+    )
+    query_parser.add_argument("--limit", type=int, default=None, help="Stop after N events.")
+    query_parser.add_argument(
+        "--jobs", type=int, default=None, help="Worker processes (default: CPU count)."
+    )
+
+    summary_parser = journal_sub.add_parser(
+        "summary", help="Print a run's summary.json (rebuilt from the journal if missing)."
+    )
+    summary_parser.add_argument("journal", type=Path, help="Journal the summary belongs to.")
+    summary_parser.add_argument(
+        "--rebuild",
+        action="store_true",
+        help="Recompute from the journal even if summary.json exists, and rewrite it.",
+    )
+
+    bench_parser = journal_sub.add_parser(
+        "bench-codec",
+        help="Time JSON decoding of a recorded agent transcript with each available codec.",
+    )
+    bench_parser.add_argument("journal", type=Path, help="Journal to take the transcript from.")
+    bench_parser.add_argument("--repeat", type=int, default=5, help="Runs per codec (best wins).")
+
     return p
 
 
+def _parse_time(value: str) -> float:
+    """argparse type for ``--since``/``--until``: UNIX seconds or ISO 8601."""
+    try:
+        return float(value)
+    except ValueError:
+        pass
+    try:
+        return datetime.fromisoformat(value).timestamp()
+    except ValueError:
+        raise argparse.ArgumentTypeError(
+            f"not a UNIX time or ISO 8601 datetime: {value!r}"
+        ) from None
+
+
 def _cmd_doctor() -> int:
     print("acp-hub doctor")
     print(f"- python: {sys.version.split()[0]}")
@@ -70,6 +197,10 @@ def _cmd_doctor() -> int:
         except Exception as e:  # noqa: BLE001 - diagnostics only
             ok = False
             print(f"- dep: {dist_name}: MISSING ({type(e).__name__}: {e})")
+    # Optional speedup only; never affects the exit status.
+    from acp_hub.codec import DEFAULT_CODEC
+
+    print(f"- json codec: {DEFAULT_CODEC.name} (orjson or msgspec are used when installed)")
 
     # uv convenience hints
     if Path("pyproject.toml").exists():
@@ -95,14 +226,179 @@ def _cmd_tui(config_path: Path) -> int:
     return run_tui(cfg)
 
 
-def _cmd_run(config_path: Path, task: str, agent_id: str | None, route: str) -> int:
+def _cmd_run(config_path: Path, tasks: list[str], agent_id: str | None, route: str) -> int:
     import asyncio
 
     from acp_hub.hub import Hub
 
     cfg = load_config(config_path)
     hub = Hub(cfg)
-    return asyncio.run(hub.run_task(task, agent_id=agent_id, route=route))
+    return asyncio.run(hub.run_tasks(tasks, agent_id=agent_id, route=route))
+
+
+def _cmd_replay(config_path: Path, ns: argparse.Namespace) -> int:
+    import asyncio
+
+    from acp_hub.bus import EventBus
+    from acp_hub.codec import DEFAULT_CODEC, get_codec
+    from acp_hub.hub import console_sink
+    from acp_hub.journal import JsonlJournal, journal_sink
+    from acp_hub.replay import replay_journal
+
+    if not ns.journal.exists():
+        print(f"journal not found: {ns.journal}", file=sys.stderr)
+        return 2
+    if ns.speed <= 0:
+        print("--speed must be positive", file=sys.stderr)
+        return 2
+    speed = None if ns.fast else ns.speed
+    # Replay does not need a config; when there is one, use its bus and journal tuning.
+    cfg = load_config(config_path) if config_path.exists() else None
+    codec = get_codec(cfg.json_codec) if cfg else DEFAULT_CODEC
+
+    if ns.tui:
+        if cfg is None:
+            print(f"--tui needs a config file ({config_path} not found)", file=sys.stderr)
+            return 2
+        from acp_hub.tui.run import run_tui
+
+        return run_tui(cfg, replay_path=ns.journal, replay_speed=speed)
+
+    async def _run() -> int:
+        bus = EventBus(
+            policies=cfg.bus_policies if cfg else None,
+            slow_handler_budget=(cfg.slow_handler_budget_ms / 1000.0 or None) if cfg else 0.1,
+        )
+        journal: JsonlJournal | None = None
+        if ns.journal_out is not None:
+            journal = JsonlJournal(
+                path=ns.journal_out,
+                durability=cfg.journal_durability if cfg else "flush",
+                background=True,
+                format=cfg.journal_format if cfg else "jsonl",
+                codec=codec,
+            )
+            journal.open()
+            bus.subscribe(journal_sink(journal), durable=True)
+        if not ns.quiet:
+            bus.subscribe(console_sink, per_line=True)
+        try:
+            stats = await replay_journal(
+                ns.journal,
+                bus,
+                speed=speed,
+                since_ts=ns.since_ts,
+                kinds=ns.kind,
+                agent_id=ns.agent,
+                codec=codec,
+            )
+        finally:
+            await bus.aclose()
+            if journal is not None:
+                journal.close()
+        print(stats.describe(), file=sys.stderr)
+        return 0
+
+    return asyncio.run(_run())
+
+
+def _cmd_journal_query(parser: argparse.ArgumentParser, ns: argparse.Namespace) -> int:
+    from acp_hub.journal_query import (
+        AGGREGATES,
+        QueryFilter,
+        event_row,
+        format_table,
+        query_journal,
+    )
+    from acp_hub.journal_segments import manifest_path
+
+    if ns.aggregate is not None and ns.aggregate not in AGGREGATES:
+        parser.error(
+            f"argument --aggregate: invalid choice: {ns.aggregate!r} "
+            f"(choose from {', '.join(AGGREGATES)})"
+        )
+    if not ns.journal.exists() and not manifest_path(ns.journal).exists():
+        print(f"journal not found: {ns.journal}", file=sys.stderr)
+        return 2
+    flt = QueryFilter(
+        kinds=frozenset(ns.kind) if ns.kind else None,
+        agent_id=ns.agent,
+        since_ts=ns.since,
+        until_ts=ns.until,
+        contains=ns.contains,
+        correlation_id=ns.correlation_id,
+    )
+    results = query_journal(ns.journal, flt, aggregate=ns.aggregate, jobs=ns.jobs)
+    if ns.aggregate is None and ns.limit is not None:
+        results = itertools.islice(results, ns.limit)
+    out = sys.stdout
+    if ns.format == "table":
+        rows = [event_row(r) if ns.aggregate is None else r for r in results]
+        if rows:
+            out.write(format_table(rows) + "\n")
+    else:
+        for r in results:
+            out.write((r if ns.aggregate is None else json.dumps(r)) + "\n")
+    return 0
+
+
+def _cmd_journal_summary(journal: Path, rebuild: bool) -> int:
+    from acp_hub.journal import iter_events
+    from acp_hub.journal_segments import manifest_path
+    from acp_hub.summary import RunSummary, load_summary, summary_path
+
+    path = summary_path(journal)
+    data = None if rebuild else load_summary(path)
+    if data is None:
+        if not journal.exists() and not manifest_path(journal).exists():
+            print(f"journal not found: {journal}", file=sys.stderr)
+            return 2
+        summary = RunSummary.from_events(iter_events(journal))
+        summary.save(path)
+        data = summary.to_dict()
+    print(json.dumps(data, indent=2))
+    return 0
+
+
+def _cmd_journal_bench_codec(journal: Path, repeat: int) -> int:
+    from acp_hub.codec import CODEC_NAMES, bench_transcript, get_codec
+    from acp_hub.journal import iter_events
+    from acp_hub.journal_segments import manifest_path
+
+    if not journal.exists() and not manifest_path(journal).exists():
+        print(f"journal not found: {journal}", file=sys.stderr)
+        return 2
+    # Rebuild what the agents wrote to stdout: plain lines and JSON-RPC messages.
+    lines: list[str] = []
+    for event in iter_events(journal, kinds={"agent.stdout", "agent.jsonrpc"}):
+        if event.kind == "agent.stdout":
+            lines.extend(event.payload.get("text", "").split("\n"))
+        else:
+            lines.append(json.dumps(event.payload.get("message"), separators=(",", ":")))
+    if not lines:
+        print(f"no agent output in {journal}", file=sys.stderr)
+        return 1
+    for name in CODEC_NAMES[1:]:
+        try:
+            codec = get_codec(name)
+        except ValueError:
+            print(f"{name}: not installed")
+            continue
+        print(bench_transcript(lines, codec, repeat=repeat).describe())
+    return 0
+
+
+def _cmd_journal_convert(src: Path, dst: Path, to: str | None) -> int:
+    from acp_hub.journal import convert_journal, journal_format
+
+    if not src.exists():
+        print(f"journal not found: {src}", file=sys.stderr)
+        return 2
+    source_format = journal_format(src)
+    target = to or ("jsonl" if source_format == "binary" else "binary")
+    count = convert_journal(src, dst, to=target)
+    print(f"converted {count} events: {src} ({source_format}) -> {dst} ({target})")
+    return 0
 
 
 def main(argv: list[str] | None = None) -> int:
@@ -121,6 +417,16 @@ def main(argv: list[str] | None = None) -> int:
             return _cmd_tui(config_path)
         if cmd == "run":
             return _cmd_run(config_path, ns.task, ns.agent, ns.route)
+        if cmd == "replay":
+            return _cmd_replay(config_path, ns)
+        if cmd == "journal" and ns.journal_cmd == "convert":
+            return _cmd_journal_convert(ns.src, ns.dst, ns.to)
+        if cmd == "journal" and ns.journal_cmd == "query":
+            return _cmd_journal_query(parser, ns)
+        if cmd == "journal" and ns.journal_cmd == "summary":
+            return _cmd_journal_summary(ns.journal, ns.rebuild)
+        if cmd == "journal" and ns.journal_cmd == "bench-codec":
+            return _cmd_journal_bench_codec(ns.journal, ns.repeat)
 
         parser.error(f"unknown command: {cmd}")
         return 2
@@ -0,0 +1,174 @@
+from __future__ import annotations
+
+import json
+import re
+import time
+from collections.abc import Callable, Iterable
+from dataclasses import dataclass
+from typing import Any
+
+CODEC_NAMES = ("auto", "stdlib", "orjson", "msgspec")
+
+# Preference order for "auto".
+_FAST_CODECS = ("orjson", "msgspec")
+
+# What the stdlib parses but the fast backends refuse: non-finite floats and integers
+# too wide for 64 bits. Only input containing one of these is retried with the stdlib.
+_STDLIB_ONLY = re.compile(r"NaN|Infinity|\d{20}")
+_STDLIB_ONLY_BYTES = re.compile(rb"NaN|Infinity|\d{20}")
+
+
+@dataclass(frozen=True)
+class JsonCodec:
+    """
+    A JSON implementation for agent I/O: compact ``dumps`` to bytes and ``loads`` from
+    str or bytes.
+
+    ``loads`` raises ``ValueError`` on malformed input whatever the backend. Input a
+    fast backend refuses but the stdlib accepts (integers beyond 64 bits, ``NaN``,
+    ``Infinity``) is retried with the stdlib, so every codec decodes the same values;
+    other malformed input is parsed only once. ``dumps`` falls back to the stdlib for
+    objects the backend cannot serialize. Encoding is not identical: fast backends
+    write non-finite floats as ``null`` where the stdlib writes ``NaN``/``Infinity``.
+    """
+
+    name: str
+    _loads: Callable[[str | bytes], Any]
+    _dumps: Callable[[Any], bytes]
+    _errors: tuple[type[Exception], ...]
+
+    def loads(self, data: str | bytes) -> Any:
+        try:
+            return self._loads(data)
+        except self._errors as exc:
+            if self._loads is not json.loads and _stdlib_only(data):
+                return json.loads(data)
+            if isinstance(exc, ValueError):
+                raise
+            raise ValueError(str(exc)) from exc
+
+    def dumps(self, obj: Any) -> bytes:
+        try:
+            return self._dumps(obj)
+        except TypeError:
+            if self._dumps is _stdlib_dumps:
+                raise
+            return _stdlib_dumps(obj)
+
+
+def _stdlib_only(data: str | bytes) -> bool:
+    if isinstance(data, str):
+        return _STDLIB_ONLY.search(data) is not None
+    return _STDLIB_ONLY_BYTES.search(data) is not None
+
+
+def looks_like_json(text: str | bytes) -> bool:
+    """
+    Cheap pre-check: only text starting with ``{`` or ``[`` (after leading whitespace)
+    can decode to a JSON-RPC message or batch. Plain output lines fail it without any
+    decode attempt.
+    """
+    head = text[:1]
+    if head in ("{", "[", b"{", b"["):
+        return True
+    if head not in (" ", "\t", "\r", b" ", b"\t", b"\r"):
+        return False
+    head = text.lstrip()[:1]
+    return head in ("{", "[", b"{", b"[")
+
+
+def get_codec(name: str = "auto") -> JsonCodec:
+    """
+    The codec called *name*; "auto" picks orjson, then msgspec, then the stdlib,
+    whichever is importable first. Raises ``ValueError`` for unknown or missing ones.
+    """
+    if name == "auto":
+        for candidate in _FAST_CODECS:
+            try:
+                return get_codec(candidate)
+            except ValueError:
+                continue
+        return STDLIB
+    if name == "stdlib":
+        return STDLIB
+    if name == "orjson":
+        try:
+            import orjson  # pyright: ignore[reportMissingImports]
+        except ImportError:
+            raise ValueError("json codec 'orjson' is not installed") from None
+        return JsonCodec("orjson", orjson.loads, orjson.dumps, (orjson.JSONDecodeError,))
+    if name == "msgspec":
+        try:
+            import msgspec  # pyright: ignore[reportMissingImports]
+        except ImportError:
+            raise ValueError("json codec 'msgspec' is not installed") from None
+        return JsonCodec(
+            "msgspec", msgspec.json.decode, msgspec.json.encode, (msgspec.DecodeError,)
+        )
+    raise ValueError(f"unknown json codec {name!r} (expected one of {', '.join(CODEC_NAMES)})")
+
+
+def _stdlib_dumps(obj: Any) -> bytes:
+    return json.dumps(obj, separators=(",", ":"), ensure_ascii=False).encode("utf-8")
+
+
+STDLIB = JsonCodec("stdlib", json.loads, _stdlib_dumps, (ValueError,))
+
+# Process-wide default, used where no codec is passed in explicitly.
+DEFAULT_CODEC = get_codec()
+
+
+@dataclass(frozen=True)
+class CodecBench:
+    codec: str
+    lines: int
+    baseline: float  # seconds: json.loads in try/except on every line, json.dumps out
+    elapsed: float  # seconds: looks_like_json sniff, then the codec
+
+    def describe(self) -> str:
+        speedup = self.baseline / self.elapsed if self.elapsed > 0 else 0.0
+        return (
+            f"{self.codec}: {self.lines} lines, {self.elapsed * 1000:.1f}ms vs "
+            f"{self.baseline * 1000:.1f}ms baseline ({speedup:.2f}x)"
+        )
+
+
+def bench_transcript(lines: Iterable[str], codec: JsonCodec, *, repeat: int = 5) -> CodecBench:
+    """
+    Time decoding every line of an agent transcript (and re-encoding the messages)
+    the way ``ManagedAgentProcess`` did before codecs versus now. Best of *repeat*.
+    """
+    lines = list(lines)
+
+    def baseline() -> None:
+        for text in lines:
+            try:
+                msg = json.loads(text)
+            except ValueError:
+                continue
+            if isinstance(msg, dict):
+                json.dumps(msg, separators=(",", ":")).encode("utf-8")
+
+    def current() -> None:
+        loads, dumps = codec.loads, codec.dumps
+        for text in lines:
+            if not looks_like_json(text):
+                continue
+            try:
+                msg = loads(text)
+            except ValueError:
+                continue
+            if isinstance(msg, dict):
+                dumps(msg)
+
+    def best(fn: Callable[[], None]) -> float:
+        times = []
+        for _ in range(repeat):
+            t0 = time.perf_counter()
+            fn()
+            times.append(time.perf_counter() - t0)
+        return min(times)
+
+    return CodecBench(
+        codec=codec.name, lines=len(lines), baseline=best(baseline), elapsed=best(current)
+    )
@@ -5,11 +5,48 @@ import shutil
 from dataclasses import dataclass, field
 from pathlib import Path
 
+from acp_hub.codec import CODEC_NAMES, get_codec
+from acp_hub.limits import LIMIT_NAMES, NO_LIMITS, ResourceLimits
+
 
 class ConfigError(RuntimeError):
     pass
 
 
+# Journal and event bus settings. Defined here rather than in journal.py and bus.py so
+# that loading a config does not import the runtime modules.
+DURABILITY_MODES = ("none", "flush", "fsync-per-batch")
+JOURNAL_FORMATS = ("jsonl", "binary")
+COMPRESSION_MODES = ("none", "gzip", "lzma")
+OVERFLOW_POLICIES = ("block", "drop-oldest", "coalesce")
+
+
+@dataclass(frozen=True)
+class DeliveryPolicy:
+    """
+    Queue bound and overflow behaviour for one class of events.
+
+    - ``block``: ``publish`` waits for room. Nothing is ever lost.
+    - ``drop-oldest``: the oldest queued event of the same class is discarded.
+    - ``coalesce``: a queued event with the same kind, agent and ``path`` payload is
+      replaced by the newer one; if there is none the oldest is discarded.
+    """
+
+    capacity: int
+    overflow: str = "block"
+
+    def __post_init__(self) -> None:
+        if self.capacity <= 0:
+            raise ValueError(f"policy capacity must be positive, got {self.capacity}")
+        if self.overflow not in OVERFLOW_POLICIES:
+            raise ValueError(
+                f"unknown overflow policy: {self.overflow!r}. Available: {OVERFLOW_POLICIES}"
+            )
+
+    def to_dict(self) -> dict:
+        return {"capacity": self.capacity, "overflow": self.overflow}
+
+
 # ---------------------------------------------------------------------------
 # Known coding-agent registry.  Only these binaries may be spawned.
 # Each entry maps a short name to the full command template + protocol.
@@ -52,6 +89,18 @@ class AgentSpec:
     command: tuple[str, ...]
     sandbox: Path                       # per-agent workspace sandbox
     env: dict[str, str] = field(default_factory=dict)
+    # Recent output kept in memory per buffer (0 = unbounded); the journal has the rest.
+    # retain_mb counts characters of the original lines, not the decoded objects
+    retain_items: int = 10_000
+    retain_mb: float = 16.0
+    # rlimits/nice for the agent process tree, and for shell tools it runs (already
+    # merged over the hub-wide tool_limits)
+    limits: ResourceLimits = NO_LIMITS
+    tool_limits: ResourceLimits = NO_LIMITS
+    # Stderr lines/s past which new lines are dropped and counted (0 = no cap, the
+    # default: repeats are still collapsed), and the burst allowed above that rate
+    stderr_rate: float = 0.0
+    stderr_burst: int = 1000
 
     def to_dict(self) -> dict:
         return {
@@ -61,6 +110,12 @@ class AgentSpec:
             "command": list(self.command),
             "sandbox": str(self.sandbox),
             "env": dict(self.env),
+            "retain_items": self.retain_items,
+            "retain_mb": self.retain_mb,
+            "limits": self.limits.to_dict(),
+            "tool_limits": self.tool_limits.to_dict(),
+            "stderr_rate": self.stderr_rate,
+            "stderr_burst": self.stderr_burst,
         }
 
 
@@ -73,6 +128,42 @@ class HubConfig:
     # Safety knobs
     require_tool_approval: bool = False
     shell_allowlist: tuple[str, ...] = ()   # empty = no shell commands allowed
+    # Event bus queue bounds by kind prefix (merged over bus.DEFAULT_POLICIES)
+    bus_policies: dict[str, DeliveryPolicy] = field(default_factory=dict)
+    # Observability: hub.metrics period and per-handler slow-call budget (0 = off)
+    metrics_interval: float = 10.0
+    slow_handler_budget_ms: float = 100.0
+    # Journal group commit: "none" | "flush" | "fsync-per-batch", and the batch window
+    journal_durability: str = "flush"
+    journal_flush_ms: float = 50.0
+    # Journal segment rotation (0 = off) and compression of closed segments
+    journal_rotate_mb: float = 256.0
+    journal_rotate_seconds: float = 0.0
+    journal_compression: str = "gzip"
+    # "jsonl" (greppable) or "binary" (compact, fast to replay)
+    journal_format: str = "jsonl"
+    # Agent output lines longer than this are written to <journal dir>/spill/ instead,
+    # and the oldest spill files are deleted once there are more than spill_max_mb (0 = no cap)
+    max_line_mb: float = 16.0
+    spill_max_mb: float = 256.0
+    # JSON implementation for agent I/O: "auto" | "stdlib" | "orjson" | "msgspec"
+    json_codec: str = "auto"
+    # How often summary.json is rewritten while a run is live (0 = only at exit)
+    summary_interval: float = 5.0
+    # Warm agents kept idle per configured agent between the tasks of one hub session
+    # (0 = no pool; nothing carries over between `acp-hub run` invocations), and when
+    # a pooled agent is replaced (0 = never by age / task count)
+    agent_pool_size: int = 0
+    agent_pool_max_age: float = 0.0
+    agent_pool_max_tasks: int = 0
+    # Per-agent limits for spawn + handshake (0 = none), and the SIGTERM grace period
+    # before an agent is killed at shutdown
+    agent_start_timeout: float = 30.0
+    agent_stop_timeout: float = 3.0
+    # How often agent.resources (CPU/RSS/IO from /proc) is sampled per agent (0 = off)
+    resource_interval: float = 2.0
+    # Default rlimits/nice for every shell tool; agents can override single fields
+    tool_limits: ResourceLimits = NO_LIMITS
 
     def to_dict(self) -> dict:
         return {
@@ -82,6 +173,26 @@ class HubConfig:
             "agents": [a.to_dict() for a in self.agents],
             "require_tool_approval": self.require_tool_approval,
             "shell_allowlist": list(self.shell_allowlist),
+            "bus_policies": {k: v.to_dict() for k, v in self.bus_policies.items()},
+            "metrics_interval": self.metrics_interval,
+            "slow_handler_budget_ms": self.slow_handler_budget_ms,
+            "journal_durability": self.journal_durability,
+            "journal_flush_ms": self.journal_flush_ms,
+            "journal_rotate_mb": self.journal_rotate_mb,
+            "journal_rotate_seconds": self.journal_rotate_seconds,
+            "journal_compression": self.journal_compression,
+            "journal_format": self.journal_format,
+            "max_line_mb": self.max_line_mb,
+            "spill_max_mb": self.spill_max_mb,
+            "json_codec": self.json_codec,
+            "summary_interval": self.summary_interval,
+            "agent_pool_size": self.agent_pool_size,
+            "agent_pool_max_age": self.agent_pool_max_age,
+            "agent_pool_max_tasks": self.agent_pool_max_tasks,
+            "agent_start_timeout": self.agent_start_timeout,
+            "agent_stop_timeout": self.agent_stop_timeout,
+            "resource_interval": self.resource_interval,
+            "tool_limits": self.tool_limits.to_dict(),
         }
 
 
@@ -125,6 +236,73 @@ def _as_str_list(x: object, *, key: str) -> tuple[str, ...]:
     return tuple(out)
 
 
+def _as_non_negative(x: object, *, key: str) -> float:
+    if isinstance(x, bool) or not isinstance(x, (int, float)) or x < 0:
+        raise ConfigError(f"expected non-negative number for {key!r}")
+    return float(x)
+
+
+def _as_non_negative_int(x: object, *, key: str) -> int:
+    if isinstance(x, bool) or not isinstance(x, int) or x < 0:
+        raise ConfigError(f"expected non-negative integer for {key!r}")
+    return x
+
+
+def _as_limits(x: object, *, key: str) -> ResourceLimits:
+    if x is None:
+        return NO_LIMITS
+    if not isinstance(x, dict):
+        raise ConfigError(f"expected object for {key!r}")
+    unknown = set(x) - set(LIMIT_NAMES)
+    if unknown:
+        raise ConfigError(
+            f"unknown limit(s) in {key!r}: {', '.join(sorted(unknown))} "
+            f"(known: {', '.join(LIMIT_NAMES)})"
+        )
+    ints = {
+        name: _as_non_negative_int(value, key=f"{key}.{name}")
+        for name, value in x.items()
+        if name != "address_space_mb"
+    }
+    if ints.get("nice", 0) > 19:
+        raise ConfigError(f"{key}.nice must be between 0 and 19")
+    address_space_mb = None
+    if "address_space_mb" in x:
+        address_space_mb = _as_non_negative(x["address_space_mb"], key=f"{key}.address_space_mb")
+    # A zero limit would kill or starve the agent at once; leave the key out for "none".
+    for name, value in (*ints.items(), ("address_space_mb", address_space_mb)):
+        if name != "nice" and value is not None and value <= 0:
+            raise ConfigError(f"{key}.{name} must be > 0")
+    return ResourceLimits(
+        cpu_seconds=ints.get("cpu_seconds"),
+        address_space_mb=address_space_mb,
+        open_files=ints.get("open_files"),
+        max_processes=ints.get("max_processes"),
+        nice=ints.get("nice"),
+    )
+
+
+def _as_bus_policies(x: object, *, key: str) -> dict[str, DeliveryPolicy]:
+    if x is None:
+        return {}
+    if not isinstance(x, dict):
+        raise ConfigError(f"expected object for {key!r}")
+    out: dict[str, DeliveryPolicy] = {}
+    for prefix, spec in x.items():
+        if not isinstance(prefix, str) or not prefix or not isinstance(spec, dict):
+            raise ConfigError(f"expected prefix -> object map for {key!r}")
+        capacity = spec.get("capacity")
+        if not isinstance(capacity, int) or isinstance(capacity, bool):
+            raise ConfigError(f"expected integer for {key}[{prefix!r}].capacity")
+        try:
+            out[prefix] = DeliveryPolicy(
+                capacity=capacity, overflow=str(spec.get("overflow", "block"))
+            )
+        except ValueError as exc:
+            raise ConfigError(f"{key}[{prefix!r}]: {exc}") from None
+    return out
+
+
 def _resolve_agent(name: str, idx: int, workspace_root: Path) -> tuple[_AgentDef, Path]:
     """Validate an agent name and return its definition + sandbox path."""
     defn = KNOWN_AGENTS.get(name)
@@ -172,6 +350,68 @@ def load_config(path: Path) -> HubConfig:
         raise ConfigError("shell_allowlist must be an array of strings")
     shell_allowlist = tuple(str(s) for s in shell_allowlist_raw)
 
+    bus_policies = _as_bus_policies(raw.get("bus_policies"), key="bus_policies")
+    metrics_interval = _as_non_negative(
+        raw.get("metrics_interval", 10.0), key="metrics_interval"
+    )
+    slow_handler_budget_ms = _as_non_negative(
+        raw.get("slow_handler_budget_ms", 100.0), key="slow_handler_budget_ms"
+    )
+    journal_durability = raw.get("journal_durability", "flush")
+    if journal_durability not in DURABILITY_MODES:
+        raise ConfigError(
+            f"journal_durability must be one of {', '.join(DURABILITY_MODES)}"
+        )
+    journal_flush_ms = _as_non_negative(
+        raw.get("journal_flush_ms", 50.0), key="journal_flush_ms"
+    )
+    journal_rotate_mb = _as_non_negative(
+        raw.get("journal_rotate_mb", 256.0), key="journal_rotate_mb"
+    )
+    journal_rotate_seconds = _as_non_negative(
+        raw.get("journal_rotate_seconds", 0.0), key="journal_rotate_seconds"
+    )
+    journal_compression = raw.get("journal_compression", "gzip")
+    if journal_compression not in COMPRESSION_MODES:
+        raise ConfigError(
+            f"journal_compression must be one of {', '.join(COMPRESSION_MODES)}"
+        )
+
+    journal_format = raw.get("journal_format", "jsonl")
+    if journal_format not in JOURNAL_FORMATS:
+        raise ConfigError(f"journal_format must be one of {', '.join(JOURNAL_FORMATS)}")
+    max_line_mb = _as_non_negative(raw.get("max_line_mb", 16.0), key="max_line_mb")
+    if max_line_mb <= 0:
+        raise ConfigError("max_line_mb must be > 0")
+    spill_max_mb = _as_non_negative(raw.get("spill_max_mb", 256.0), key="spill_max_mb")
+    json_codec = raw.get("json_codec", "auto")
+    if json_codec not in CODEC_NAMES:
+        raise ConfigError(f"json_codec must be one of {', '.join(CODEC_NAMES)}")
+    try:
+        get_codec(json_codec)
+    except ValueError as e:
+        raise ConfigError(str(e)) from None
+    summary_interval = _as_non_negative(
+        raw.get("summary_interval", 5.0), key="summary_interval"
+    )
+    agent_pool_size = _as_non_negative_int(raw.get("agent_pool_size", 0), key="agent_pool_size")
+    agent_pool_max_age = _as_non_negative(
+        raw.get("agent_pool_max_age", 0.0), key="agent_pool_max_age"
+    )
+    agent_pool_max_tasks = _as_non_negative_int(
+        raw.get("agent_pool_max_tasks", 0), key="agent_pool_max_tasks"
+    )
+    agent_start_timeout = _as_non_negative(
+        raw.get("agent_start_timeout", 30.0), key="agent_start_timeout"
+    )
+    agent_stop_timeout = _as_non_negative(
+        raw.get("agent_stop_timeout", 3.0), key="agent_stop_timeout"
+    )
+    resource_interval = _as_non_negative(
+        raw.get("resource_interval", 2.0), key="resource_interval"
+    )
+    tool_limits = _as_limits(raw.get("tool_limits"), key="tool_limits")
+
     agents_raw = _require(raw, "agents")
     if not isinstance(agents_raw, list) or not agents_raw:
         raise ConfigError("agents must be a non-empty array")
@@ -202,6 +442,20 @@ def load_config(path: Path) -> HubConfig:
             sandbox.mkdir(parents=True, exist_ok=True)
 
         env = _as_str_dict(a.get("env"), key=f"agents[{idx}].env")
+        retain_items = _as_non_negative_int(
+            a.get("retain_items", 10_000), key=f"agents[{idx}].retain_items"
+        )
+        retain_mb = _as_non_negative(a.get("retain_mb", 16.0), key=f"agents[{idx}].retain_mb")
+        limits = _as_limits(a.get("limits"), key=f"agents[{idx}].limits")
+        agent_tool_limits = tool_limits.merged(
+            _as_limits(a.get("tool_limits"), key=f"agents[{idx}].tool_limits")
+        )
+        stderr_rate = _as_non_negative(
+            a.get("stderr_rate", 0.0), key=f"agents[{idx}].stderr_rate"
+        )
+        stderr_burst = _as_non_negative_int(
+            a.get("stderr_burst", 1000), key=f"agents[{idx}].stderr_burst"
+        )
 
         agents.append(
             AgentSpec(
@@ -211,6 +465,12 @@ def load_config(path: Path) -> HubConfig:
                 command=defn.command_template,
                 sandbox=sandbox,
                 env=env,
+                retain_items=retain_items,
+                retain_mb=retain_mb,
+                limits=limits,
+                tool_limits=agent_tool_limits,
+                stderr_rate=stderr_rate,
+                stderr_burst=stderr_burst,
             )
         )
 
@@ -221,5 +481,25 @@ def load_config(path: Path) -> HubConfig:
         agents=tuple(agents),
         require_tool_approval=require_tool_approval,
         shell_allowlist=shell_allowlist,
+        bus_policies=bus_policies,
+        metrics_interval=metrics_interval,
+        slow_handler_budget_ms=slow_handler_budget_ms,
+        journal_durability=journal_durability,
+        journal_flush_ms=journal_flush_ms,
+        journal_rotate_mb=journal_rotate_mb,
+        journal_rotate_seconds=journal_rotate_seconds,
+        journal_compression=journal_compression,
+        journal_format=journal_format,
+        max_line_mb=max_line_mb,
+        spill_max_mb=spill_max_mb,
+        json_codec=json_codec,
+        summary_interval=summary_interval,
+        agent_pool_size=agent_pool_size,
+        agent_pool_max_age=agent_pool_max_age,
+        agent_pool_max_tasks=agent_pool_max_tasks,
+        agent_start_timeout=agent_start_timeout,
+        agent_stop_timeout=agent_stop_timeout,
+        resource_interval=resource_interval,
+        tool_limits=tool_limits,
     )
 
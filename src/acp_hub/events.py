@@ -1,45 +1,156 @@
 from __future__ import annotations
 
-from dataclasses import dataclass
+import itertools
+import sys
+import time
+from dataclasses import dataclass, field
 from typing import Any
 
+# Process-wide event sequence. A process hosts a single hub, so this is the per-hub order
+# of event creation: cheap to compare, and total across agents (unlike wall-clock ts).
+_seq_counter = itertools.count(1)
 
-@dataclass(frozen=True)
+
+def next_seq() -> int:
+    return next(_seq_counter)
+
+
+@dataclass(frozen=True, slots=True)
 class Event:
     """
     Internal event model.
 
     Everything we display in the UI and persist to the journal is normalized into an Event.
+
+    ``ts`` is wall-clock time; ``seq`` and ``mono_ns`` (``time.monotonic_ns()``) are
+    assigned at creation and give a total, clock-jump-proof order within a hub. Only
+    ``seq`` is persisted: monotonic time is meaningless outside the process. Neither
+    takes part in ``==``: two events with the same content compare equal.
+
+    ``raw`` optionally holds the exact text the agent sent for ``payload["message"]``
+    (``agent.jsonrpc`` only); the journal writes it verbatim instead of re-encoding the
+    decoded message. It is not part of ``to_dict()``.
     """
 
     ts: float
     kind: str
     payload: dict[str, Any]
     agent_id: str | None = None
+    seq: int = field(default_factory=next_seq, compare=False)
+    mono_ns: int = field(default_factory=time.monotonic_ns, compare=False)
+    raw: str | None = field(default=None, compare=False, repr=False)
 
     def to_dict(self) -> dict[str, Any]:
         out: dict[str, Any] = {
             "ts": self.ts,
             "kind": self.kind,
             "payload": self.payload,
+            "seq": self.seq,
         }
         if self.agent_id is not None:
             out["agent_id"] = self.agent_id
         return out
 
+    @classmethod
+    def from_dict(cls, d: dict[str, Any]) -> Event:
+        """
+        Rebuild an Event from ``to_dict()`` output (e.g. a journal line).
+
+        Kind and agent strings are interned so long replays share one copy of each.
+        Journals written before ``seq`` existed get a fresh sequence number.
+        """
+        agent_id = d.get("agent_id")
+        return cls(
+            ts=d["ts"],
+            kind=sys.intern(d["kind"]),
+            payload=d["payload"],
+            agent_id=sys.intern(agent_id) if agent_id is not None else None,
+            seq=d["seq"] if "seq" in d else next_seq(),
+        )
+
 
 # ---- Agent I/O events ----
 
-def agent_stdout(*, ts: float, agent_id: str, text: str) -> Event:
-    return Event(ts=ts, kind="agent.stdout", agent_id=agent_id, payload={"text": text})
+def agent_stdout(*, ts: float, agent_id: str, text: str, lines: int = 1) -> Event:
+    """Plain-text stdout; *lines* > 1 marks a coalesced chunk of newline-joined lines."""
+    payload: dict[str, Any] = {"text": text}
+    if lines != 1:
+        payload["lines"] = lines
+    return Event(ts=ts, kind="agent.stdout", agent_id=agent_id, payload=payload)
+
+
+def agent_stderr(*, ts: float, agent_id: str, text: str, lines: int = 1) -> Event:
+    """Plain-text stderr; *lines* > 1 marks a coalesced chunk of newline-joined lines."""
+    payload: dict[str, Any] = {"text": text}
+    if lines != 1:
+        payload["lines"] = lines
+    return Event(ts=ts, kind="agent.stderr", agent_id=agent_id, payload=payload)
+
+
+def agent_stderr_suppressed(
+    *,
+    ts: float,
+    agent_id: str,
+    reason: str,
+    text: str,
+    count: int,
+    first_ts: float,
+    last_ts: float,
+) -> Event:
+    """
+    *count* stderr lines withheld between *first_ts* and *last_ts*; *reason* is
+    "repeat" (same as the line before, numbers aside) or "rate" (over the agent's cap).
+    *text* is the last of them.
+    """
+    return Event(
+        ts=ts,
+        kind="agent.stderr_suppressed",
+        agent_id=agent_id,
+        payload={
+            "reason": reason,
+            "text": text,
+            "count": count,
+            "first_ts": first_ts,
+            "last_ts": last_ts,
+        },
+    )
 
 
-def agent_stderr(*, ts: float, agent_id: str, text: str) -> Event:
-    return Event(ts=ts, kind="agent.stderr", agent_id=agent_id, payload={"text": text})
+def agent_line_spilled(
+    *, ts: float, agent_id: str, stream: str, path: str | None, nbytes: int
+) -> Event:
+    """An output line over the reader's size cap, stored at *path* instead of inline."""
+    return Event(
+        ts=ts,
+        kind="agent.line_spilled",
+        agent_id=agent_id,
+        payload={"stream": stream, "path": path, "bytes": nbytes},
+    )
+
 
+def split_lines(event: Event) -> list[Event]:
+    """Expand a coalesced stdout/stderr chunk back into one event per line."""
+    if event.payload.get("lines", 1) == 1:
+        return [event]
+    return [
+        Event(ts=event.ts, kind=event.kind, agent_id=event.agent_id, payload={"text": line})
+        for line in event.payload.get("text", "").split("\n")
+    ]
 
-def agent_jsonrpc(*, ts: float, agent_id: str, message: dict[str, Any]) -> Event:
-    return Event(ts=ts, kind="agent.jsonrpc", agent_id=agent_id, payload={"message": message})
+
+def agent_jsonrpc(
+    *, ts: float, agent_id: str, message: dict[str, Any], raw: str | None = None
+) -> Event:
+    """
+    *raw* is the agent's original line for *message*, kept for the journal.
+
+    *message* is decoded up front, not on first access: the reader needs a full parse
+    to tell JSON-RPC from plain text, and the hub's monitor, the TUI and the retention
+    buffer read every message anyway.
+    """
+    return Event(
+        ts=ts, kind="agent.jsonrpc", agent_id=agent_id, payload={"message": message}, raw=raw
+    )
 
 
 def agent_started(*, ts: float, agent_id: str, command: tuple[str, ...] | list[str]) -> Event:
@@ -50,6 +161,43 @@ def agent_exited(*, ts: float, agent_id: str, exit_code: int) -> Event:
     return Event(ts=ts, kind="agent.exited", agent_id=agent_id, payload={"exit_code": exit_code})
 
 
+def agent_resources(
+    *,
+    ts: float,
+    agent_id: str,
+    cpu_percent: float,
+    rss_bytes: int,
+    read_bytes: int,
+    write_bytes: int,
+    threads: int,
+    processes: int,
+) -> Event:
+    """Resource use of an agent's process tree and shell tool children, summed."""
+    return Event(
+        ts=ts,
+        kind="agent.resources",
+        agent_id=agent_id,
+        payload={
+            "cpu_percent": round(cpu_percent, 1),
+            "rss_bytes": rss_bytes,
+            "read_bytes": read_bytes,
+            "write_bytes": write_bytes,
+            "threads": threads,
+            "processes": processes,
+        },
+    )
+
+
+def agent_phase_timing(
+    *, ts: float, agent_id: str, phase: str, ms: float, error: str | None = None
+) -> Event:
+    """Duration of a lifecycle *phase* ("spawn", "init", "stop") as ``agent.<phase>_ms``."""
+    payload: dict[str, Any] = {"ms": round(ms, 3)}
+    if error is not None:
+        payload["error"] = error
+    return Event(ts=ts, kind=f"agent.{phase}_ms", agent_id=agent_id, payload=payload)
+
+
 # ---- Tool events ----
 
 def tool_invocation(
@@ -95,6 +243,10 @@ def hub_stopped(*, ts: float) -> Event:
     return Event(ts=ts, kind="hub.stopped", payload={})
 
 
+def hub_metrics(*, ts: float, stats: dict[str, Any]) -> Event:
+    return Event(ts=ts, kind="hub.metrics", payload=stats)
+
+
 def task_submitted(*, ts: float, task: str, route: str) -> Event:
     return Event(ts=ts, kind="task.submitted", payload={"task": task, "route": route})
 
@@ -103,6 +255,16 @@ def task_completed(*, ts: float, task: str) -> Event:
     return Event(ts=ts, kind="task.completed", payload={"task": task})
 
 
+# ---- Bus events ----
+
+def bus_dropped(*, ts: float, counts: dict[str, int]) -> Event:
+    return Event(
+        ts=ts,
+        kind="bus.dropped",
+        payload={"counts": dict(counts), "total": sum(counts.values())},
+    )
+
+
 # ---- Router events ----
 
 def router_forwarded(*, ts: float, from_agent: str, to_agent: str, text: str) -> Event:
@@ -1,15 +1,22 @@
 from __future__ import annotations
 
 import asyncio
+import contextlib
 import logging
+import signal
+import statistics
 import sys
 import time
+from collections.abc import Awaitable, Sequence
 from typing import Any
 
 from acp_hub.bus import EventBus
-from acp_hub.config import HubConfig
+from acp_hub.codec import get_codec
+from acp_hub.config import AgentSpec, HubConfig
 from acp_hub.events import (
     Event,
+    agent_phase_timing,
+    hub_metrics,
     hub_started,
     hub_stopped,
     task_completed,
@@ -17,15 +24,49 @@ from acp_hub.events import (
 )
 from acp_hub.fs_watch import poll_fs_changes
 from acp_hub.journal import JsonlJournal, journal_sink
+from acp_hub.pool import AgentPool, PooledAgent
 from acp_hub.proc import ManagedAgentProcess
 from acp_hub.protocols import get_adapter
 from acp_hub.protocols.base import ProtocolAdapter
+from acp_hub.resources import ResourceSampler
 from acp_hub.router import Router
+from acp_hub.stderr_filter import describe_suppressed
+from acp_hub.summary import SummarySink, summary_path
 from acp_hub.tools.runner import ToolRunner
 
 logger = logging.getLogger(__name__)
 
 
+class AgentStartError(RuntimeError):
+    """One or more agents could not be started; *failures* maps agent id → reason."""
+
+    def __init__(self, failures: dict[str, str]) -> None:
+        self.failures = failures
+        detail = "; ".join(f"{aid}: {reason}" for aid, reason in failures.items())
+        super().__init__(f"could not start {len(failures)} agent(s): {detail}")
+
+
+async def console_sink(event: Event) -> None:
+    """Print agent output and tool activity; subscribe with ``per_line=True``."""
+    if event.kind == "agent.stdout":
+        print(f"[{event.agent_id}] {event.payload.get('text', '')}")
+    elif event.kind == "agent.stderr":
+        print(f"[{event.agent_id}:err] {event.payload.get('text', '')}", file=sys.stderr)
+    elif event.kind == "agent.stderr_suppressed":
+        print(f"[{event.agent_id}:err] {describe_suppressed(event.payload)}", file=sys.stderr)
+    elif event.kind == "tool.invocation":
+        print(f"[tool] {event.payload.get('tool', '')} → {event.payload.get('args', {})}")
+    elif event.kind == "tool.result":
+        ok = event.payload.get("ok", False)
+        print(f"[tool] {'✓' if ok else '✗'} {event.payload.get('tool', '')}")
+
+
+async def _handshake(proc: ManagedAgentProcess, adapter: ProtocolAdapter) -> None:
+    """Send the protocol handshake and wait until the agent has read it."""
+    await adapter.initialize()
+    await proc.flush_stdin()
+
+
 class Hub:
     """
     The central orchestrator.
@@ -36,18 +77,40 @@ class Hub:
 
     def __init__(self, config: HubConfig) -> None:
         self.config = config
-        self.bus = EventBus()
-        self.journal = JsonlJournal(path=config.journal_path)
+        self.bus = EventBus(
+            policies=config.bus_policies,
+            slow_handler_budget=config.slow_handler_budget_ms / 1000.0 or None,
+        )
+        self.journal = JsonlJournal(
+            path=config.journal_path,
+            durability=config.journal_durability,
+            flush_interval=config.journal_flush_ms / 1000.0,
+            background=True,
+            rotate_bytes=int(config.journal_rotate_mb * 1024 * 1024) or None,
+            rotate_interval=config.journal_rotate_seconds or None,
+            compression=config.journal_compression,
+            format=config.journal_format,
+            codec=get_codec(config.json_codec),
+        )
+        self.summary = SummarySink(summary_path(config.journal_path))
+        self.sampler: ResourceSampler | None = None
+        if config.resource_interval > 0:
+            self.sampler = ResourceSampler(self.bus, interval=config.resource_interval)
         self.tool_runner = ToolRunner(
             self.bus,
             workspace_root=str(config.workspace_root),
             shell_allowlist=config.shell_allowlist,
             require_approval=config.require_tool_approval,
+            sampler=self.sampler,
         )
 
         self._agents: dict[str, ManagedAgentProcess] = {}
         self._adapters: dict[str, ProtocolAdapter] = {}
         self._router: Router | None = None
+        self._pool: AgentPool | None = None
+        self._terminated = False
+        # Wall time of each task in run_tasks(), acquiring agents through completion
+        self.task_latencies: list[float] = []
 
     async def run_task(self, task: str, *, agent_id: str | None = None, route: str = "single") -> int:
         """
@@ -55,94 +118,280 @@ class Hub:
 
         Returns 0 on success, 1 on failure.
         """
+        return await self.run_tasks([task], agent_id=agent_id, route=route)
+
+    async def run_tasks(
+        self, tasks: Sequence[str], *, agent_id: str | None = None, route: str = "single"
+    ) -> int:
+        """
+        Run *tasks* one after another in a single session (one journal, one summary).
+
+        Without a pool every task gets freshly spawned agents; with
+        ``agent_pool_size`` set, agents are pre-started once and leased per task.
+        """
         # Open journal
         self.journal.open()
-        self.bus.subscribe(journal_sink(self.journal))
-
-        # Console output sink
-        async def _console_sink(event: Event) -> None:
-            if event.kind == "agent.stdout":
-                print(f"[{event.agent_id}] {event.payload.get('text', '')}")
-            elif event.kind == "agent.stderr":
-                print(f"[{event.agent_id}:err] {event.payload.get('text', '')}", file=sys.stderr)
-            elif event.kind == "tool.invocation":
-                print(f"[tool] {event.payload.get('tool', '')} → {event.payload.get('args', {})}")
-            elif event.kind == "tool.result":
-                ok = event.payload.get("ok", False)
-                print(f"[tool] {'✓' if ok else '✗'} {event.payload.get('tool', '')}")
-
-        self.bus.subscribe(_console_sink)
+        self.bus.subscribe(journal_sink(self.journal), durable=True)
+        self.bus.subscribe(self.summary, durable=True)
+
+        self.bus.subscribe(console_sink, per_line=True)
+
+        # On SIGTERM, commit the journal right away, then unwind through the normal
+        # shutdown path below.
+        loop = asyncio.get_running_loop()
+        main_task = asyncio.current_task()
+        # Not on the main thread, or no signal support on this platform: no handler.
+        with contextlib.suppress(NotImplementedError, RuntimeError):
+            loop.add_signal_handler(signal.SIGTERM, self._on_terminate, main_task)
+
+        metrics_task: asyncio.Task[None] | None = None
+        if self.config.metrics_interval > 0:
+            metrics_task = asyncio.create_task(
+                self.bus.run_metrics(self.config.metrics_interval, extra=self._agent_metrics)
+            )
+        summary_task: asyncio.Task[None] | None = None
+        if self.config.summary_interval > 0:
+            summary_task = asyncio.create_task(
+                self.summary.run_checkpoints(self.config.summary_interval)
+            )
+        sampler_task: asyncio.Task[None] | None = None
+        if self.sampler is not None:
+            sampler_task = asyncio.create_task(self.sampler.run())
+        if self.config.agent_pool_size > 0:
+            self._pool = AgentPool(
+                self._start_agent,
+                stop=self._stop_agent,
+                size=self.config.agent_pool_size,
+                max_age=self.config.agent_pool_max_age,
+                max_tasks=self.config.agent_pool_max_tasks,
+            )
 
+        succeeded = False
         try:
-            # Spawn agents
-            await self._spawn_agents(agent_id)
-
+            specs = self._select_agents(agent_id)
+            # First, so a run's events (pool warm-up included) all follow its hub.started.
             await self.bus.publish(
-                hub_started(ts=time.time(), agents=list(self._agents.keys()))
+                hub_started(ts=time.time(), agents=[spec.id for spec in specs])
             )
+            if self._pool is not None:
+                await self._pool.warm(specs)
 
-            # Initialize protocols
-            await self._initialize_agents()
+            for task in tasks:
+                started = time.monotonic()
+                await self._run_one(task, specs, agent_id=agent_id, route=route)
+                self.task_latencies.append(time.monotonic() - started)
 
-            # Set up router
-            agent_pairs = {
-                aid: (proc, self._adapters[aid])
-                for aid, proc in self._agents.items()
-            }
-            self._router = Router(self.bus, agent_pairs, mode=route)
-
-            # Send task
             await self.bus.publish(
-                task_submitted(ts=time.time(), task=task, route=route)
+                hub_metrics(ts=time.time(), stats={**self.bus.stats(), **self._agent_metrics()})
             )
-            await self._router.send_task(task, agent_id=agent_id)
-
-            # For echo agents, close stdin so they exit
-            # For real agents, we wait for completion signals
-            # Give agents time to process, then start monitoring
-            done = await self._monitor_agents(timeout=120.0)
-
-            await self.bus.publish(task_completed(ts=time.time(), task=task))
             await self.bus.publish(hub_stopped(ts=time.time()))
+            if len(self.task_latencies) > 1:
+                p50 = statistics.median(self.task_latencies)
+                print(f"\n{len(self.task_latencies)} tasks, p50 latency {p50 * 1000:.0f} ms")
 
+            succeeded = True
             return 0
 
         except KeyboardInterrupt:
             print("\nInterrupted.", file=sys.stderr)
             return 130
+        except asyncio.CancelledError:
+            if not self._terminated:
+                raise
+            print("\nTerminated.", file=sys.stderr)
+            return 143
         except Exception as exc:
             logger.exception("hub error")
             print(f"error: {exc}", file=sys.stderr)
             return 1
         finally:
+            if metrics_task is not None:
+                metrics_task.cancel()
+            if summary_task is not None:
+                summary_task.cancel()
+            if sampler_task is not None:
+                sampler_task.cancel()
+            if self._pool is not None:
+                await self._pool.close()
             await self._shutdown_agents()
+            # Deliver whatever is still queued (exit events, final output) before the
+            # journal goes away.
+            await self.bus.aclose()
             self.journal.close()
-
-    async def _spawn_agents(self, agent_id: str | None = None) -> None:
-        """Spawn agent processes."""
+            self.summary.close()
+            if succeeded:
+                print("\n" + self.summary.summary.describe())
+            with contextlib.suppress(NotImplementedError, RuntimeError):
+                loop.remove_signal_handler(signal.SIGTERM)
+
+    def memory_usage(self) -> dict[str, dict[str, Any]]:
+        """Retained output per agent; see ``ManagedAgentProcess.memory_usage()``."""
+        return {aid: proc.memory_usage() for aid, proc in self._agents.items()}
+
+    def _agent_metrics(self) -> dict[str, Any]:
+        metrics: dict[str, Any] = {
+            "agents": {
+                aid: {**proc.memory_usage(), "stdin": proc.stdin_stats()}
+                for aid, proc in self._agents.items()
+            }
+        }
+        if self._pool is not None:
+            metrics["pool"] = self._pool.stats()
+        return metrics
+
+    def _on_terminate(self, task: asyncio.Task[Any] | None) -> None:
+        self._terminated = True
+        # Runs on the event loop: ask the writer thread to commit, don't wait for it.
+        self.journal.flush(wait=False)
+        if task is not None:
+            task.cancel()
+
+    def _select_agents(self, agent_id: str | None = None) -> tuple[AgentSpec, ...]:
         specs = self.config.agents
         if agent_id:
             specs = tuple(s for s in specs if s.id == agent_id)
             if not specs:
                 raise ValueError(f"no agent with id={agent_id!r} in config")
+        return specs
 
-        for spec in specs:
-            proc = ManagedAgentProcess(spec=spec, bus=self.bus)
-            adapter_cls = get_adapter(spec.protocol)
-            adapter = adapter_cls(proc)
+    async def _start_agent(self, spec: AgentSpec) -> tuple[ManagedAgentProcess, ProtocolAdapter]:
+        """
+        Spawn one agent process and run its protocol handshake.
+
+        Each phase is bounded by ``agent_start_timeout`` and reported as an
+        ``agent.spawn_ms`` / ``agent.init_ms`` event. ``init_ms`` runs until the
+        handshake has been written to the agent's stdin and drained; adapters do not
+        wait for the agent's reply (it arrives later as an ``agent.jsonrpc`` event), so
+        it does not include the agent's own initialization. A failed spawn raises; a
+        failed handshake is logged and the agent is used anyway. If starting fails or
+        is cancelled part-way, the process is terminated before the error propagates.
+        """
+        proc = ManagedAgentProcess(
+            spec=spec,
+            bus=self.bus,
+            max_line_bytes=int(self.config.max_line_mb * 1024 * 1024),
+            spill_dir=self.config.journal_path.parent / "spill",
+            spill_cap_bytes=int(self.config.spill_max_mb * 1024 * 1024) or None,
+            codec=get_codec(self.config.json_codec),
+            journal=self.journal,
+        )
+        adapter = get_adapter(spec.protocol)(proc)
+        timeout = self.config.agent_start_timeout
+        try:
+            error = await self._timed_phase(spec.id, "spawn", proc.start(), timeout)
+            if error is not None:
+                raise RuntimeError(f"spawn failed: {error}")
+            if self.sampler is not None:
+                self.sampler.watch(spec.id, proc.pid)
+            error = await self._timed_phase(spec.id, "init", _handshake(proc, adapter), timeout)
+        except BaseException:
+            await proc.terminate(timeout=self.config.agent_stop_timeout)
+            raise
+        if error is not None:
+            logger.warning("initialization failed for agent %s (%s), continuing", spec.id, error)
+        return proc, adapter
+
+    async def _stop_agent(self, proc: ManagedAgentProcess) -> None:
+        """Terminate one agent; publishes ``agent.stop_ms`` if it was still running."""
+        if not proc.running:
+            await proc.terminate()   # already exited: no signals, just stop the readers
+            return
+        error = await self._timed_phase(
+            proc.spec.id, "stop", proc.terminate(timeout=self.config.agent_stop_timeout), 0
+        )
+        if error is not None:
+            logger.warning("failed to terminate agent %s (%s)", proc.spec.id, error)
+
+    async def _timed_phase(
+        self, agent_id: str, phase: str, step: Awaitable[None], timeout: float
+    ) -> str | None:
+        """Run *step* (0 = no timeout), publish its duration; returns the error, if any."""
+        started = time.monotonic()
+        error: str | None = None
+        try:
+            await asyncio.wait_for(step, timeout=timeout or None)
+        except asyncio.TimeoutError:
+            error = f"timed out after {timeout:g}s"
+        except Exception as exc:
+            error = f"{type(exc).__name__}: {exc}"
+        await self.bus.publish(
+            agent_phase_timing(
+                ts=time.time(),
+                agent_id=agent_id,
+                phase=phase,
+                ms=(time.monotonic() - started) * 1000.0,
+                error=error,
+            )
+        )
+        return error
+
+    async def _acquire_agents(self, specs: Sequence[AgentSpec]) -> list[PooledAgent]:
+        """
+        Start (or lease) an agent for every spec concurrently and register them.
 
+        Returns the leases to release later. If any agent could not be acquired, the
+        others are still registered (so shutdown covers them) and ``AgentStartError``
+        reports every failure.
+        """
+        acquire = self._pool.lease if self._pool is not None else self._start_agent
+        results = await asyncio.gather(*(acquire(spec) for spec in specs), return_exceptions=True)
+        leases: list[PooledAgent] = []
+        failures: dict[str, str] = {}
+        for spec, result in zip(specs, results, strict=True):
+            if isinstance(result, Exception):
+                failures[spec.id] = str(result) or type(result).__name__
+                continue
+            if isinstance(result, BaseException):
+                raise result
+            if isinstance(result, PooledAgent):
+                leases.append(result)
+                proc, adapter = result.process, result.adapter
+            else:
+                proc, adapter = result
             self._agents[spec.id] = proc
             self._adapters[spec.id] = adapter
+        if failures:
+            # Hand back what we did get so a pool doesn't leak leases.
+            if self._pool is not None:
+                for lease in leases:
+                    await self._pool.release(lease)
+            raise AgentStartError(failures)
+        return leases
+
+    async def _run_one(
+        self, task: str, specs: Sequence[AgentSpec], *, agent_id: str | None, route: str
+    ) -> None:
+        """Acquire agents (leased or fresh), send *task*, wait for completion, give them back."""
+        leases: list[PooledAgent] = []
+        finished = False
+        try:
+            leases = await self._acquire_agents(specs)
+
+            # Set up router
+            agent_pairs = {
+                aid: (proc, self._adapters[aid])
+                for aid, proc in self._agents.items()
+            }
+            self._router = Router(self.bus, agent_pairs, mode=route)
 
-            await proc.start()
+            # Send task
+            await self.bus.publish(
+                task_submitted(ts=time.time(), task=task, route=route)
+            )
+            await self._router.send_task(task, agent_id=agent_id)
 
-    async def _initialize_agents(self) -> None:
-        """Run protocol initialization handshakes."""
-        for aid, adapter in self._adapters.items():
-            try:
-                await adapter.initialize()
-            except Exception:
-                logger.warning("initialization failed for agent %s, continuing", aid)
+            # For echo agents, close stdin so they exit
+            # For real agents, we wait for completion signals
+            finished = await self._monitor_agents(timeout=120.0)
+
+            await self.bus.publish(task_completed(ts=time.time(), task=task))
+        finally:
+            if self._pool is not None:
+                # An agent that timed out or failed mid-task may still be busy with it.
+                for lease in leases:
+                    await self._pool.release(lease, retire=not finished)
+            else:
+                await self._shutdown_agents()
 
     async def _monitor_agents(self, timeout: float = 120.0) -> bool:
         """
@@ -172,6 +421,7 @@ class Hub:
                     result = await self.tool_runner.execute(
                         event.agent_id, tool_name, args, corr_id,
                         sandbox=agent_proc.spec.sandbox,
+                        limits=agent_proc.spec.tool_limits,
                     )
                     ok = "error" not in result
                     await adapter.send_tool_result(corr_id, result, ok=ok)
@@ -194,6 +444,10 @@ class Hub:
                         await self._router.forward_output(event.agent_id, text)
 
             elif event.kind == "agent.exited" and event.agent_id:
+                # A pooled agent retired after an earlier task can exit under the same id.
+                proc = self._agents.get(event.agent_id)
+                if proc is None or proc.running:
+                    return
                 completed_agents.add(event.agent_id)
                 if len(completed_agents) >= len(self._agents):
                     completion_event.set()
@@ -219,9 +473,5 @@ class Hub:
             unsub()
 
     async def _shutdown_agents(self) -> None:
-        """Terminate all agent processes."""
-        for aid, proc in self._agents.items():
-            try:
-                await proc.terminate()
-            except Exception:
-                logger.warning("failed to terminate agent %s", aid)
+        """Terminate all agent processes, concurrently."""
+        await asyncio.gather(*(self._stop_agent(proc) for proc in self._agents.values()))
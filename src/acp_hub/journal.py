@@ -1,13 +1,83 @@
 from __future__ import annotations
 
+import asyncio
+import atexit
+import contextlib
+import itertools
 import json
+import logging
+import os
+import queue
+import threading
 import time
-from collections.abc import Awaitable, Callable
-from dataclasses import dataclass
+from collections.abc import Awaitable, Callable, Iterable, Iterator
+from dataclasses import dataclass, field
 from pathlib import Path
-from typing import TextIO
+from typing import IO, Any, TextIO, cast
 
+from acp_hub.codec import DEFAULT_CODEC, JsonCodec
+from acp_hub.config import COMPRESSION_MODES, DURABILITY_MODES, JOURNAL_FORMATS
 from acp_hub.events import Event
+from acp_hub.journal_binary import MAGIC, BinaryEncoder, is_binary, iter_binary
+from acp_hub.journal_index import (
+    IndexKey,
+    JournalIndex,
+    encode_entry,
+    index_header,
+    index_key,
+    index_path,
+    indexed_end,
+)
+from acp_hub.journal_segments import (
+    Segment,
+    compress_segment,
+    open_segment,
+    pending_compressions,
+    read_manifest,
+    rotate,
+    snapshot,
+)
+
+logger = logging.getLogger(__name__)
+
+# Kinds after which buffered lines are committed immediately, regardless of thresholds.
+_COMMIT_KINDS = frozenset({"hub.stopped", "agent.exited"})
+
+# Writer-thread control messages: stop, or just commit, after everything queued before it.
+_STOP = object()
+_COMMIT = object()
+
+# How often a caller waiting on the writer thread checks that it is still alive.
+_WRITER_POLL = 0.1
+
+# Stand-in for the payload while encoding a raw-passthrough line; after json.dumps it
+# renders as `"payload": 0`, which cannot occur inside an escaped string value.
+_PAYLOAD_SLOT = '"payload": 0'
+
+# File buffer for convert_journal()'s output (readers buffer 1 MiB the same way).
+_READ_BUFFER = 1 << 20
+_TS_KEY = b'"ts": '
+
+
+def encode_event(event: Event) -> str:
+    """
+    Serialize *event* as one journal line (without the trailing newline).
+
+    When the event carries the agent's original text (``Event.raw``) for a lone
+    ``payload["message"]``, that text is spliced in verbatim rather than re-encoding the
+    decoded message.
+
+    Always encoded with the stdlib: the prefilters, ``peek_ts`` and the sidecar index
+    depend on its sorted keys and ``", "``/``": "`` separators. Reads go through the
+    journal's *codec*.
+    """
+    d = event.to_dict()
+    raw = event.raw
+    if raw is None or len(event.payload) != 1 or "message" not in event.payload:
+        return json.dumps(d, sort_keys=True)
+    d["payload"] = 0
+    head, tail = json.dumps(d, sort_keys=True).split(_PAYLOAD_SLOT, 1)
+    return f'{head}"payload": {{"message": {raw.strip()}}}{tail}'
 
 
 @dataclass
@@ -17,49 +87,426 @@ class JsonlJournal:
 
     Each line is a single Event dict. This is intentionally simple so we can tail, grep,
     and replay runs without specialized tooling.
+
+    Writes are group-committed: lines are buffered and handed to the file once
+    *flush_interval* seconds have passed since the first buffered line or
+    *flush_bytes* are pending. What a commit guarantees depends on *durability*:
+
+    - ``none``: lines are written to the file object; Python/OS buffering decides
+      when they reach the disk.
+    - ``flush``: the file object is flushed, so a crash of the hub loses nothing
+      already committed.
+    - ``fsync-per-batch``: each commit is also ``fsync``-ed, surviving power loss.
+
+    ``hub.stopped`` and ``agent.exited`` events, ``flush()``/``close()`` and
+    interpreter exit always commit immediately.
+
+    With *index* set (the default), every commit also appends the byte offsets of its
+    lines to a sidecar index (see ``JournalIndex``), which ``lookup()`` uses to seek
+    by time, kind, agent or correlation id instead of scanning the file. ``open()``
+    never builds the index: if an existing sidecar is behind the file (or missing), the
+    writer leaves it alone and ``lookup()`` indexes the uncovered lines in memory.
+
+    With *rotate_bytes* and/or *rotate_interval* (seconds) set, the file at *path* is
+    the hot segment: once it grows past the size or age limit it is renamed to the
+    next numbered segment (``events.000001.jsonl``), listed in a manifest
+    (``events.manifest.json``), and compressed with *compression* (``gzip``, ``lzma``
+    or ``none``) on a background thread while writing continues in a fresh file.
+    ``iter_events()``, ``read_all()`` and ``lookup()`` read cold and hot segments
+    alike.
+
+    *format* ``binary`` swaps the JSONL lines for the compact record format of
+    ``journal_binary`` (interned kinds/agents, compact JSON payloads): cheaper to write
+    and faster to read back, at the price of not being greppable. Readers detect the
+    format from the file itself; ``open()`` refuses to append one format to a file of
+    the other. ``acp-hub journal convert`` goes either way.
+    Binary journals have no sidecar index, so ``lookup()`` scans them.
+
+    With *background* set, encoding and file I/O move to a dedicated writer thread fed
+    through a bounded queue of *queue_size* events, so the caller only pays for a queue
+    put. Overflow policy: when the queue is full ``write()`` blocks until the writer
+    catches up (nothing is dropped); ``try_write()`` returns False instead, which is
+    what ``journal_sink`` uses to wait off the event loop. ``close()`` drains the
+    queue before closing the file. An event that cannot be encoded is logged and
+    dropped; any other writer failure (a full disk) stops the thread, and the error is
+    re-raised by the next ``write()``, ``flush()`` or ``close()``.
+
+    *codec* decodes lines on the read side (``iter_events()``, ``lookup()``); lines
+    are always written by ``encode_event``.
     """
 
     path: Path
-    _fh: TextIO | None = None
+    durability: str = "flush"
+    flush_interval: float = 0.05
+    flush_bytes: int = 256 * 1024
+    background: bool = False
+    queue_size: int = 8192
+    index: bool = True
+    rotate_bytes: int | None = None
+    rotate_interval: float | None = None
+    compression: str = "gzip"
+    format: str = "jsonl"
+    codec: JsonCodec = DEFAULT_CODEC
+    _fh: IO[Any] | None = None
+    _encoder: BinaryEncoder | None = None
+    _index_fh: TextIO | None = None
+    _offset: int = 0
+    _reader: JournalIndex | None = None
+    _pending: list[Any] = field(default_factory=list)  # str lines, or bytes records
+    _pending_keys: list[IndexKey] = field(default_factory=list)
+    _pending_bytes: int = 0
+    _pending_since: float = 0.0
+    _timer: asyncio.TimerHandle | None = None
+    _queue: queue.Queue[object] | None = None
+    _thread: threading.Thread | None = None
+    _segment_opened: float = 0.0
+    _compressors: list[threading.Thread] = field(default_factory=list)
+    _atexit: bool = False
+    _error: Exception | None = None
+
+    def __post_init__(self) -> None:
+        if self.durability not in DURABILITY_MODES:
+            raise ValueError(
+                f"unknown journal durability: {self.durability!r}. Available: {DURABILITY_MODES}"
+            )
+        if self.format not in JOURNAL_FORMATS:
+            raise ValueError(
+                f"unknown journal format: {self.format!r}. Available: {JOURNAL_FORMATS}"
+            )
+        if self.compression not in COMPRESSION_MODES:
+            raise ValueError(
+                f"unknown journal compression: {self.compression!r}. Available: {COMPRESSION_MODES}"
+            )
 
     def open(self) -> None:
         self.path.parent.mkdir(parents=True, exist_ok=True)
-        self._fh = self.path.open("a", encoding="utf-8")
+        self._open_hot()
+        # Finish compressing segments a previous (killed) hub left behind.
+        for name in pending_compressions(self.path):
+            self._compress(name)
+        if self.background:
+            self._error = None
+            self._queue = queue.Queue(maxsize=self.queue_size)
+            self._thread = threading.Thread(
+                target=self._run_writer, name=f"journal-writer:{self.path.name}", daemon=True
+            )
+            self._thread.start()
+        if not self._atexit:
+            atexit.register(self.flush)
+            self._atexit = True
 
     def close(self) -> None:
         if self._fh is not None:
-            self._fh.close()
-            self._fh = None
+            try:
+                if self._thread is not None:
+                    try:
+                        self._put(_STOP)
+                    finally:
+                        self._thread.join()
+                        self._thread = None
+                        self._queue = None
+                self._check_writer()
+                self.flush()
+            finally:
+                # After a writer failure, whatever is still pending is lost.
+                self._pending.clear()
+                self._pending_keys.clear()
+                self._pending_bytes = 0
+                self._close_hot()
+                for t in self._compressors:
+                    t.join()
+                self._compressors.clear()
+                atexit.unregister(self.flush)
+                self._atexit = False
 
     def write(self, event: Event) -> None:
         if self._fh is None:
             self.open()
+        if self._queue is not None:
+            self._put(event)
+            return
+        if self._buffer(event):
+            self._commit()
+        elif self._timer is None:
+            self._schedule_commit()
+
+    def try_write(self, event: Event) -> bool:
+        """Like ``write()``, but return False instead of blocking on a full queue."""
+        if self._queue is None:
+            self.write(event)
+            return True
+        self._check_writer()
+        try:
+            self._queue.put_nowait(event)
+        except queue.Full:
+            return False
+        return True
+
+    def flush(self, *, wait: bool = True) -> None:
+        """
+        Commit buffered lines now, honouring the durability mode.
+
+        With a background writer and *wait* False, the writer is only asked to commit:
+        for callers on the event loop (signal handlers) that must not block on it.
+        """
+        self._check_writer()
+        if self._thread is not None and self._thread.is_alive():
+            assert self._queue is not None
+            if not wait:
+                # A full queue means the writer is busy; it commits within flush_interval.
+                with contextlib.suppress(queue.Full):
+                    self._queue.put_nowait(_COMMIT)
+                return
+            done = threading.Event()
+            self._put(done)
+            while not done.wait(_WRITER_POLL):
+                self._check_writer()
+            return
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        self._commit()
+
+    def _put(self, item: object) -> None:
+        """Queue *item* for the writer thread; raise its error instead of blocking if it died."""
+        assert self._queue is not None
+        self._check_writer()
+        while True:
+            try:
+                self._queue.put(item, timeout=_WRITER_POLL)
+                return
+            except queue.Full:
+                self._check_writer()
+
+    def _check_writer(self) -> None:
+        if self._error is not None:
+            raise self._error
+
+    def _buffer(self, event: Event) -> bool:
+        """Encode *event* into the pending batch; return True if a commit is due now."""
+        if self._encoder is not None:
+            line: Any = self._encoder.encode(event)
+        else:
+            line = encode_event(event) + "\n"
+        if not self._pending:
+            self._pending_since = time.monotonic()
+        self._pending.append(line)
+        self._pending_bytes += len(line)
+        if self._index_fh is not None:
+            self._pending_keys.append(index_key(event))
+        return self._pending_bytes >= self.flush_bytes or event.kind in _COMMIT_KINDS
+
+    def _commit(self) -> None:
+        if not self._pending or self._fh is None:
+            return
+        if self._encoder is not None:
+            self._fh.write(b"".join(self._pending))
+        else:
+            self._fh.write("".join(self._pending))
+        if self.durability != "none":
+            self._fh.flush()
+        if self.durability == "fsync-per-batch":
+            os.fsync(self._fh.fileno())
+        if self._index_fh is not None:
+            self._commit_index()
+        else:
+            self._offset += self._pending_bytes  # JSONL: characters, close enough for rotation
+        self._pending.clear()
+        self._pending_bytes = 0
+        if self._rotation_due():
+            self._rotate()
+
+    def _commit_index(self) -> None:
+        """Append sidecar records for the lines just committed (after the lines themselves)."""
+        assert self._index_fh is not None
+        records: list[str] = []
+        offset = self._offset
+        for line, key in zip(self._pending, self._pending_keys, strict=True):
+            size = len(line) if line.isascii() else len(line.encode("utf-8"))
+            records.append(encode_entry(offset, size, key))
+            offset += size
+        self._offset = offset
+        self._pending_keys.clear()
+        self._index_fh.write("".join(records))
+        if self.durability != "none":
+            self._index_fh.flush()
+
+    def _open_hot(self) -> None:
+        if self.path.exists() and self.path.stat().st_size:
+            existing = journal_format(self.path)
+            if existing != self.format:
+                raise ValueError(
+                    f"{self.path} is a {existing} journal; cannot append {self.format} records"
+                )
+        self._segment_opened = time.monotonic()
+        if self.format == "binary":
+            self._fh = self.path.open("ab")
+            self._encoder = BinaryEncoder()
+            self._fh.write(self._encoder.start(new_file=self._fh.tell() == 0))
+            self._fh.flush()
+            self._offset = self._fh.tell()
+            return
+        self._fh = self.path.open("a", encoding="utf-8")
+        self._offset = self.path.stat().st_size
+        if self.index:
+            sidecar = index_path(self.path)
+            if self._offset == 0:
+                sidecar.write_text(index_header(), encoding="utf-8")
+                self._index_fh = sidecar.open("a", encoding="utf-8")
+            elif indexed_end(self.path) == self._offset:
+                self._index_fh = sidecar.open("a", encoding="utf-8")
+            # Otherwise appending would leave a gap: the sidecar stays as it is, and
+            # lookup() indexes what it does not cover (a scan of the file) in memory.
+
+    def _close_hot(self) -> None:
         assert self._fh is not None
-        self._fh.write(json.dumps(event.to_dict(), sort_keys=True) + "\n")
-        self._fh.flush()
+        self._fh.close()
+        self._fh = None
+        if self._index_fh is not None:
+            self._index_fh.close()
+            self._index_fh = None
+
+    def _rotation_due(self) -> bool:
+        if self._offset == 0:
+            return False
+        if self.rotate_bytes is not None and self._offset >= self.rotate_bytes:
+            return True
+        return (
+            self.rotate_interval is not None
+            and time.monotonic() - self._segment_opened >= self.rotate_interval
+        )
+
+    def _rotate(self) -> None:
+        self._close_hot()
+        segment = rotate(self.path)
+        self._open_hot()
+        self._compress(segment.name)
+
+    def _compress(self, name: str) -> None:
+        self._compressors = [t for t in self._compressors if t.is_alive()]
+        t = threading.Thread(
+            target=compress_segment,
+            args=(self.path, name, self.compression),
+            name=f"journal-compress:{name}",
+            daemon=True,
+        )
+        t.start()
+        self._compressors.append(t)
+
+    def _run_writer(self) -> None:
+        try:
+            self._writer_loop()
+        except Exception as exc:
+            logger.exception("journal writer for %s failed", self.path)
+            self._error = exc
+
+    def _writer_loop(self) -> None:
+        assert self._queue is not None
+        q = self._queue
+        while True:
+            timeout = None
+            if self._pending:
+                timeout = max(0.0, self._pending_since + self.flush_interval - time.monotonic())
+            try:
+                item = q.get(timeout=timeout)
+            except queue.Empty:
+                self._commit()
+                continue
+            if item is _STOP:
+                self._commit()
+                return
+            if item is _COMMIT:
+                self._commit()
+                continue
+            if isinstance(item, threading.Event):
+                self._commit()
+                item.set()
+                continue
+            event = cast(Event, item)
+            try:
+                due = self._buffer(event)
+            except Exception:
+                # Encoding failed (e.g. a payload that is not JSON-serializable): only
+                # this event is lost, the journal goes on.
+                logger.exception("journal: dropping %s event that could not be encoded", event.kind)
+                continue
+            if due:
+                self._commit()
+
+    def _schedule_commit(self) -> None:
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            # No event loop (plain synchronous use): commit per write, as before.
+            self.flush()
+            return
+        self._timer = loop.call_later(self.flush_interval, self.flush)
 
     def write_system_note(self, text: str) -> None:
         self.write(Event(ts=time.time(), kind="system.note", payload={"text": text}))
 
     def read_all(self) -> list[Event]:
         """Read all events from the journal file (for replay)."""
-        events: list[Event] = []
-        if not self.path.exists():
-            return events
-        for line in self.path.read_text(encoding="utf-8").splitlines():
-            line = line.strip()
-            if not line:
-                continue
-            d = json.loads(line)
-            events.append(
-                Event(
-                    ts=d["ts"],
-                    kind=d["kind"],
-                    payload=d["payload"],
-                    agent_id=d.get("agent_id"),
+        return list(self.iter_events())
+
+    def iter_events(
+        self,
+        *,
+        since_ts: float | None = None,
+        kinds: Iterable[str] | None = None,
+        agent_id: str | None = None,
+    ) -> Iterator[Event]:
+        """Stream events from the journal file; see the module-level ``iter_events``."""
+        self.flush()
+        return iter_events(
+            self.path, since_ts=since_ts, kinds=kinds, agent_id=agent_id, codec=self.codec
+        )
+
+    def lookup(
+        self,
+        *,
+        since_ts: float | None = None,
+        kind: str | None = None,
+        agent_id: str | None = None,
+        correlation_id: str | None = None,
+    ) -> Iterator[Event]:
+        """
+        Yield events matching all given filters, seeking via the sidecar index.
+
+        The index is loaded on first use and refreshed on each call; lines a missing or
+        stale sidecar does not cover are indexed from the journal, in memory. Cold segments
+        are not indexed: those the manifest cannot rule out are scanned with the
+        ``iter_events`` pre-filters.
+        """
+        self.flush()
+        if self.format == "binary":
+            return (
+                e
+                for e in iter_events(
+                    self.path,
+                    since_ts=since_ts,
+                    kinds=[kind] if kind is not None else None,
+                    agent_id=agent_id,
+                    codec=self.codec,
                 )
+                if correlation_id is None or e.payload.get("correlation_id") == correlation_id
+            )
+        if self._reader is None:
+            self._reader = JournalIndex.open(self.path, codec=self.codec)
+        else:
+            self._reader.refresh()
+        kinds = [kind] if kind is not None else None
+        cold = (
+            e
+            for e in _iter_cold(
+                self.path, since_ts=since_ts, kinds=kinds, agent_id=agent_id, codec=self.codec
             )
-        return events
+            if correlation_id is None or e.payload.get("correlation_id") == correlation_id
+        )
+        hot = self._reader.find(
+            since_ts=since_ts, kind=kind, agent_id=agent_id, correlation_id=correlation_id
+        )
+        return itertools.chain(cold, hot)
 
     def __enter__(self) -> "JsonlJournal":
         self.open()
@@ -69,11 +516,182 @@ class JsonlJournal:
         self.close()
 
 
+def iter_events(
+    path: Path,
+    *,
+    since_ts: float | None = None,
+    kinds: Iterable[str] | None = None,
+    agent_id: str | None = None,
+    codec: JsonCodec = DEFAULT_CODEC,
+) -> Iterator[Event]:
+    """
+    Yield events from the journal at *path* one line at a time.
+
+    Closed segments listed in the journal's manifest come first, oldest first and
+    decompressed on the fly, skipping any whose summary rules out the filters; the
+    hot file at *path* comes last.
+
+    Files are read through a large buffer, so memory use does not grow with the
+    journal. Filters are checked on the raw line before JSON decoding: lines whose
+    trailing ``ts`` is older than *since_ts*, or that cannot contain one of *kinds* or
+    *agent_id*, are skipped undecoded. Survivors are decoded with *codec* and
+    re-checked.
+
+    A final line without a newline that does not parse (a writer killed mid-line) is
+    ignored; corrupt lines anywhere else still raise.
+    """
+    kind_set = frozenset(kinds) if kinds is not None else None
+    segments, hot = snapshot(path)
+    try:
+        yield from _iter_cold(
+            path,
+            since_ts=since_ts,
+            kinds=kind_set,
+            agent_id=agent_id,
+            codec=codec,
+            segments=segments,
+        )
+        if hot is not None:
+            yield from _iter_file(
+                hot, since_ts=since_ts, kinds=kind_set, agent_id=agent_id, codec=codec
+            )
+    finally:
+        if hot is not None:
+            hot.close()
+
+
+def _iter_cold(
+    path: Path,
+    *,
+    since_ts: float | None,
+    kinds: Iterable[str] | None,
+    agent_id: str | None,
+    codec: JsonCodec = DEFAULT_CODEC,
+    segments: list[Segment] | None = None,
+) -> Iterator[Event]:
+    """Events of the closed *segments* (default: the manifest's) that may match."""
+    kind_set = frozenset(kinds) if kinds is not None else None
+    for segment in read_manifest(path) if segments is None else segments:
+        if not segment.may_match(since_ts=since_ts, kinds=kind_set, agent_id=agent_id):
+            continue
+        fh = open_segment(path, segment)
+        if fh is None:
+            continue
+        with fh:
+            yield from _iter_file(
+                fh, since_ts=since_ts, kinds=kind_set, agent_id=agent_id, codec=codec
+            )
+
+
+def _iter_file(
+    fh: IO[bytes],
+    *,
+    since_ts: float | None,
+    kinds: frozenset[str] | None,
+    agent_id: str | None,
+    codec: JsonCodec,
+) -> Iterator[Event]:
+    """Dispatch on the file signature: binary records or JSONL lines."""
+    if is_binary(fh.read(len(MAGIC))):
+        return iter_binary(fh, since_ts=since_ts, kinds=kinds, agent_id=agent_id)
+    fh.seek(0)
+    return _iter_lines(fh, since_ts=since_ts, kinds=kinds, agent_id=agent_id, codec=codec)
+
+
+def journal_format(path: Path) -> str:
+    """``binary`` or ``jsonl``, judged by the file's first bytes."""
+    with path.open("rb") as fh:
+        return "binary" if is_binary(fh.read(len(MAGIC))) else "jsonl"
+
+
+def convert_journal(src: Path, dst: Path, *, to: str) -> int:
+    """
+    Rewrite the journal at *src* (all segments, any format) as a single *to* file.
+
+    Events round-trip exactly: each one's ``to_dict()`` is the same on both sides.
+    Returns the number of events written.
+    """
+    if to not in JOURNAL_FORMATS:
+        raise ValueError(f"unknown journal format: {to!r}. Available: {JOURNAL_FORMATS}")
+    count = 0
+    dst.parent.mkdir(parents=True, exist_ok=True)
+    with dst.open("wb", buffering=_READ_BUFFER) as out:
+        encoder = BinaryEncoder() if to == "binary" else None
+        if encoder is not None:
+            out.write(encoder.start(new_file=True))
+        for event in iter_events(src):
+            if encoder is not None:
+                out.write(encoder.encode(event))
+            else:
+                out.write(encode_event(event).encode("utf-8") + b"\n")
+            count += 1
+    return count
+
+
+def _iter_lines(
+    fh: IO[bytes],
+    *,
+    since_ts: float | None,
+    kinds: frozenset[str] | None,
+    agent_id: str | None,
+    codec: JsonCodec,
+) -> Iterator[Event]:
+    kind_needles = (
+        [b'"kind": ' + json.dumps(k).encode() for k in kinds] if kinds is not None else None
+    )
+    agent_needle = b'"agent_id": ' + json.dumps(agent_id).encode() if agent_id is not None else None
+    for line in fh:
+        if kind_needles is not None and not any(n in line for n in kind_needles):
+            continue
+        if agent_needle is not None and agent_needle not in line:
+            continue
+        if since_ts is not None:
+            ts = peek_ts(line)
+            if ts is not None and ts < since_ts:
+                continue
+        if not line.strip():
+            continue
+        try:
+            d = codec.loads(line)
+        except ValueError:
+            if line.endswith(b"\n"):
+                raise
+            return  # truncated final line
+        event = Event.from_dict(d)
+        if kinds is not None and event.kind not in kinds:
+            continue
+        if agent_id is not None and event.agent_id != agent_id:
+            continue
+        if since_ts is not None and event.ts < since_ts:
+            continue
+        yield event
+
+
+def peek_ts(line: bytes) -> float | None:
+    """
+    Read the top-level ``ts`` of an encoded line without decoding it.
+
+    Journal lines are written with sorted keys, so ``ts`` is the last member. Returns
+    None when the line does not have that shape.
+    """
+    body = line.rstrip()
+    idx = body.rfind(_TS_KEY)
+    if idx < 0 or not body.endswith(b"}"):
+        return None
+    try:
+        return float(body[idx + len(_TS_KEY) : -1])
+    except ValueError:
+        return None
+
+
 def journal_sink(journal: JsonlJournal) -> Callable[[Event], Awaitable[None]]:
     """Return an async handler suitable for EventBus.subscribe()."""
 
     async def _sink(event: Event) -> None:
-        journal.write(event)
+        # A background journal with a full queue would block the loop; wait in a
+        # thread instead so only this subscriber stalls.
+        if not journal.try_write(event):
+            await asyncio.to_thread(journal.write, event)
 
     return _sink
 
@@ -0,0 +1,188 @@
+from __future__ import annotations
+
+import json
+import struct
+import sys
+from collections.abc import Iterator
+from typing import IO
+
+from acp_hub.events import Event
+
+# File signature; readers sniff it to tell binary journals from JSONL ones. The last
+# byte is the format version (1 stored marshal payloads and is no longer read).
+MAGIC = b"ACPJ\x00\x02"
+_MAGIC_PREFIX = MAGIC[:-1]
+
+_TS = struct.Struct("<d")
+_READ_CHUNK = 1 << 20
+
+# Record tags.
+_EVENT = 0x45  # "E": ts, seq, kind id, agent id + 1 (0 = none), JSON payload
+_STRING = 0x53  # "S": next entry of the string table, UTF-8
+_RESET = 0x52  # "R": clear the string table (start of every writer session)
+
+
+def is_binary(head: bytes) -> bool:
+    """Whether *head*, a file's first ``len(MAGIC)`` bytes, starts a binary journal."""
+    if head == MAGIC:
+        return True
+    if len(head) == len(MAGIC) and head.startswith(_MAGIC_PREFIX):
+        raise ValueError(f"unsupported binary journal version {head[-1]}")
+    return False
+
+
+def _varint(n: int) -> bytes:
+    out = bytearray()
+    while n > 0x7F:
+        out.append((n & 0x7F) | 0x80)
+        n >>= 7
+    out.append(n)
+    return bytes(out)
+
+
+class BinaryEncoder:
+    """
+    Encoder for the binary journal format.
+
+    A file is ``MAGIC`` followed by records, each a varint body length and a body
+    whose first byte is its tag. Kind and agent-id strings are sent once through
+    ``S`` records and then referenced by table position. A payload is compact UTF-8
+    JSON filling the rest of its body, so the record length delimits it; it decodes
+    to exactly what the JSONL journal would hold (``json`` writes floats by ``repr``).
+
+    One encoder per writer session: its string table starts with an ``R`` record, so
+    appending to an existing file never depends on the table already in it.
+    """
+
+    def __init__(self) -> None:
+        self._ids: dict[str, int] = {}
+
+    def start(self, *, new_file: bool) -> bytes:
+        """Bytes to write before the first event of a session."""
+        self._ids.clear()
+        reset = _varint(1) + bytes((_RESET,))
+        return MAGIC + reset if new_file else reset
+
+    def encode(self, event: Event) -> bytes:
+        out = bytearray()
+        kind = self._intern(event.kind, out)
+        agent = 0 if event.agent_id is None else self._intern(event.agent_id, out) + 1
+        body = b"".join(
+            (
+                bytes((_EVENT,)),
+                _TS.pack(event.ts),
+                _varint(event.seq),
+                _varint(kind),
+                _varint(agent),
+                _dump_payload(event.payload),
+            )
+        )
+        out += _varint(len(body))
+        out += body
+        return bytes(out)
+
+    def _intern(self, s: str, out: bytearray) -> int:
+        i = self._ids.get(s)
+        if i is None:
+            i = self._ids[s] = len(self._ids)
+            data = s.encode("utf-8")
+            out += _varint(len(data) + 1)
+            out.append(_STRING)
+            out += data
+        return i
+
+
+def iter_binary(
+    fh: IO[bytes],
+    *,
+    since_ts: float | None = None,
+    kinds: frozenset[str] | None = None,
+    agent_id: str | None = None,
+) -> Iterator[Event]:
+    """
+    Decode events from *fh*, positioned just past ``MAGIC``.
+
+    Filters are checked against the record header, so payloads of skipped records
+    are never decoded. A record cut short at end of file is ignored.
+    """
+    table: list[str] = []
+    buf = bytearray()
+    pos = 0
+    while True:
+        chunk = fh.read(_READ_CHUNK)
+        if not chunk:
+            return
+        # Keep only the unconsumed tail, in place: a record bigger than a chunk is
+        # gathered in amortized linear time rather than re-copied on every read.
+        del buf[:pos]
+        buf += chunk
+        pos = 0
+        end_buf = len(buf)
+        while pos < end_buf:
+            # Body length (varint).
+            start = pos
+            length = shift = 0
+            while pos < end_buf:
+                b = buf[pos]
+                pos += 1
+                length |= (b & 0x7F) << shift
+                if b < 0x80:
+                    break
+                shift += 7
+            else:
+                pos = start
+                break
+            end = pos + length
+            if end > end_buf:
+                pos = start
+                break
+            tag = buf[pos]
+            if tag == _EVENT:
+                ts = _TS.unpack_from(buf, pos + 1)[0]
+                p = pos + 9
+                seq, p = _read_varint(buf, p)
+                # Table references are almost always single-byte varints.
+                kind_id = buf[p]
+                if kind_id < 0x80:
+                    p += 1
+                else:
+                    kind_id, p = _read_varint(buf, p)
+                agent_ref = buf[p]
+                if agent_ref < 0x80:
+                    p += 1
+                else:
+                    agent_ref, p = _read_varint(buf, p)
+                pos = end
+                kind = table[kind_id]
+                agent = table[agent_ref - 1] if agent_ref else None
+                if since_ts is not None and ts < since_ts:
+                    continue
+                if kinds is not None and kind not in kinds:
+                    continue
+                if agent_id is not None and agent != agent_id:
+                    continue
+                payload = json.loads(buf[p:end])
+                yield Event(ts=ts, kind=kind, payload=payload, agent_id=agent, seq=seq)
+            elif tag == _STRING:
+                table.append(sys.intern(buf[pos + 1 : end].decode("utf-8")))
+                pos = end
+            elif tag == _RESET:
+                table.clear()
+                pos = end
+            else:
+                raise ValueError(f"corrupt binary journal: unknown record tag {tag:#x}")
+
+
+def _dump_payload(payload: dict) -> bytes:
+    return json.dumps(payload, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+def _read_varint(buf: bytearray, pos: int) -> tuple[int, int]:
+    n = shift = 0
+    while True:
+        b = buf[pos]
+        pos += 1
+        n |= (b & 0x7F) << shift
+        if b < 0x80:
+            return n, pos
+        shift += 7
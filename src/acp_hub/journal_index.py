@@ -0,0 +1,321 @@
+from __future__ import annotations
+
+import json
+import math
+import os
+from bisect import bisect_left
+from collections.abc import Iterator
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any
+
+from acp_hub.codec import DEFAULT_CODEC, JsonCodec
+from acp_hub.events import Event
+
+INDEX_VERSION = 1
+DEFAULT_BUCKET_SECONDS = 60.0
+
+# How much of the sidecar's end ``indexed_end()`` reads to find its last record.
+_TAIL_BYTES = 4096
+
+# (ts, kind, agent_id, correlation_id) of one journal line.
+IndexKey = tuple[float, str, str | None, str | None]
+
+
+def index_path(journal_path: Path) -> Path:
+    """Sidecar location for *journal_path* (``events.jsonl`` → ``events.jsonl.idx``)."""
+    return journal_path.with_name(journal_path.name + ".idx")
+
+
+def index_header() -> str:
+    return json.dumps({"version": INDEX_VERSION}) + "\n"
+
+
+def index_key(event: Event) -> IndexKey:
+    corr = event.payload.get("correlation_id")
+    return (event.ts, event.kind, event.agent_id, corr if isinstance(corr, str) else None)
+
+
+def encode_entry(offset: int, length: int, key: IndexKey) -> str:
+    """One sidecar line: ``[offset, length, ts, kind, agent_id, correlation_id]``."""
+    return json.dumps([offset, length, *key]) + "\n"
+
+
+def indexed_end(journal_path: Path) -> int | None:
+    """
+    Journal offset up to which the sidecar of *journal_path* claims to index, judged
+    from its last record alone; None if there is no usable sidecar.
+
+    Cheap enough for ``JsonlJournal.open()``: a writer appends to the sidecar only when
+    this equals the journal size, and otherwise leaves it alone.
+    """
+    sidecar = index_path(journal_path)
+    try:
+        with sidecar.open("rb") as fh:
+            size = fh.seek(0, os.SEEK_END)
+            fh.seek(max(0, size - _TAIL_BYTES))
+            tail = fh.read()
+    except FileNotFoundError:
+        return None
+    if not tail.endswith(b"\n"):
+        return None  # empty, or a torn last record
+    lines = tail.splitlines()
+    if len(lines) < 2 and size > len(tail):
+        return None  # a record longer than the tail we read
+    try:
+        record = json.loads(lines[-1])
+    except ValueError:
+        return None
+    if isinstance(record, dict):
+        return 0 if record.get("version") == INDEX_VERSION else None
+    if not isinstance(record, list) or len(record) < 2:
+        return None
+    offset, length = record[0], record[1]
+    if not isinstance(offset, int) or not isinstance(length, int):
+        return None
+    return offset + length
+
+
+@dataclass
+class JournalIndex:
+    """
+    In-memory view of a journal's sidecar index.
+
+    The sidecar (``<journal>.idx``) is an append-only list of
+    ``[offset, length, ts, kind, agent_id, correlation_id]`` records that
+    ``JsonlJournal`` writes alongside each commit. Loading it yields posting lists of
+    byte offsets per kind, agent and correlation id, plus per-time-bucket minimum
+    offsets, so lookups seek straight to matching lines instead of scanning.
+
+    ``refresh()`` tails new sidecar records and checks them against the journal: if
+    the sidecar is missing, unreadable or claims more than the journal holds, the
+    journal is indexed from scratch; if it is merely behind, the missing tail is
+    indexed. Either way only in memory: the sidecar belongs to the writer, which may
+    be appending to it from another thread or process.
+
+    Lines are decoded with *codec* (the hub passes its configured ``json_codec``).
+    """
+
+    path: Path
+    bucket_seconds: float = DEFAULT_BUCKET_SECONDS
+    codec: JsonCodec = DEFAULT_CODEC
+    end: int = 0
+    count: int = 0
+    min_ts: float | None = None
+    max_ts: float | None = None
+    kinds: dict[str, list[int]] = field(default_factory=dict)
+    agents: dict[str, list[int]] = field(default_factory=dict)
+    correlations: dict[str, list[int]] = field(default_factory=dict)
+    _last: tuple[int, int] | None = None
+    _buckets: dict[int, int] = field(default_factory=dict)
+    _bucket_keys: list[int] | None = None
+    _bucket_min: list[int] = field(default_factory=list)
+    _sidecar_pos: int = 0
+    _detached: bool = False  # sidecar unusable; the journal alone is being indexed
+
+    @classmethod
+    def open(
+        cls,
+        journal_path: Path,
+        *,
+        bucket_seconds: float = DEFAULT_BUCKET_SECONDS,
+        codec: JsonCodec = DEFAULT_CODEC,
+    ) -> JournalIndex:
+        index = cls(path=journal_path, bucket_seconds=bucket_seconds, codec=codec)
+        index.refresh()
+        return index
+
+    def refresh(self) -> None:
+        """Bring the index up to date with the journal, rebuilding it if needed."""
+        if not self.path.exists():
+            self._reset()
+            return
+        if not self._detached:
+            sidecar = index_path(self.path)
+            if sidecar.exists() and sidecar.stat().st_size < self._sidecar_pos:
+                # Replaced underneath us (rotation): start over from the new file.
+                self._reset()
+            if not sidecar.exists() or not self._tail_sidecar(sidecar):
+                self._rebuild()
+                return
+        size = self.path.stat().st_size
+        if self.end > size or not self._last_entry_valid():
+            if self._detached:
+                # The journal was replaced (rotation); its sidecar may be usable again.
+                self._reset()
+                self.refresh()
+            else:
+                self._rebuild()
+        elif self.end < size:
+            # Lines the sidecar does not cover (yet): a writer mid-commit, or one that
+            # found the sidecar behind and left it alone.
+            self._scan_journal(self.end)
+
+    def first_offset(self, since_ts: float) -> int:
+        """Smallest offset at which a line with ``ts >= since_ts`` may start."""
+        if self._bucket_keys is None:
+            keys = sorted(self._buckets)
+            mins = [0] * len(keys)
+            low = self.end
+            for i in range(len(keys) - 1, -1, -1):
+                low = min(low, self._buckets[keys[i]])
+                mins[i] = low
+            self._bucket_keys, self._bucket_min = keys, mins
+        i = bisect_left(self._bucket_keys, self._bucket(since_ts))
+        return self._bucket_min[i] if i < len(self._bucket_min) else self.end
+
+    def find(
+        self,
+        *,
+        since_ts: float | None = None,
+        kind: str | None = None,
+        agent_id: str | None = None,
+        correlation_id: str | None = None,
+    ) -> Iterator[Event]:
+        """Yield matching events in journal order, reading only the lines the index points at."""
+        start = self.first_offset(since_ts) if since_ts is not None else 0
+        postings: list[list[int]] = []
+        for table, value in (
+            (self.kinds, kind),
+            (self.agents, agent_id),
+            (self.correlations, correlation_id),
+        ):
+            if value is not None:
+                postings.append(table.get(value, []))
+        if any(not p for p in postings):
+            return
+
+        def matches(event: Event) -> bool:
+            # Guards against a sidecar that no longer describes this file.
+            return (
+                (since_ts is None or event.ts >= since_ts)
+                and (kind is None or event.kind == kind)
+                and (agent_id is None or event.agent_id == agent_id)
+                and (
+                    correlation_id is None or event.payload.get("correlation_id") == correlation_id
+                )
+            )
+
+        with self.path.open("rb") as fh:
+            if not postings:
+                fh.seek(start)
+                for line in fh:
+                    event = _decode(line, self.codec)
+                    if event is not None and matches(event):
+                        yield event
+                return
+            postings.sort(key=len)
+            base, others = postings[0], postings[1:]
+            for off in base[bisect_left(base, start) :]:
+                if not all(_contains(p, off) for p in others):
+                    continue
+                fh.seek(off)
+                event = _decode(fh.readline(), self.codec)
+                if event is not None and matches(event):
+                    yield event
+
+    # ---- loading ----
+
+    def _reset(self) -> None:
+        self.end = 0
+        self.count = 0
+        self.min_ts = self.max_ts = None
+        self.kinds.clear()
+        self.agents.clear()
+        self.correlations.clear()
+        self._buckets.clear()
+        self._bucket_keys = None
+        self._last = None
+        self._sidecar_pos = 0
+        self._detached = False
+
+    def _add(
+        self, offset: int, length: int, ts: float, kind: str, agent_id: Any, corr: Any
+    ) -> None:
+        if offset < self.end:
+            return  # already indexed (the writer's record for a line we scanned)
+        self.kinds.setdefault(kind, []).append(offset)
+        if agent_id is not None:
+            self.agents.setdefault(agent_id, []).append(offset)
+        if corr is not None:
+            self.correlations.setdefault(corr, []).append(offset)
+        b = self._bucket(ts)
+        if offset < self._buckets.get(b, offset + 1):
+            self._buckets[b] = offset
+            self._bucket_keys = None
+        self.end = offset + length
+        self._last = (offset, length)
+        self.count += 1
+        if self.min_ts is None or ts < self.min_ts:
+            self.min_ts = ts
+        if self.max_ts is None or ts > self.max_ts:
+            self.max_ts = ts
+
+    def _bucket(self, ts: float) -> int:
+        return math.floor(ts / self.bucket_seconds)
+
+    def _tail_sidecar(self, sidecar: Path) -> bool:
+        """Consume sidecar records written since the last call; False if it is unusable."""
+        with sidecar.open("rb") as fh:
+            fh.seek(self._sidecar_pos)
+            for line in fh:
+                if not line.endswith(b"\n"):
+                    break  # partial record (writer mid-append or crashed); re-read it next time
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    return False
+                if self._sidecar_pos == 0:
+                    if not isinstance(record, dict) or record.get("version") != INDEX_VERSION:
+                        return False
+                else:
+                    try:
+                        self._add(*record)
+                    except (TypeError, ValueError):
+                        return False
+                self._sidecar_pos += len(line)
+        return True
+
+    def _last_entry_valid(self) -> bool:
+        """Cheap check that the last indexed line still sits where the sidecar says."""
+        if self._last is None:
+            return True
+        offset, length = self._last
+        with self.path.open("rb") as fh:
+            fh.seek(offset)
+            line = fh.readline()
+        return len(line) == length and _decode(line, self.codec) is not None
+
+    def _rebuild(self) -> None:
+        """Index the whole journal, ignoring the sidecar until the journal is replaced."""
+        self._reset()
+        self._detached = True
+        self._scan_journal(0)
+
+    def _scan_journal(self, start: int) -> None:
+        """Index journal lines from *start*."""
+        offset = start
+        with self.path.open("rb") as fh:
+            fh.seek(start)
+            for line in fh:
+                if not line.endswith(b"\n"):
+                    break  # partial last line; index it once it is complete
+                event = _decode(line, self.codec)
+                if event is not None:
+                    self._add(offset, len(line), *index_key(event))
+                offset += len(line)
+
+
+def _contains(postings: list[int], offset: int) -> bool:
+    i = bisect_left(postings, offset)
+    return i < len(postings) and postings[i] == offset
+
+
+def _decode(line: bytes, codec: JsonCodec) -> Event | None:
+    if not line.strip():
+        return None
+    try:
+        d = codec.loads(line)
+        return Event.from_dict(d)
+    except (ValueError, KeyError, TypeError):
+        return None
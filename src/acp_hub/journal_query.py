@@ -0,0 +1,435 @@
+from __future__ import annotations
+
+import contextlib
+import dataclasses
+import io
+import json
+import math
+import multiprocessing
+import os
+import time
+from collections import Counter, deque
+from collections.abc import Iterable, Iterator
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import IO, Any
+
+from acp_hub.codec import DEFAULT_CODEC, JsonCodec, get_codec
+from acp_hub.events import Event
+from acp_hub.journal import encode_event, peek_ts
+from acp_hub.journal_binary import MAGIC, is_binary, iter_binary
+from acp_hub.journal_segments import Segment, open_segment, read_manifest
+
+AGGREGATES = ("counts", "latency", "bytes")
+
+# Hot JSONL files are split into ranges of about this size, one per pool task.
+CHUNK_BYTES = 32 * 1024 * 1024
+
+# Lines of this kind may carry the agent's own text verbatim (``Event.raw``), which
+# can spell plain ASCII with escapes (``\/``, ``\u0041``): *contains* cannot be
+# prefiltered on them.
+_PASSTHROUGH_KIND = b'"kind": "agent.jsonrpc"'
+
+
+@dataclass
+class QueryFilter:
+    """
+    Conditions an event must meet to be selected; None means "any".
+
+    *contains* is a substring of the payload's JSON text (non-ASCII characters
+    unescaped). Every condition is first checked as a necessary condition on the raw
+    journal line, so most non-matching lines are never decoded.
+    """
+
+    kinds: frozenset[str] | None = None
+    agent_id: str | None = None
+    since_ts: float | None = None
+    until_ts: float | None = None
+    contains: str | None = None
+    correlation_id: str | None = None
+    _needles: list[Any] = field(default_factory=list, init=False, repr=False)
+    _contains_needle: bytes | None = field(default=None, init=False, repr=False)
+
+    def __post_init__(self) -> None:
+        # Each entry: bytes that must occur, or a tuple of alternatives.
+        if self.kinds is not None:
+            self._needles.append(tuple(b'"kind": ' + json.dumps(k).encode() for k in self.kinds))
+        if self.agent_id is not None:
+            self._needles.append(b'"agent_id": ' + json.dumps(self.agent_id).encode())
+        if self.correlation_id is not None:
+            self._needles.append(json.dumps(self.correlation_id).encode())
+        if (
+            self.contains
+            and self.contains.isascii()
+            and self.contains.isprintable()
+            and '"' not in self.contains
+            and "\\" not in self.contains
+        ):
+            # Plain ASCII is spelled the same in every line the journal encodes itself.
+            self._contains_needle = self.contains.encode()
+
+    def prefilter(self, line: bytes) -> bool:
+        """False if the JSONL *line* certainly does not match."""
+        for needle in self._needles:
+            if isinstance(needle, tuple):
+                if not any(n in line for n in needle):
+                    return False
+            elif needle not in line:
+                return False
+        needle = self._contains_needle
+        if needle is not None and needle not in line and _PASSTHROUGH_KIND not in line:
+            return False
+        if self.since_ts is not None or self.until_ts is not None:
+            ts = peek_ts(line)
+            if ts is not None and not self._ts_ok(ts):
+                return False
+        return True
+
+    def matches(self, event: Event) -> bool:
+        if self.kinds is not None and event.kind not in self.kinds:
+            return False
+        if self.agent_id is not None and event.agent_id != self.agent_id:
+            return False
+        if not self._ts_ok(event.ts):
+            return False
+        corr = event.payload.get("correlation_id")
+        if self.correlation_id is not None and corr != self.correlation_id:
+            return False
+        if self.contains is None:
+            return True
+        return self.contains in json.dumps(event.payload, ensure_ascii=False)
+
+    def _ts_ok(self, ts: float) -> bool:
+        if self.since_ts is not None and ts < self.since_ts:
+            return False
+        return self.until_ts is None or ts < self.until_ts
+
+
+@dataclass(frozen=True)
+class _Unit:
+    """One pool task: a byte range of the hot file, or a whole (cold) segment."""
+
+    journal: Path
+    start: int = 0
+    end: int | None = None
+    segment: Segment | None = None
+
+
+@dataclass
+class _Partial:
+    lines: list[str] = field(default_factory=list)
+    counts: Counter[str] = field(default_factory=Counter)
+    tool_events: list[tuple[float, str, str, str, str | None]] = field(default_factory=list)
+
+
+# (unit, filter, aggregate, codec name): what a pool worker needs, all picklable.
+_Task = tuple[_Unit, QueryFilter, str | None, str]
+
+
+def query_journal(
+    path: Path,
+    flt: QueryFilter,
+    *,
+    aggregate: str | None = None,
+    jobs: int | None = None,
+    chunk_bytes: int = CHUNK_BYTES,
+    codec: JsonCodec = DEFAULT_CODEC,
+) -> Iterator[Any]:
+    """
+    Run a query over every segment of the journal at *path*.
+
+    Without *aggregate*, yields matching events as NDJSON lines, in journal order.
+    With one of ``AGGREGATES`` it yields result rows (dicts) instead:
+
+    - ``counts``: events per kind;
+    - ``latency``: tool latency per tool (``tool.invocation`` → ``tool.result``,
+      paired by agent and correlation id), with p50/p95 in milliseconds;
+    - ``bytes``: journal bytes (JSONL encoding) per agent.
+
+    The hot JSONL file is split into line-aligned byte ranges of *chunk_bytes* and,
+    together with the cold segments, scanned by a ``multiprocessing`` pool of *jobs*
+    workers (default: one per CPU). Small journals are scanned in-process. Lines are
+    decoded with *codec*; workers look it up again by name.
+    """
+    if aggregate is not None and aggregate not in AGGREGATES:
+        raise ValueError(f"unknown aggregate: {aggregate!r}. Available: {AGGREGATES}")
+    if aggregate == "latency" and flt.kinds is None:
+        flt = dataclasses.replace(flt, kinds=frozenset({"tool.invocation", "tool.result"}))
+    units = _plan(path, flt, chunk_bytes)
+    tasks = [(u, flt, aggregate, codec.name) for u in units]
+    jobs = jobs or os.cpu_count() or 1
+    if jobs == 1 or len(tasks) <= 1:
+        partials: Iterable[_Partial] = map(_scan_task, tasks)
+        return _collect(partials, aggregate)
+    return _collect_in_pool(tasks, aggregate, jobs)
+
+
+def _collect_in_pool(tasks: list[_Task], aggregate: str | None, jobs: int) -> Iterator[Any]:
+    with multiprocessing.Pool(min(jobs, len(tasks))) as pool:
+        # imap keeps journal order while later ranges are already being scanned.
+        yield from _collect(pool.imap(_scan_task, tasks), aggregate)
+
+
+def _collect(partials: Iterable[_Partial], aggregate: str | None) -> Iterator[Any]:
+    if aggregate is None:
+        for part in partials:
+            yield from part.lines
+        return
+    total: Counter[str] = Counter()
+    tool_events: list[tuple[float, str, str, str, str | None]] = []
+    for part in partials:
+        total.update(part.counts)
+        tool_events.extend(part.tool_events)
+    if aggregate == "counts":
+        for kind, n in total.most_common():
+            yield {"kind": kind, "count": n}
+    elif aggregate == "bytes":
+        for agent, n in total.most_common():
+            yield {"agent_id": agent, "bytes": n}
+    else:
+        yield from _latency_rows(tool_events)
+
+
+def _latency_rows(
+    tool_events: list[tuple[float, str, str, str, str | None]],
+) -> Iterator[dict[str, Any]]:
+    pending: dict[tuple[str, str], deque[float]] = {}
+    samples: dict[str, list[float]] = {}
+    unmatched = 0
+    for ts, kind, agent, tool, corr in tool_events:
+        key = (agent, corr if corr is not None else f"tool:{tool}")
+        if kind == "tool.invocation":
+            pending.setdefault(key, deque()).append(ts)
+        elif pending.get(key):
+            samples.setdefault(tool, []).append((ts - pending[key].popleft()) * 1000.0)
+        else:
+            unmatched += 1
+    for tool in sorted(samples):
+        ms = sorted(samples[tool])
+        yield {
+            "tool": tool,
+            "count": len(ms),
+            "p50_ms": round(_percentile(ms, 50), 3),
+            "p95_ms": round(_percentile(ms, 95), 3),
+            "max_ms": round(ms[-1], 3),
+        }
+    open_calls = sum(len(q) for q in pending.values())
+    if open_calls or unmatched:
+        yield {"tool": "(unpaired)", "invocations": open_calls, "results": unmatched}
+
+
+def format_table(rows: list[dict[str, Any]]) -> str:
+    """Left-aligned text table with a header, columns taken from the first row."""
+    if not rows:
+        return ""
+    columns = list(rows[0])
+    cells = [columns] + [[_cell(r.get(c)) for c in columns] for r in rows]
+    widths = [max(len(row[i]) for row in cells) for i in range(len(columns))]
+    return "\n".join(
+        "  ".join(v.ljust(w) for v, w in zip(row, widths, strict=True)).rstrip() for row in cells
+    )
+
+
+def event_row(line: str, *, width: int = 80) -> dict[str, Any]:
+    """Table row for one NDJSON event line."""
+    d = json.loads(line)
+    ts = d.get("ts", 0.0)
+    summary = json.dumps(d.get("payload"), ensure_ascii=False)
+    if len(summary) > width:
+        summary = summary[: width - 1] + "…"
+    stamp = time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(ts))
+    return {
+        "time": f"{stamp}.{int(ts % 1 * 1000):03d}",
+        "kind": d.get("kind"),
+        "agent": d.get("agent_id") or "-",
+        "payload": summary,
+    }
+
+
+def _cell(v: Any) -> str:
+    return "-" if v is None else str(v)
+
+
+def _percentile(sorted_values: list[float], pct: float) -> float:
+    """Nearest-rank percentile."""
+    rank = max(1, math.ceil(pct / 100.0 * len(sorted_values)))
+    return sorted_values[rank - 1]
+
+
+def _plan(path: Path, flt: QueryFilter, chunk_bytes: int) -> list[_Unit]:
+    units = [
+        _Unit(journal=path, segment=seg)
+        for seg in read_manifest(path)
+        if seg.may_match(since_ts=flt.since_ts, kinds=flt.kinds, agent_id=flt.agent_id)
+    ]
+    if path.exists():
+        size = path.stat().st_size
+        with path.open("rb") as fh:
+            binary = is_binary(fh.read(len(MAGIC)))
+        if binary or size <= chunk_bytes:
+            # Binary records cannot be resynchronized mid-file; scan those whole.
+            units.append(_Unit(journal=path))
+        else:
+            units.extend(
+                _Unit(journal=path, start=start, end=min(start + chunk_bytes, size))
+                for start in range(0, size, chunk_bytes)
+            )
+    return units
+
+
+def _scan_task(task: _Task) -> _Partial:
+    unit, flt, aggregate, codec_name = task
+    codec = get_codec(codec_name)
+    part = _Partial()
+    if aggregate in ("counts", "bytes") and flt.contains is None and flt.correlation_id is None:
+        # Only kind/agent/ts matter: read them off the line instead of decoding it.
+        for size, kind, agent in _headers(unit, flt, codec):
+            if aggregate == "counts":
+                part.counts[kind] += 1
+            else:
+                part.counts[agent or "(hub)"] += size
+        return part
+    for line, event in _records(unit, flt, codec):
+        if aggregate is None:
+            part.lines.append(line if line is not None else encode_event(event))
+        elif aggregate == "counts":
+            part.counts[event.kind] += 1
+        elif aggregate == "bytes":
+            text = line if line is not None else encode_event(event)
+            part.counts[event.agent_id or "(hub)"] += len(text.encode("utf-8")) + 1  # + "\n"
+        elif event.kind in ("tool.invocation", "tool.result"):
+            part.tool_events.append(
+                (
+                    event.ts,
+                    event.kind,
+                    event.agent_id or "",
+                    str(event.payload.get("tool", "?")),
+                    event.payload.get("correlation_id"),
+                )
+            )
+    return part
+
+
+def _records(unit: _Unit, flt: QueryFilter, codec: JsonCodec) -> Iterator[tuple[str | None, Event]]:
+    """Matching (original JSONL line or None for binary, event) pairs of one unit."""
+    with _open_unit(unit) as (fh, binary):
+        if binary:
+            for event in iter_binary(fh):
+                if flt.matches(event):
+                    yield None, event
+            return
+        for raw in _range_lines(unit, fh):
+            if not flt.prefilter(raw):
+                continue
+            event = _decode(raw, codec)
+            if event is not None and flt.matches(event):
+                yield raw.decode("utf-8").rstrip("\n"), event
+
+
+def _headers(
+    unit: _Unit, flt: QueryFilter, codec: JsonCodec
+) -> Iterator[tuple[int, str, str | None]]:
+    """(JSONL size, kind, agent_id) of each matching event in one unit."""
+    with _open_unit(unit) as (fh, binary):
+        if binary:
+            for event in iter_binary(fh):
+                if flt.matches(event):
+                    yield len(encode_event(event)) + 1, event.kind, event.agent_id
+            return
+        for raw in _range_lines(unit, fh):
+            if not flt.prefilter(raw):
+                continue
+            header = _peek_header(raw)
+            if header is not None:
+                kind, agent, ts = header
+                if (
+                    (flt.kinds is None or kind in flt.kinds)
+                    and (flt.agent_id is None or agent == flt.agent_id)
+                    and flt._ts_ok(ts)
+                ):
+                    yield len(raw), kind, agent
+                continue
+            event = _decode(raw, codec)
+            if event is not None and flt.matches(event):
+                yield len(raw), event.kind, event.agent_id
+
+
+@contextlib.contextmanager
+def _open_unit(unit: _Unit) -> Iterator[tuple[IO[bytes], bool]]:
+    if unit.segment is not None:
+        fh = open_segment(unit.journal, unit.segment)
+        if fh is None:
+            fh = io.BytesIO()  # segment vanished (e.g. deleted by hand): nothing to scan
+    else:
+        fh = unit.journal.open("rb", buffering=1 << 20)
+    with fh:
+        yield fh, unit.start == 0 and is_binary(fh.read(len(MAGIC)))
+
+
+def _range_lines(unit: _Unit, fh: IO[bytes]) -> Iterator[bytes]:
+    """Lines that start inside the unit's byte range."""
+    pos = unit.start
+    if unit.start > 0:
+        # Skip the tail of a line that began in the previous range (reading from the
+        # byte before, which is "\n" exactly when the range starts on a line boundary).
+        fh.seek(unit.start - 1)
+        pos += len(fh.readline()) - 1
+    else:
+        fh.seek(0)
+    for raw in fh:
+        if unit.end is not None and pos >= unit.end:
+            return
+        pos += len(raw)
+        yield raw
+
+
+def _decode(raw: bytes, codec: JsonCodec) -> Event | None:
+    if not raw.strip():
+        return None
+    try:
+        return Event.from_dict(codec.loads(raw))
+    except ValueError:
+        if raw.endswith(b"\n"):
+            raise
+        return None  # truncated final line
+
+
+_AGENT_KEY = b'{"agent_id": '
+_KIND_KEY = b', "kind": "'
+
+
+def _peek_header(raw: bytes) -> tuple[str, str | None, float] | None:
+    """
+    (kind, agent_id, ts) of a journal line, without decoding it.
+
+    Relies on the sorted-key layout the journal writes (``agent_id`` first, then
+    ``kind``, ``ts`` last); returns None for anything else, including escaped
+    strings, so the caller can fall back to ``json.loads``.
+    """
+    if not raw.startswith(_AGENT_KEY):
+        return None
+    i = len(_AGENT_KEY)
+    if raw.startswith(b"null", i):
+        agent = None
+        i += 4
+    elif raw[i : i + 1] == b'"':
+        j = raw.find(b'"', i + 1)
+        if j < 0:
+            return None
+        agent_b = raw[i + 1 : j]
+        if b"\\" in agent_b:
+            return None
+        agent = agent_b.decode("utf-8")
+        i = j + 1
+    else:
+        return None
+    if not raw.startswith(_KIND_KEY, i):
+        return None
+    i += len(_KIND_KEY)
+    j = raw.find(b'"', i)
+    if j < 0 or b"\\" in raw[i:j]:
+        return None
+    ts = peek_ts(raw)
+    if ts is None:
+        return None
+    return raw[i:j].decode("utf-8"), agent, ts
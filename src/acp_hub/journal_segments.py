@@ -0,0 +1,247 @@
+from __future__ import annotations
+
+import gzip
+import json
+import lzma
+import os
+import shutil
+import threading
+from collections.abc import Iterable
+from dataclasses import dataclass
+from pathlib import Path
+from typing import IO, Any, cast
+
+from acp_hub.journal_binary import MAGIC, is_binary, iter_binary
+from acp_hub.journal_index import JournalIndex, index_path
+
+MANIFEST_VERSION = 1
+
+_SUFFIXES = {"gzip": ".gz", "lzma": ".xz"}
+
+# Serializes manifest read-modify-write between a journal's writer and its compressors.
+_manifest_lock = threading.Lock()
+
+
+@dataclass
+class Segment:
+    """
+    A closed journal segment as recorded in the manifest.
+
+    *name* is the uncompressed file name; the segment is stored either under that
+    name or with a ``.gz``/``.xz`` suffix once compressed. The summary fields are
+    filled in when the segment is compressed (None until then) and let readers skip
+    segments that cannot match a query.
+    """
+
+    name: str
+    first_ts: float | None = None
+    last_ts: float | None = None
+    events: int | None = None
+    kinds: list[str] | None = None
+    agents: list[str] | None = None
+    compression: str = "none"
+
+    def to_dict(self) -> dict[str, Any]:
+        d: dict[str, Any] = {"name": self.name, "compression": self.compression}
+        if self.events is not None:
+            d.update(
+                first_ts=self.first_ts,
+                last_ts=self.last_ts,
+                events=self.events,
+                kinds=self.kinds,
+                agents=self.agents,
+            )
+        return d
+
+    @classmethod
+    def from_dict(cls, d: dict[str, Any]) -> Segment:
+        return cls(
+            name=d["name"],
+            first_ts=d.get("first_ts"),
+            last_ts=d.get("last_ts"),
+            events=d.get("events"),
+            kinds=d.get("kinds"),
+            agents=d.get("agents"),
+            compression=d.get("compression", "none"),
+        )
+
+    def may_match(
+        self,
+        *,
+        since_ts: float | None = None,
+        kinds: Iterable[str] | None = None,
+        agent_id: str | None = None,
+    ) -> bool:
+        """False only if the summary proves no event in the segment passes the filters."""
+        if self.events is None:
+            return True
+        if since_ts is not None and self.last_ts is not None and self.last_ts < since_ts:
+            return False
+        if kinds is not None and self.kinds is not None and not set(kinds) & set(self.kinds):
+            return False
+        return agent_id is None or self.agents is None or agent_id in self.agents
+
+
+def manifest_path(journal_path: Path) -> Path:
+    """``events.jsonl`` → ``events.manifest.json``."""
+    return journal_path.with_name(journal_path.stem + ".manifest.json")
+
+
+def segment_name(journal_path: Path, number: int) -> str:
+    """``events.jsonl`` → ``events.000001.jsonl``."""
+    return f"{journal_path.stem}.{number:06d}{journal_path.suffix}"
+
+
+def read_manifest(journal_path: Path) -> list[Segment]:
+    mp = manifest_path(journal_path)
+    if not mp.exists():
+        return []
+    data = json.loads(mp.read_text(encoding="utf-8"))
+    return [Segment.from_dict(s) for s in data.get("segments", [])]
+
+
+def write_manifest(journal_path: Path, segments: list[Segment]) -> None:
+    mp = manifest_path(journal_path)
+    tmp = mp.with_name(mp.name + ".tmp")
+    doc = {"version": MANIFEST_VERSION, "segments": [s.to_dict() for s in segments]}
+    tmp.write_text(json.dumps(doc, indent=2) + "\n", encoding="utf-8")
+    os.replace(tmp, mp)
+
+
+def open_segment(journal_path: Path, segment: Segment) -> IO[bytes] | None:
+    """Open *segment* for binary line iteration, wherever it currently lives."""
+    plain = journal_path.with_name(segment.name)
+    try:
+        # Not compressed yet, or compression still in flight; an open handle survives
+        # the compressor unlinking the file.
+        return plain.open("rb", buffering=1 << 20)
+    except FileNotFoundError:
+        pass
+    for compression, suffix in _SUFFIXES.items():
+        packed = plain.with_name(plain.name + suffix)
+        if packed.exists():
+            opener = gzip.open if compression == "gzip" else lzma.open
+            return cast(IO[bytes], opener(packed, "rb"))
+    return None
+
+
+def snapshot(journal_path: Path) -> tuple[list[Segment], IO[bytes] | None]:
+    """
+    The manifest's segments plus an open handle on the hot file, taken together so a
+    rotation cannot fall between them (its segment would be in neither).
+
+    The manifest lock keeps out this process's writer; for a writer in another
+    process, the manifest is read again once the hot file is open and the pair is
+    retaken if it changed. The hot handle is None if there is no hot file.
+    """
+    while True:
+        with _manifest_lock:
+            segments = read_manifest(journal_path)
+            try:
+                hot: IO[bytes] | None = journal_path.open("rb", buffering=1 << 20)
+            except FileNotFoundError:
+                hot = None
+            if [s.name for s in read_manifest(journal_path)] == [s.name for s in segments]:
+                return segments, hot
+        if hot is not None:
+            hot.close()
+
+
+def rotate(journal_path: Path) -> Segment:
+    """
+    Move the hot journal file (and its sidecar index) to the next numbered segment.
+
+    The caller must have closed its handles on the hot file. The segment is listed in
+    the manifest before this returns, so readers never lose sight of its events.
+    """
+    with _manifest_lock:
+        segments = read_manifest(journal_path)
+        number = _segment_number(journal_path, segments[-1].name) + 1 if segments else 1
+        segment = Segment(name=segment_name(journal_path, number))
+        target = journal_path.with_name(segment.name)
+        os.replace(journal_path, target)
+        sidecar = index_path(journal_path)
+        if sidecar.exists():
+            os.replace(sidecar, index_path(target))
+        segments.append(segment)
+        write_manifest(journal_path, segments)
+    return segment
+
+
+def compress_segment(journal_path: Path, name: str, compression: str) -> None:
+    """
+    Summarize and compress one closed segment, then record the result in the manifest.
+
+    Safe to re-run after a crash: the compressed copy is written to a temporary name
+    and only replaces the plain file once complete.
+    """
+    plain = journal_path.with_name(name)
+    if not plain.exists():
+        return
+    summary = _summarize(plain)
+    if compression != "none":
+        packed = plain.with_name(plain.name + _SUFFIXES[compression])
+        tmp = packed.with_name(packed.name + ".tmp")
+        opener = gzip.open if compression == "gzip" else lzma.open
+        with plain.open("rb") as src, opener(tmp, "wb") as dst:
+            shutil.copyfileobj(src, dst, 1 << 20)
+        os.replace(tmp, packed)
+    with _manifest_lock:
+        segments = read_manifest(journal_path)
+        for seg in segments:
+            if seg.name == name:
+                seg.first_ts, seg.last_ts, seg.events, seg.kinds, seg.agents = summary
+                seg.compression = compression
+        write_manifest(journal_path, segments)
+    if compression != "none":
+        plain.unlink()
+    index_path(plain).unlink(missing_ok=True)
+
+
+def pending_compressions(journal_path: Path) -> list[str]:
+    """Segments whose compression did not finish, e.g. because the hub was killed."""
+    return [
+        s.name
+        for s in read_manifest(journal_path)
+        if journal_path.with_name(s.name).exists() and (s.events is None or s.compression != "none")
+    ]
+
+
+def cold_segments(
+    journal_path: Path,
+    *,
+    since_ts: float | None = None,
+    kinds: Iterable[str] | None = None,
+    agent_id: str | None = None,
+) -> list[Segment]:
+    """Closed segments, oldest first, minus those whose summary rules out the filters."""
+    return [
+        seg
+        for seg in read_manifest(journal_path)
+        if seg.may_match(since_ts=since_ts, kinds=kinds, agent_id=agent_id)
+    ]
+
+
+def _summarize(plain: Path) -> tuple[float | None, float | None, int, list[str], list[str]]:
+    with plain.open("rb") as fh:
+        if is_binary(fh.read(len(MAGIC))):
+            # Binary segments have no sidecar; their record headers are cheap to walk.
+            kinds: set[str] = set()
+            agents: set[str] = set()
+            first = last = None
+            count = 0
+            for e in iter_binary(fh):
+                first = e.ts if first is None else min(first, e.ts)
+                last = e.ts if last is None else max(last, e.ts)
+                kinds.add(e.kind)
+                if e.agent_id is not None:
+                    agents.add(e.agent_id)
+                count += 1
+            return first, last, count, sorted(kinds), sorted(agents)
+    # The segment's sidecar already holds every line's ts/kind/agent (else the file is scanned).
+    index = JournalIndex.open(plain)
+    return index.min_ts, index.max_ts, index.count, sorted(index.kinds), sorted(index.agents)
+
+
+def _segment_number(journal_path: Path, name: str) -> int:
+    return int(name[len(journal_path.stem) + 1 :].split(".", 1)[0])
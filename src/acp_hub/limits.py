@@ -0,0 +1,155 @@
+from __future__ import annotations
+
+import contextlib
+import os
+import signal
+import sys
+from collections.abc import Sequence
+from dataclasses import dataclass, fields, replace
+from typing import Any
+
+if sys.platform == "win32":  # no rlimits: limits are parsed but cannot be applied
+    resource = None
+else:
+    import resource
+
+LIMIT_NAMES = ("cpu_seconds", "address_space_mb", "open_files", "max_processes", "nice")
+
+# What a child typically prints when it runs into a limit that fails a syscall instead
+# of sending a signal (address space → ENOMEM, open files → EMFILE, processes → EAGAIN
+# from fork). Only checked for limits that were actually set.
+_STDERR_MARKERS = {
+    "address_space_mb": ("MemoryError", "Cannot allocate memory", "out of memory"),
+    "open_files": ("Too many open files",),
+    "max_processes": ("Resource temporarily unavailable", "Cannot fork", "fork: retry"),
+}
+
+# Runs as `python -c _TRAMPOLINE <limit>... -- <command>...`: applies each
+# "RLIMIT_X:soft:hard" / "nice:n" and execs the command in the same process.
+_TRAMPOLINE = """\
+import os, resource, sys
+i = sys.argv.index("--")
+for spec in sys.argv[1:i]:
+    name, *values = spec.split(":")
+    if name == "nice":
+        os.nice(int(values[0]))
+    else:
+        resource.setrlimit(getattr(resource, name), tuple(int(v) for v in values))
+argv = sys.argv[i + 1 :]
+try:
+    os.execvp(argv[0], argv)
+except OSError as exc:
+    sys.stderr.write(f"{argv[0]}: {exc.strerror}\\n")
+    sys.exit(127)
+"""
+
+
+@dataclass(frozen=True)
+class ResourceLimits:
+    """
+    rlimits and niceness for a child process; None leaves the hub's own value.
+
+    *cpu_seconds* (RLIMIT_CPU) delivers SIGXCPU at the limit and SIGKILL a second
+    later. *address_space_mb* (RLIMIT_AS) makes allocations fail. *open_files*
+    (RLIMIT_NOFILE) caps descriptors. *max_processes* (RLIMIT_NPROC) counts all
+    processes of the user, not just this tree, and is not enforced for root. *nice*
+    is added to the child's niceness (0-19: lower priority only).
+
+    ``wrap()`` applies them through a short Python trampoline that sets them and then
+    execs the command (same pid), not through ``preexec_fn``: the hub has threads (the
+    journal writer, segment compressors), and running Python between fork and exec in
+    a threaded parent can deadlock the child.
+    """
+
+    cpu_seconds: int | None = None
+    address_space_mb: float | None = None
+    open_files: int | None = None
+    max_processes: int | None = None
+    nice: int | None = None
+
+    def __bool__(self) -> bool:
+        return any(getattr(self, name) is not None for name in LIMIT_NAMES)
+
+    def merged(self, override: ResourceLimits) -> ResourceLimits:
+        """These limits with every field *override* sets replaced."""
+        changes = {
+            f.name: getattr(override, f.name)
+            for f in fields(override)
+            if getattr(override, f.name) is not None
+        }
+        return replace(self, **changes)
+
+    def to_dict(self) -> dict[str, Any]:
+        """Only the limits that are set."""
+        return {
+            name: getattr(self, name) for name in LIMIT_NAMES if getattr(self, name) is not None
+        }
+
+    def wrap(self, argv: Sequence[str]) -> list[str]:
+        """
+        *argv* run under these limits: prefixed with the trampoline, or unchanged if
+        there is nothing to apply (so the direct spawn is kept). A command that cannot
+        be executed exits with 127 instead of failing the spawn.
+        """
+        if not self or resource is None:
+            return list(argv)
+        specs: list[str] = []
+        if self.cpu_seconds is not None:
+            specs.append(f"RLIMIT_CPU:{self.cpu_seconds}:{self.cpu_seconds + 1}")
+        if self.address_space_mb is not None:
+            nbytes = int(self.address_space_mb * 1024 * 1024)
+            specs.append(f"RLIMIT_AS:{nbytes}:{nbytes}")
+        if self.open_files is not None:
+            specs.append(f"RLIMIT_NOFILE:{self.open_files}:{self.open_files}")
+        if self.max_processes is not None:
+            specs.append(f"RLIMIT_NPROC:{self.max_processes}:{self.max_processes}")
+        if self.nice:
+            specs.append(f"nice:{self.nice}")
+        return [sys.executable, "-c", _TRAMPOLINE, *specs, "--", *argv]
+
+    def hit(
+        self, returncode: int | None, stderr: str = "", *, cpu_used: float | None = None
+    ) -> str | None:
+        """
+        Which limit (a field name) most likely ended a child that exited with
+        *returncode*, or None. SIGXCPU is the CPU limit; SIGKILL counts as the hard
+        CPU limit only if the child's CPU time (*cpu_used*, seconds) reached
+        *cpu_seconds*, since anything else (the OOM killer, a timeout) may have sent
+        it. The rest is read from *stderr*.
+        """
+        if not self:
+            return None
+        if self.cpu_seconds is not None:
+            if returncode == -signal.SIGXCPU:
+                return "cpu_seconds"
+            if returncode == -signal.SIGKILL and (cpu_used or 0.0) >= self.cpu_seconds:
+                return "cpu_seconds"
+        for name, markers in _STDERR_MARKERS.items():
+            if getattr(self, name) is not None and any(m in stderr for m in markers):
+                return name
+        return None
+
+
+NO_LIMITS = ResourceLimits()
+
+
+def children_cpu_seconds() -> float | None:
+    """User + system CPU time of all reaped children so far, or None without rlimits."""
+    if resource is None:
+        return None
+    usage = resource.getrusage(resource.RUSAGE_CHILDREN)
+    return usage.ru_utime + usage.ru_stime
+
+
+def signal_group(pid: int, sig: int) -> None:
+    """
+    Send *sig* to the process group led by *pid*, i.e. a child started with
+    ``start_new_session=True`` and everything it spawned.
+    """
+    try:
+        os.killpg(pid, sig)
+    except ProcessLookupError:
+        pass
+    except (AttributeError, PermissionError):  # no process groups here: just the leader
+        with contextlib.suppress(ProcessLookupError):
+            os.kill(pid, sig)
@@ -0,0 +1,170 @@
+from __future__ import annotations
+
+import asyncio
+import itertools
+import os
+from dataclasses import dataclass
+from pathlib import Path
+from typing import IO
+
+DEFAULT_BLOCK_BYTES = 256 * 1024
+DEFAULT_MAX_LINE_BYTES = 16 * 1024 * 1024
+DEFAULT_SPILL_CAP_BYTES = 256 * 1024 * 1024
+
+_spill_counter = itertools.count(1)
+
+
+@dataclass(frozen=True)
+class SpilledLine:
+    """A line longer than the reader's cap; its bytes were written to *path* (if any)."""
+
+    path: Path | None
+    nbytes: int
+
+
+def prune_spill_dir(spill_dir: Path, max_bytes: int, *, keep: Path | None = None) -> int:
+    """
+    Delete the oldest spill files in *spill_dir* until together they take at most
+    *max_bytes*; *keep* (the file just written) is never deleted. Returns the number
+    of files removed.
+    """
+    files: list[tuple[float, int, Path]] = []
+    for path in spill_dir.glob("*.line"):
+        try:
+            st = path.stat()
+        except FileNotFoundError:
+            continue  # pruned by another reader meanwhile
+        files.append((st.st_mtime, st.st_size, path))
+    total = sum(size for _, size, _ in files)
+    removed = 0
+    for _, size, path in sorted(files):
+        if total <= max_bytes:
+            break
+        if path == keep:
+            continue
+        path.unlink(missing_ok=True)
+        total -= size
+        removed += 1
+    return removed
+
+
+class LineReader:
+    """
+    Newline splitter over an ``asyncio.StreamReader``, reading large blocks.
+
+    ``StreamReader.readline()`` fails with ``LimitOverrunError`` on lines longer than
+    the stream's limit (64 KiB by default) and shifts its whole buffer once per line.
+    This reader pulls up to *block_size* bytes per ``read()``, keeps them in one
+    reusable ``bytearray`` that is compacted once per block, and decodes each line
+    straight out of that buffer.
+
+    Lines up to *max_line* bytes are returned as text (without the newline). A longer
+    line is streamed to a new file under *spill_dir* as it arrives, without being held
+    in memory, and comes back as a ``SpilledLine``; without a *spill_dir* its bytes
+    are counted and dropped. After each spill, the oldest files in *spill_dir* are
+    deleted until the directory holds at most *spill_cap* bytes (None = no cap), so
+    an agent that keeps printing huge lines cannot fill the disk.
+
+    ``readline()`` may be cancelled (e.g. by ``asyncio.wait_for``) without losing
+    data: the only await is the block read, and state is updated after it returns.
+    """
+
+    def __init__(
+        self,
+        stream: asyncio.StreamReader,
+        *,
+        block_size: int = DEFAULT_BLOCK_BYTES,
+        max_line: int = DEFAULT_MAX_LINE_BYTES,
+        spill_dir: Path | None = None,
+        spill_prefix: str = "line",
+        spill_cap: int | None = DEFAULT_SPILL_CAP_BYTES,
+    ) -> None:
+        self._stream = stream
+        self._block_size = block_size
+        self._max_line = max_line
+        self._spill_dir = spill_dir
+        self._spill_prefix = spill_prefix
+        self._spill_cap = spill_cap
+        self._buf = bytearray()
+        self._view = memoryview(self._buf)
+        self._pos = 0  # start of the unconsumed part of _buf
+        self._scan = 0  # no newline in _buf[_pos:_scan]
+        self._spilling = False
+        self._spill: IO[bytes] | None = None
+        self._spill_path: Path | None = None
+        self._spill_bytes = 0
+
+    @property
+    def line_buffered(self) -> bool:
+        """Whether ``readline()`` can return a complete line without reading."""
+        return self._buf.find(b"\n", self._scan) >= 0
+
+    async def readline(self) -> str | SpilledLine | None:
+        """The next line, or None at end of stream."""
+        buf = self._buf
+        while True:
+            i = buf.find(b"\n", self._scan)
+            if i >= 0:
+                start = self._pos
+                self._pos = self._scan = i + 1
+                if self._spilling or i - start > self._max_line:
+                    return self._finish_spill(start, i)
+                return str(self._view[start:i], "utf-8", "replace")
+
+            if self._spilling or len(buf) - self._pos > self._max_line:
+                self._spill_write(self._pos, len(buf))
+                self._pos = self._scan = len(buf)
+            else:
+                self._scan = len(buf)
+
+            block = await self._stream.read(self._block_size)
+            if not block:
+                end = len(buf)
+                start = self._pos
+                self._pos = self._scan = end
+                if self._spilling:
+                    return self._finish_spill(start, end)
+                if start < end:
+                    return str(self._view[start:end], "utf-8", "replace")
+                return None
+            self._refill(block)
+            buf = self._buf
+
+    def _refill(self, block: bytes) -> None:
+        # Resizing needs the view released; compaction drops everything consumed.
+        self._view.release()
+        if self._pos:
+            del self._buf[: self._pos]
+            self._scan -= self._pos
+            self._pos = 0
+        self._buf += block
+        self._view = memoryview(self._buf)
+
+    def _spill_write(self, start: int, end: int) -> None:
+        if not self._spilling:
+            self._spilling = True
+            if self._spill_dir is not None:
+                self._open_spill()
+        if self._spill is not None and end > start:
+            self._spill.write(self._view[start:end])
+        self._spill_bytes += end - start
+
+    def _open_spill(self) -> None:
+        assert self._spill_dir is not None
+        self._spill_dir.mkdir(parents=True, exist_ok=True)
+        name = f"{self._spill_prefix}-{os.getpid()}-{next(_spill_counter):06d}.line"
+        self._spill_path = self._spill_dir / name
+        self._spill = self._spill_path.open("wb")
+
+    def _finish_spill(self, start: int, end: int) -> SpilledLine:
+        self._spill_write(start, end)
+        if self._spill is not None:
+            self._spill.close()
+            if self._spill_dir is not None and self._spill_cap is not None:
+                prune_spill_dir(self._spill_dir, self._spill_cap, keep=self._spill_path)
+        spilled = SpilledLine(path=self._spill_path, nbytes=self._spill_bytes)
+        self._spilling = False
+        self._spill = None
+        self._spill_path = None
+        self._spill_bytes = 0
+        return spilled
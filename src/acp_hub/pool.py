@@ -0,0 +1,180 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+import time
+from collections.abc import Awaitable, Callable, Iterable
+from dataclasses import dataclass, field
+from typing import Any
+
+from acp_hub.config import AgentSpec
+from acp_hub.proc import ManagedAgentProcess
+from acp_hub.protocols.base import ProtocolAdapter
+
+logger = logging.getLogger(__name__)
+
+# Spawns a process for a spec and runs its protocol handshake.
+AgentStarter = Callable[[AgentSpec], Awaitable[tuple[ManagedAgentProcess, ProtocolAdapter]]]
+AgentStopper = Callable[[ManagedAgentProcess], Awaitable[None]]
+
+
+async def _terminate(process: ManagedAgentProcess) -> None:
+    await process.terminate()
+
+
+@dataclass
+class PooledAgent:
+    """A started, handshaken agent owned by an ``AgentPool``."""
+
+    spec: AgentSpec
+    process: ManagedAgentProcess
+    adapter: ProtocolAdapter
+    created: float = field(default_factory=time.monotonic)
+    tasks: int = 0
+
+    @property
+    def age(self) -> float:
+        return time.monotonic() - self.created
+
+
+@dataclass
+class _Slot:
+    idle: list[PooledAgent] = field(default_factory=list)
+    leased: int = 0
+    starting: int = 0  # pre-starts in flight
+    hits: int = 0
+    misses: int = 0
+    recycled: int = 0
+
+
+class AgentPool:
+    """
+    Warm agents kept between tasks, up to *size* idle per configured agent.
+
+    ``lease()`` hands out an idle agent that is still running and within its
+    *max_age* seconds / *max_tasks* tasks (0 = unlimited), or starts a new one;
+    ``release()`` returns it, or retires it if it exited, is past a limit or the
+    caller says its task failed, and tops the idle set back up in the background.
+    Agents are keyed by spec id: each configured agent has its own sandbox and
+    environment, so they are not shared.
+
+    The pool lives inside one hub process: it saves start-up and handshake time
+    between the tasks of one ``run -t ... -t ...`` session, not across separate
+    ``acp-hub run`` invocations.
+    """
+
+    def __init__(
+        self,
+        start: AgentStarter,
+        *,
+        stop: AgentStopper = _terminate,
+        size: int = 1,
+        max_age: float = 0.0,
+        max_tasks: int = 0,
+    ) -> None:
+        self._start = start
+        self._stop = stop
+        self.size = size
+        self.max_age = max_age
+        self.max_tasks = max_tasks
+        self._slots: dict[str, _Slot] = {}
+        self._leased: dict[int, PooledAgent] = {}
+        self._refills: set[asyncio.Task[None]] = set()
+        self._closed = False
+
+    async def warm(self, specs: Iterable[AgentSpec]) -> None:
+        """Start agents until every spec has *size* idle ones."""
+        await asyncio.gather(*(self._fill(spec) for spec in specs))
+
+    async def lease(self, spec: AgentSpec) -> PooledAgent:
+        if self._closed:
+            raise RuntimeError("agent pool is closed")
+        slot = self._slots.setdefault(spec.id, _Slot())
+        while slot.idle:
+            agent = slot.idle.pop()
+            if self._healthy(agent):
+                slot.hits += 1
+                return self._lend(slot, agent)
+            await self._retire(slot, agent)
+        slot.misses += 1
+        process, adapter = await self._start(spec)
+        return self._lend(slot, PooledAgent(spec=spec, process=process, adapter=adapter))
+
+    async def release(self, agent: PooledAgent, *, retire: bool = False) -> None:
+        """Give *agent* back; with *retire*, stop it even if it looks healthy."""
+        slot = self._slots[agent.spec.id]
+        slot.leased -= 1
+        self._leased.pop(id(agent), None)
+        agent.tasks += 1
+        if retire or self._closed or not self._healthy(agent) or len(slot.idle) >= self.size:
+            await self._retire(slot, agent)
+        else:
+            slot.idle.append(agent)
+        if not self._closed and len(slot.idle) + slot.starting < self.size:
+            task = asyncio.create_task(self._fill(agent.spec))
+            self._refills.add(task)
+            task.add_done_callback(self._refills.discard)
+
+    async def close(self) -> None:
+        """Stop every agent, idle or leased."""
+        self._closed = True
+        # Let in-flight pre-starts finish; they stop their agent once they see the flag.
+        await asyncio.gather(*self._refills, return_exceptions=True)
+        agents = [a for slot in self._slots.values() for a in slot.idle]
+        agents += self._leased.values()
+        for slot in self._slots.values():
+            slot.idle.clear()
+            slot.leased = 0
+        self._leased.clear()
+        await asyncio.gather(*(self._stop_quietly(agent) for agent in agents))
+
+    def stats(self) -> dict[str, Any]:
+        """Per agent: idle and leased counts, lease hits/misses and retired agents."""
+        return {
+            aid: {
+                "idle": len(slot.idle),
+                "leased": slot.leased,
+                "hits": slot.hits,
+                "misses": slot.misses,
+                "recycled": slot.recycled,
+            }
+            for aid, slot in self._slots.items()
+        }
+
+    def _healthy(self, agent: PooledAgent) -> bool:
+        if not agent.process.running:
+            return False
+        if self.max_age and agent.age >= self.max_age:
+            return False
+        return not (self.max_tasks and agent.tasks >= self.max_tasks)
+
+    def _lend(self, slot: _Slot, agent: PooledAgent) -> PooledAgent:
+        slot.leased += 1
+        self._leased[id(agent)] = agent
+        return agent
+
+    async def _retire(self, slot: _Slot, agent: PooledAgent) -> None:
+        slot.recycled += 1
+        await self._stop_quietly(agent)
+
+    async def _stop_quietly(self, agent: PooledAgent) -> None:
+        try:
+            await self._stop(agent.process)
+        except Exception:
+            logger.warning("failed to terminate pooled agent %s", agent.spec.id)
+
+    async def _fill(self, spec: AgentSpec) -> None:
+        slot = self._slots.setdefault(spec.id, _Slot())
+        while not self._closed and len(slot.idle) + slot.starting < self.size:
+            slot.starting += 1
+            try:
+                process, adapter = await self._start(spec)
+            except Exception:
+                logger.warning("could not pre-start agent %s", spec.id, exc_info=True)
+                return
+            finally:
+                slot.starting -= 1
+            if self._closed:
+                await self._stop(process)
+                return
+            slot.idle.append(PooledAgent(spec=spec, process=process, adapter=adapter))
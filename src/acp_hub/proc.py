@@ -1,37 +1,138 @@
 from __future__ import annotations
 
 import asyncio
-import json
+import contextlib
+import itertools
 import logging
+import signal
 import time
+from collections.abc import Callable, Iterator
 from dataclasses import dataclass, field
+from pathlib import Path
 from typing import Any
 
 from acp_hub.bus import EventBus
+from acp_hub.codec import DEFAULT_CODEC, JsonCodec, looks_like_json
 from acp_hub.config import AgentSpec
 from acp_hub.events import (
     Event,
     agent_exited,
     agent_jsonrpc,
+    agent_line_spilled,
     agent_started,
     agent_stderr,
     agent_stdout,
 )
+from acp_hub.journal import JsonlJournal, iter_events
+from acp_hub.limits import signal_group
+from acp_hub.line_reader import (
+    DEFAULT_BLOCK_BYTES,
+    DEFAULT_MAX_LINE_BYTES,
+    DEFAULT_SPILL_CAP_BYTES,
+    LineReader,
+    SpilledLine,
+)
+from acp_hub.retention import RingBuffer
+from acp_hub.stderr_filter import StderrFilter
+from acp_hub.stdin_writer import DEFAULT_MAX_PENDING_BYTES, StdinWriter
 
 logger = logging.getLogger(__name__)
 
 
+class _TextBatch:
+    """Consecutive plain-text lines waiting to be published as one chunk event."""
+
+    __slots__ = ("lines", "nbytes", "started", "ts")
+
+    def __init__(self) -> None:
+        self.lines: list[str] = []
+        self.nbytes = 0
+        self.ts = 0.0        # wall-clock time of the first line
+        self.started = 0.0   # loop time of the first line, for the flush window
+
+    def add(self, text: str, ts: float, now: float) -> None:
+        if not self.lines:
+            self.ts = ts
+            self.started = now
+        self.lines.append(text)
+        self.nbytes += len(text) + 1
+
+    def take(self, factory: Callable[..., Event], agent_id: str) -> Event:
+        event = factory(
+            ts=self.ts, agent_id=agent_id, text="\n".join(self.lines), lines=len(self.lines)
+        )
+        self.lines = []
+        self.nbytes = 0
+        return event
+
+
 @dataclass
 class ManagedAgentProcess:
+    """
+    A spawned agent child process wired to the event bus.
+
+    Plain-text output lines that arrive in a burst are coalesced into a single
+    ``agent.stdout``/``agent.stderr`` chunk event (``payload["lines"]`` > 1) once
+    *coalesce_window* seconds pass without a new line or *coalesce_max_bytes* are
+    buffered. Set *coalesce_window* to 0 to publish one event per line.
+
+    Stderr first goes through a ``StderrFilter``: runs of repeated lines (equal, or
+    equal apart from numbers) and lines over the spec's ``stderr_rate`` cap are
+    withheld and reported as ``agent.stderr_suppressed`` events with a count, at most
+    once per *stderr_report_interval* seconds per run.
+
+    Output is read in blocks of *read_block_bytes*. Lines longer than
+    *max_line_bytes* are written to a file under *spill_dir* (dropped if it is None)
+    and announced with an ``agent.line_spilled`` event instead; the oldest spill files
+    are deleted once the directory exceeds *spill_cap_bytes*.
+
+    JSON-RPC traffic is encoded and decoded with *codec*; stdout lines that cannot be
+    JSON (not starting with ``{``/``[``) are never handed to it.
+
+    ``stdout_lines`` and ``jsonrpc_messages`` keep only the most recent output, within
+    the spec's ``retain_items``/``retain_mb``; see ``memory_usage()``. Sizes are the
+    character counts of the original lines, so a decoded JSON-RPC message takes
+    several times its share of ``retain_mb`` in actual memory. With the hub's
+    *journal*, the evicted part can be read back with ``evicted_stdout_lines()``
+    and ``evicted_jsonrpc_messages()`` (which flush it first).
+
+    Outbound messages are queued for a per-agent ``StdinWriter`` task, which batches
+    whatever is pending into one write; ``send_json``/``send_text`` return once the
+    message is queued (unless *stdin_max_pending_bytes* are already waiting).
+    ``stdin_stats()`` reports the queue depth and time spent blocked in drain.
+    """
+
     spec: AgentSpec
     bus: EventBus
+    coalesce_window: float = 0.02
+    coalesce_max_bytes: int = 64 * 1024
+    read_block_bytes: int = DEFAULT_BLOCK_BYTES
+    max_line_bytes: int = DEFAULT_MAX_LINE_BYTES
+    spill_dir: Path | None = None
+    spill_cap_bytes: int | None = DEFAULT_SPILL_CAP_BYTES
+    codec: JsonCodec = DEFAULT_CODEC
+    journal: JsonlJournal | None = None
+    stdin_max_pending_bytes: int = DEFAULT_MAX_PENDING_BYTES
+    stderr_report_interval: float = 1.0
     _proc: asyncio.subprocess.Process | None = None
     _tasks: list[asyncio.Task[None]] = field(default_factory=list)
+    _stdin: StdinWriter | None = None
     _done: asyncio.Event = field(default_factory=asyncio.Event)
 
-    # Collected output for non-interactive "run" mode.
-    stdout_lines: list[str] = field(default_factory=list)
-    jsonrpc_messages: list[dict[str, Any]] = field(default_factory=list)
+    _started_ts: float | None = None
+
+    # Recent output, for non-interactive "run" mode.
+    stdout_lines: RingBuffer[str] = field(init=False)
+    jsonrpc_messages: RingBuffer[dict[str, Any]] = field(init=False)
+
+    def __post_init__(self) -> None:
+        max_bytes = int(self.spec.retain_mb * 1024 * 1024)
+        self.stdout_lines = RingBuffer(max_items=self.spec.retain_items, max_bytes=max_bytes)
+        self.jsonrpc_messages = RingBuffer(max_items=self.spec.retain_items, max_bytes=max_bytes)
+
+    @property
+    def pid(self) -> int | None:
+        return self._proc.pid if self._proc is not None else None
 
     @property
     def running(self) -> bool:
@@ -45,15 +146,28 @@ class ManagedAgentProcess:
         # Agents run inside their own sandbox — never an arbitrary cwd.
         cwd = str(self.spec.sandbox)
 
+        self._started_ts = time.time()
         self._proc = await asyncio.create_subprocess_exec(
-            *self.spec.command,
+            *self.spec.limits.wrap(self.spec.command),
             stdin=asyncio.subprocess.PIPE,
             stdout=asyncio.subprocess.PIPE,
             stderr=asyncio.subprocess.PIPE,
             cwd=cwd,
             env=env,
+            # Only sizes the pipe transports' buffering; lines are split by LineReader.
+            limit=self.read_block_bytes,
+            # Own process group, so terminate() reaches everything the agent spawns.
+            start_new_session=True,
         )
 
+        assert self._proc.stdin is not None
+        self._stdin = StdinWriter(
+            self._proc.stdin,
+            name=f"agent {self.spec.id}",
+            max_pending_bytes=self.stdin_max_pending_bytes,
+        )
+        self._stdin.start()
+
         await self.bus.publish(
             agent_started(ts=time.time(), agent_id=self.spec.id, command=self.spec.command)
         )
@@ -64,21 +178,65 @@ class ManagedAgentProcess:
             asyncio.create_task(self._wait_exit()),
         ]
 
+    def memory_usage(self) -> dict[str, Any]:
+        """
+        Items and characters of original output retained (and evicted) per buffer.
+
+        The ``bytes`` figures are line lengths, not memory: decoded messages take more.
+        """
+        return {
+            "stdout_lines": self.stdout_lines.usage(),
+            "jsonrpc_messages": self.jsonrpc_messages.usage(),
+        }
+
+    def evicted_stdout_lines(self) -> list[str]:
+        """Plain stdout lines no longer in ``stdout_lines``, read back from the journal."""
+        lines = (
+            line
+            for event in self._journaled("agent.stdout")
+            for line in event.payload.get("text", "").split("\n")
+        )
+        return list(itertools.islice(lines, self.stdout_lines.evicted))
+
+    def evicted_jsonrpc_messages(self) -> list[dict[str, Any]]:
+        """Messages no longer in ``jsonrpc_messages``, read back from the journal."""
+        messages = (event.payload.get("message", {}) for event in self._journaled("agent.jsonrpc"))
+        return list(itertools.islice(messages, self.jsonrpc_messages.evicted))
+
+    def _journaled(self, kind: str) -> Iterator[Event]:
+        if self.journal is None:
+            raise RuntimeError(f"agent {self.spec.id}: no journal to read evicted output from")
+        # Lines still pending in the journal's batch (or writer queue) are part of it.
+        self.journal.flush()
+        return iter_events(
+            self.journal.path,
+            since_ts=self._started_ts,
+            kinds={kind},
+            agent_id=self.spec.id,
+            codec=self.codec,
+        )
+
+    def stdin_stats(self) -> dict[str, Any]:
+        """Outbound queue depth, write batching and time blocked in drain."""
+        return self._stdin.stats() if self._stdin is not None else {}
+
     async def send_json(self, msg: dict[str, Any]) -> None:
-        """Send a JSON-RPC message to the agent's stdin."""
-        if self._proc is None or self._proc.stdin is None:
+        """Queue a JSON-RPC message for the agent's stdin."""
+        if self._stdin is None:
             raise RuntimeError("process not started or stdin unavailable")
-        line = json.dumps(msg, separators=(",", ":")) + "\n"
-        self._proc.stdin.write(line.encode("utf-8"))
-        await self._proc.stdin.drain()
+        await self._stdin.put(self.codec.dumps(msg) + b"\n")
 
     async def send_text(self, text: str) -> None:
-        """Send a raw text line to the agent's stdin."""
-        if self._proc is None or self._proc.stdin is None:
+        """Queue a raw text line for the agent's stdin."""
+        if self._stdin is None:
             raise RuntimeError("process not started or stdin unavailable")
         data = text if text.endswith("\n") else text + "\n"
-        self._proc.stdin.write(data.encode("utf-8"))
-        await self._proc.stdin.drain()
+        await self._stdin.put(data.encode("utf-8"))
+
+    async def flush_stdin(self) -> None:
+        """Wait until every queued message has been handed to the child's pipe."""
+        if self._stdin is not None:
+            await self._stdin.flush()
 
     async def wait(self) -> int:
         """Wait until the process exits, return exit code."""
@@ -86,72 +244,174 @@ class ManagedAgentProcess:
         assert self._proc is not None
         return self._proc.returncode or 0
 
-    async def terminate(self) -> None:
+    async def terminate(self, timeout: float = 3.0) -> None:
+        """
+        SIGTERM the agent's process group, and SIGKILL it if the agent is still running
+        after *timeout* seconds. The group is only signalled while the agent is unreaped:
+        after that its pid (the group id) may belong to someone else.
+        """
         if self._proc is None:
             return
+        pid = self._proc.pid
+        if self._proc.returncode is None:
+            signal_group(pid, signal.SIGTERM)
         try:
-            self._proc.terminate()
-        except ProcessLookupError:
-            pass
-        try:
-            await asyncio.wait_for(self._proc.wait(), timeout=3.0)
+            await asyncio.wait_for(self._proc.wait(), timeout=timeout)
         except asyncio.TimeoutError:
-            self._proc.kill()
+            if self._proc.returncode is None:
+                signal_group(pid, signal.SIGKILL)
             await self._proc.wait()
 
+        # With the agent gone the pipes close (unless something it spawned still holds
+        # them), so the readers can publish what is left and the exit watcher its
+        # agent.exited.
+        pending = [t for t in self._tasks if not t.done()]
+        if pending:
+            await asyncio.wait(pending, timeout=1.0)
         for t in self._tasks:
             t.cancel()
+        if self._stdin is not None:
+            self._stdin.cancel()
+        if self._proc.stdin is not None:
+            self._proc.stdin.close()
         self._done.set()
 
     async def close_stdin(self) -> None:
-        """Signal EOF to the child process."""
-        if self._proc and self._proc.stdin:
-            try:
-                self._proc.stdin.close()
-                await self._proc.stdin.wait_closed()
-            except Exception:
-                pass
+        """Signal EOF to the child process, after anything still queued."""
+        if self._stdin is not None:
+            await self._stdin.close()
 
     # ---- internal readers ----
 
     async def _read_stdout(self) -> None:
         assert self._proc is not None and self._proc.stdout is not None
+        await self._read_lines(self._proc.stdout, agent_stdout, "stdout", detect_json=True)
+
+    async def _read_stderr(self) -> None:
+        assert self._proc is not None and self._proc.stderr is not None
+        line_filter = StderrFilter(
+            self.spec.id,
+            rate=self.spec.stderr_rate,
+            burst=self.spec.stderr_burst,
+            report_interval=self.stderr_report_interval,
+        )
+        await self._read_lines(
+            self._proc.stderr, agent_stderr, "stderr", detect_json=False, line_filter=line_filter
+        )
+
+    async def _read_lines(
+        self,
+        stream: asyncio.StreamReader,
+        factory: Callable[..., Event],
+        name: str,
+        *,
+        detect_json: bool,
+        line_filter: StderrFilter | None = None,
+    ) -> None:
+        loop = asyncio.get_running_loop()
+        batch = _TextBatch()
+        agent_id = self.spec.id
+        reader = LineReader(
+            stream,
+            block_size=self.read_block_bytes,
+            max_line=self.max_line_bytes,
+            spill_dir=self.spill_dir,
+            spill_prefix=f"{agent_id}-{name}",
+            spill_cap=self.spill_cap_bytes,
+        )
+
+        async def publish(events: list[Event], *, flush: bool = True) -> None:
+            # Whatever is batched goes first: it was read before *events* happened.
+            if flush and batch.lines:
+                events.insert(0, batch.take(factory, agent_id))
+            if len(events) == 1:
+                await self.bus.publish(events[0])
+            elif events:
+                await self.bus.publish_many(events)
+
+        async def publish_due() -> None:
+            now = loop.time()
+            reports = line_filter.expire(now) if line_filter is not None else []
+            due = bool(batch.lines) and now >= batch.started + self.coalesce_window
+            await publish(reports, flush=due or bool(reports))
+
         while True:
-            line = await self._proc.stdout.readline()
-            if not line:
+            deadlines: list[float] = []
+            if batch.lines:
+                deadlines.append(batch.started + self.coalesce_window)
+            if line_filter is not None and line_filter.deadline is not None:
+                deadlines.append(line_filter.deadline)
+            if deadlines:
+                remaining = min(deadlines) - loop.time()
+                if remaining <= 0:
+                    await publish_due()
+                    continue
+                if reader.line_buffered:
+                    # Returns without waiting: skip wait_for and the task it creates.
+                    line = await reader.readline()
+                else:
+                    try:
+                        line = await asyncio.wait_for(reader.readline(), timeout=remaining)
+                    except asyncio.TimeoutError:
+                        # LineReader only consumes a complete line, so nothing is lost here.
+                        await publish_due()
+                        continue
+            else:
+                line = await reader.readline()
+            if line is None:
+                await publish(line_filter.flush() if line_filter is not None else [])
                 return
-            text = line.decode("utf-8", errors="replace").rstrip("\n")
             ts = time.time()
 
+            if isinstance(line, SpilledLine):
+                logger.warning(
+                    "agent %s: %d-byte %s line exceeds max_line_bytes, spilled to %s",
+                    agent_id, line.nbytes, name, line.path,
+                )
+                spilled = agent_line_spilled(
+                    ts=ts,
+                    agent_id=agent_id,
+                    stream=name,
+                    path=str(line.path) if line.path is not None else None,
+                    nbytes=line.nbytes,
+                )
+                await publish([spilled])
+                continue
+            text = line
+
             # Try JSON-RPC parse
-            try:
-                msg = json.loads(text)
+            if detect_json:
+                msg = None
+                if looks_like_json(text):
+                    with contextlib.suppress(ValueError):
+                        msg = self.codec.loads(text)
                 if isinstance(msg, dict):
-                    self.jsonrpc_messages.append(msg)
-                    await self.bus.publish(
-                        agent_jsonrpc(ts=ts, agent_id=self.spec.id, message=msg)
-                    )
+                    self.jsonrpc_messages.append(msg, len(text))
+                    rpc = agent_jsonrpc(ts=ts, agent_id=agent_id, message=msg, raw=text)
+                    await publish([rpc])
+                    continue
+                self.stdout_lines.append(text, len(text))
+            elif line_filter is not None:
+                keep, reports = line_filter.feed(text, ts, loop.time())
+                if reports:
+                    await publish(reports)
+                if not keep:
                     continue
-            except (json.JSONDecodeError, ValueError):
-                pass
-
-            self.stdout_lines.append(text)
-            await self.bus.publish(agent_stdout(ts=ts, agent_id=self.spec.id, text=text))
 
-    async def _read_stderr(self) -> None:
-        assert self._proc is not None and self._proc.stderr is not None
-        while True:
-            line = await self._proc.stderr.readline()
-            if not line:
-                return
-            text = line.decode("utf-8", errors="replace").rstrip("\n")
-            await self.bus.publish(
-                agent_stderr(ts=time.time(), agent_id=self.spec.id, text=text)
-            )
+            batch.add(text, ts, loop.time())
+            if self.coalesce_window <= 0 or batch.nbytes >= self.coalesce_max_bytes:
+                await self.bus.publish(batch.take(factory, agent_id))
 
     async def _wait_exit(self) -> None:
         assert self._proc is not None
         code = await self._proc.wait()
+        # Let the readers publish any buffered output before announcing the exit. A
+        # grandchild may still hold the pipes open, so don't wait on them forever.
+        readers = [t for t in self._tasks if t is not asyncio.current_task()]
+        if readers:
+            await asyncio.wait(readers, timeout=1.0)
+        if self._stdin is not None:
+            self._stdin.cancel()
         await self.bus.publish(
             agent_exited(ts=time.time(), agent_id=self.spec.id, exit_code=code)
         )
@@ -0,0 +1,88 @@
+from __future__ import annotations
+
+import asyncio
+from collections.abc import Iterable
+from dataclasses import dataclass
+from pathlib import Path
+
+from acp_hub.bus import EventBus
+from acp_hub.codec import DEFAULT_CODEC, JsonCodec
+from acp_hub.events import Event
+from acp_hub.journal import iter_events
+
+# In as-fast-as-possible mode, yield to the loop this often so subscribers keep pace
+# even when no queue is full enough to apply backpressure.
+_YIELD_EVERY = 256
+
+
+@dataclass(frozen=True)
+class ReplayStats:
+    events: int
+    elapsed: float
+    dropped: int = 0
+
+    @property
+    def rate(self) -> float:
+        """Sustained events per second, delivery included."""
+        return self.events / self.elapsed if self.elapsed > 0 else 0.0
+
+    def describe(self) -> str:
+        text = f"replayed {self.events} events in {self.elapsed:.2f}s ({self.rate:,.0f} events/s)"
+        if self.dropped:
+            text += f", {self.dropped} dropped by the bus"
+        return text
+
+
+async def replay_events(
+    events: Iterable[Event], bus: EventBus, *, speed: float | None = 1.0
+) -> ReplayStats:
+    """
+    Publish recorded *events* into *bus* and wait until they are all delivered.
+
+    *speed* 1.0 keeps the recorded spacing between events, N plays N times faster,
+    and None publishes as fast as the bus accepts them. Events keep their recorded
+    ``seq``, timestamp, kind, agent and payload, so a journal of the replay lines up
+    with the original; only ``mono_ns`` is fresh.
+    """
+    loop = asyncio.get_running_loop()
+    dropped_before = sum(bus.dropped_total.values())
+    start = loop.time()
+    first_ts: float | None = None
+    count = 0
+    for recorded in events:
+        if speed is not None:
+            if first_ts is None:
+                first_ts = recorded.ts
+            delay = start + (recorded.ts - first_ts) / speed - loop.time()
+            if delay > 0:
+                await asyncio.sleep(delay)
+        elif count % _YIELD_EVERY == 0:
+            await asyncio.sleep(0)
+        await bus.publish(
+            Event(
+                ts=recorded.ts,
+                kind=recorded.kind,
+                payload=recorded.payload,
+                agent_id=recorded.agent_id,
+                seq=recorded.seq,
+            )
+        )
+        count += 1
+    await bus.drain()
+    dropped = sum(bus.dropped_total.values()) - dropped_before
+    return ReplayStats(events=count, elapsed=loop.time() - start, dropped=dropped)
+
+
+async def replay_journal(
+    path: Path,
+    bus: EventBus,
+    *,
+    speed: float | None = 1.0,
+    since_ts: float | None = None,
+    kinds: Iterable[str] | None = None,
+    agent_id: str | None = None,
+    codec: JsonCodec = DEFAULT_CODEC,
+) -> ReplayStats:
+    """Replay the journal at *path* (any format, all segments) into *bus*."""
+    events = iter_events(path, since_ts=since_ts, kinds=kinds, agent_id=agent_id, codec=codec)
+    return await replay_events(events, bus, speed=speed)
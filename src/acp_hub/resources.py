@@ -0,0 +1,209 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+import os
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+
+from acp_hub.bus import EventBus
+from acp_hub.events import Event, agent_resources
+
+logger = logging.getLogger(__name__)
+
+PROC = Path("/proc")
+_CLK_TCK = os.sysconf("SC_CLK_TCK") if hasattr(os, "sysconf") else 100
+_PAGE_SIZE = os.sysconf("SC_PAGE_SIZE") if hasattr(os, "sysconf") else 4096
+
+
+@dataclass(slots=True)
+class ProcStat:
+    """The fields of ``/proc/<pid>/stat`` the sampler uses."""
+
+    pid: int
+    ppid: int
+    cpu_ticks: int  # utime + stime; reaped children's time is not included
+    threads: int
+    rss_bytes: int
+
+
+def _read(path: str) -> bytes | None:
+    # Raw os.open/os.read: a few µs per file, about a quarter of Path.read_bytes().
+    try:
+        fd = os.open(path, os.O_RDONLY)
+    except OSError:
+        return None
+    try:
+        return os.read(fd, 4096)
+    except OSError:
+        return None
+    finally:
+        os.close(fd)
+
+
+def read_stat(pid: int, proc: Path = PROC) -> ProcStat | None:
+    """Parse ``/proc/<pid>/stat``; None if the process is gone."""
+    raw = _read(f"{proc}/{pid}/stat")
+    if raw is None:
+        return None
+    # comm (field 2) may contain spaces and parentheses; everything after the last ")"
+    # is space-separated, starting with field 3 (state).
+    fields = raw[raw.rfind(b")") + 2 :].split()
+    try:
+        return ProcStat(
+            pid=pid,
+            ppid=int(fields[1]),
+            # Not cutime/cstime: a child's ticks are already counted while it is in the
+            # tree, and would be counted again once its parent reaps it.
+            cpu_ticks=int(fields[11]) + int(fields[12]),
+            threads=int(fields[17]),
+            rss_bytes=int(fields[21]) * _PAGE_SIZE,
+        )
+    except (IndexError, ValueError):
+        return None
+
+
+def read_io(pid: int, proc: Path = PROC) -> tuple[int, int]:
+    """Storage read/write bytes from ``/proc/<pid>/io`` ((0, 0) if unreadable)."""
+    read_bytes = write_bytes = 0
+    raw = _read(f"{proc}/{pid}/io")
+    if raw is None:
+        return 0, 0
+    for line in raw.splitlines():
+        key, _, value = line.partition(b":")
+        if key == b"read_bytes":
+            read_bytes = int(value)
+        elif key == b"write_bytes":
+            write_bytes = int(value)
+    return read_bytes, write_bytes
+
+
+def process_tree(root: int, children: dict[int, list[int]]) -> list[int]:
+    """*root* and all its descendants, given the ppid → child pids map of the box."""
+    tree = [root]
+    for pid in tree:  # grows while iterating: breadth-first walk
+        tree.extend(children.get(pid, ()))
+    return tree
+
+
+@dataclass
+class _Watch:
+    agent_id: str
+    prev_ticks: dict[int, int] = field(default_factory=dict)  # pid → cpu_ticks last round
+
+
+class ResourceSampler:
+    """
+    Periodic CPU / RSS / I/O sampling of agent process trees from ``/proc``.
+
+    ``watch()`` registers a root pid (an agent process or a shell tool child) under an
+    agent id. Every *interval* seconds the sampler reads ``stat`` (CPU ticks, RSS,
+    threads, parent) for every process once, walks each root's tree, reads ``io`` for
+    the tree members, and publishes one ``agent.resources`` event per agent with the
+    totals over all its roots. CPU% is the tick delta since the previous round (100 =
+    one core busy), so an agent is first reported one round after it is watched.
+    Roots whose process has exited are dropped. Rounds run in a worker thread, so a
+    box with many processes does not stall the event loop.
+
+    ``/proc/<pid>/status`` is not read: the fields it would add (VmRSS, Threads) are
+    already in ``stat``. Without ``/proc`` (not Linux) the sampler does nothing.
+    """
+
+    def __init__(self, bus: EventBus, *, interval: float = 2.0, proc: Path = PROC) -> None:
+        self.bus = bus
+        self.interval = interval
+        self._proc = proc
+        self._watches: dict[int, _Watch] = {}
+        self._last_sample: float | None = None
+
+    @property
+    def available(self) -> bool:
+        return (self._proc / "self" / "stat").exists()
+
+    def watch(self, agent_id: str, pid: int | None) -> None:
+        if pid is not None:
+            self._watches[pid] = _Watch(agent_id=agent_id)
+
+    def unwatch(self, pid: int | None) -> None:
+        if pid is not None:
+            self._watches.pop(pid, None)
+
+    async def run(self) -> None:
+        if not self.available:
+            logger.info("no %s; resource sampling disabled", self._proc)
+            return
+        await asyncio.to_thread(self.sample)  # baseline for the first CPU delta
+        while True:
+            await asyncio.sleep(self.interval)
+            for event in await asyncio.to_thread(self.sample):
+                await self.bus.publish(event)
+
+    def sample(self) -> list[Event]:
+        """Take one round of samples; returns the ``agent.resources`` events."""
+        now = time.monotonic()
+        elapsed = now - self._last_sample if self._last_sample is not None else 0.0
+        self._last_sample = now
+        if not self._watches:
+            return []
+
+        stats = self._scan()
+        children: dict[int, list[int]] = {}
+        for st in stats.values():
+            children.setdefault(st.ppid, []).append(st.pid)
+        totals: dict[str, dict[str, float]] = {}
+        measured: set[str] = set()  # agents with a root past its baseline round
+        for root, watch in list(self._watches.items()):
+            if root not in stats:
+                self._watches.pop(root, None)  # may have been unwatched meanwhile
+                continue
+            tree = process_tree(root, children)
+            ticks = {pid: stats[pid].cpu_ticks for pid in tree}
+            prev = watch.prev_ticks
+            # A pid new since last round was born during the interval: all its ticks count.
+            # On a root's first round there is nothing to compare against yet.
+            delta = sum(max(0, t - prev.get(pid, 0 if prev else t)) for pid, t in ticks.items())
+            watch.prev_ticks = ticks
+            agg = totals.setdefault(
+                watch.agent_id,
+                dict.fromkeys(("cpu", "rss", "read", "write", "threads", "processes"), 0),
+            )
+            for pid in tree:
+                read_bytes, write_bytes = read_io(pid, self._proc)
+                agg["rss"] += stats[pid].rss_bytes
+                agg["threads"] += stats[pid].threads
+                agg["read"] += read_bytes
+                agg["write"] += write_bytes
+            agg["processes"] += len(tree)
+            if prev and elapsed > 0:
+                agg["cpu"] += delta / _CLK_TCK / elapsed * 100.0
+                measured.add(watch.agent_id)
+
+        ts = time.time()
+        return [
+            agent_resources(
+                ts=ts,
+                agent_id=agent_id,
+                cpu_percent=agg["cpu"],
+                rss_bytes=int(agg["rss"]),
+                read_bytes=int(agg["read"]),
+                write_bytes=int(agg["write"]),
+                threads=int(agg["threads"]),
+                processes=int(agg["processes"]),
+            )
+            for agent_id, agg in totals.items()
+            if agent_id in measured
+        ]
+
+    def _scan(self) -> dict[int, ProcStat]:
+        stats: dict[int, ProcStat] = {}
+        try:
+            names = os.listdir(self._proc)
+        except OSError:
+            return stats
+        for name in names:
+            if name.isdigit():
+                st = read_stat(int(name), self._proc)
+                if st is not None:
+                    stats[st.pid] = st
+        return stats
@@ -0,0 +1,66 @@
+from __future__ import annotations
+
+from collections import deque
+from collections.abc import Iterator
+from typing import Any, Generic, TypeVar
+
+T = TypeVar("T")
+
+
+class RingBuffer(Generic[T]):
+    """
+    The most recent items appended, bounded by count and/or total size.
+
+    Appending past *max_items* or *max_bytes* (0 = no bound) evicts the oldest items.
+    Sizes are whatever the caller passes to ``append`` (agent output uses the length of
+    the original line). Evicted items are only counted; the journal keeps them.
+    """
+
+    __slots__ = ("_items", "_sizes", "evicted", "evicted_bytes", "max_bytes", "max_items", "nbytes")
+
+    def __init__(self, *, max_items: int = 0, max_bytes: int = 0) -> None:
+        self.max_items = max_items
+        self.max_bytes = max_bytes
+        self._items: deque[T] = deque()
+        self._sizes: deque[int] = deque()
+        self.nbytes = 0
+        self.evicted = 0
+        self.evicted_bytes = 0
+
+    def append(self, item: T, size: int = 0) -> None:
+        self._items.append(item)
+        self._sizes.append(size)
+        self.nbytes += size
+        while (self.max_items and len(self._items) > self.max_items) or (
+            self.max_bytes and self.nbytes > self.max_bytes and len(self._items) > 1
+        ):
+            self._items.popleft()
+            dropped = self._sizes.popleft()
+            self.nbytes -= dropped
+            self.evicted += 1
+            self.evicted_bytes += dropped
+
+    def __len__(self) -> int:
+        return len(self._items)
+
+    def __iter__(self) -> Iterator[T]:
+        return iter(self._items)
+
+    def __getitem__(self, index: int) -> T:
+        return self._items[index]
+
+    def clear(self) -> None:
+        self.evicted += len(self._items)
+        self.evicted_bytes += self.nbytes
+        self._items.clear()
+        self._sizes.clear()
+        self.nbytes = 0
+
+    def usage(self) -> dict[str, Any]:
+        """Retained items and bytes, and how much has been evicted so far."""
+        return {
+            "items": len(self._items),
+            "bytes": self.nbytes,
+            "evicted": self.evicted,
+            "evicted_bytes": self.evicted_bytes,
+        }
@@ -0,0 +1,175 @@
+from __future__ import annotations
+
+import re
+from dataclasses import dataclass
+
+from acp_hub.events import Event, agent_stderr_suppressed
+
+# Numbers and hex addresses: the parts of a log line that change between otherwise
+# identical warnings (timestamps, counters, pids, pointers).
+_VOLATILE = re.compile(r"0x[0-9a-fA-F]+|\d+")
+
+
+def line_key(text: str) -> str:
+    """*text* with numbers masked; lines with the same key count as repeats."""
+    return _VOLATILE.sub("#", text)
+
+
+def describe_suppressed(payload: dict) -> str:
+    """One line for an ``agent.stderr_suppressed`` payload, for the console and TUI."""
+    count = payload.get("count", 0)
+    if payload.get("reason") == "repeat":
+        return f"(last line repeated {count} time{'s' if count != 1 else ''})"
+    return f"({count} line{'s' if count != 1 else ''} dropped over the stderr rate cap)"
+
+
+@dataclass(slots=True)
+class _Run:
+    """Lines withheld for one reason since the last report."""
+
+    reason: str
+    text: str  # the latest line withheld
+    count: int
+    first_ts: float
+    last_ts: float
+    deadline: float  # loop time by which the run is reported, even if still going
+
+
+class StderrFilter:
+    """
+    Repeat suppression and rate capping for one agent's stderr.
+
+    ``feed()`` decides per line whether it is published. A line equal to the previous
+    one, or equal once numbers are masked (``line_key``), is withheld as a repeat; a
+    new line beyond *rate* lines/s (token bucket holding up to *burst*; 0 = no cap)
+    is withheld as over the rate. Withheld lines are reported as
+    ``agent.stderr_suppressed`` events with a count, the latest text and first/last
+    timestamps: when the run ends, or at least every *report_interval* seconds while
+    it lasts, so a flood costs the bus, journal and UI about one event per second.
+
+    *now* is a monotonic clock reading (the reader passes ``loop.time()``).
+    """
+
+    def __init__(
+        self,
+        agent_id: str,
+        *,
+        rate: float = 0.0,
+        burst: int = 0,
+        report_interval: float = 1.0,
+    ) -> None:
+        self.agent_id = agent_id
+        self.rate = rate
+        self.burst = max(burst, 1)
+        self.report_interval = report_interval
+        self._tokens = float(self.burst)
+        self._refilled: float | None = None
+        self._last_text: str | None = None
+        self._last_key: str | None = None
+        self._repeat: _Run | None = None
+        self._over_rate: _Run | None = None
+        # Totals, for tests and diagnostics.
+        self.passed = 0
+        self.suppressed = 0
+
+    @property
+    def deadline(self) -> float | None:
+        """Earliest loop time at which ``expire()`` has something to report."""
+        deadlines = [r.deadline for r in (self._repeat, self._over_rate) if r is not None]
+        return min(deadlines) if deadlines else None
+
+    def feed(self, text: str, ts: float, now: float) -> tuple[bool, list[Event]]:
+        """
+        Whether to publish *text*, and suppression reports to publish before it (or
+        instead of it).
+        """
+        reports: list[Event] = []
+        if text == self._last_text or (
+            self._last_text is not None and line_key(text) == self._last_key
+        ):
+            self._last_text = text
+            self._repeat = self._withhold(self._repeat, "repeat", text, ts, now, reports)
+            return False, reports
+
+        if self._repeat is not None:
+            if self._repeat.count:  # else everything withheld was already reported
+                reports.append(self._report(self._repeat))
+            self._repeat = None
+        self._last_text = text
+        self._last_key = line_key(text)
+
+        if not self._take_token(now):
+            self._over_rate = self._withhold(self._over_rate, "rate", text, ts, now, reports)
+            return False, reports
+        if self._over_rate is not None:
+            if self._over_rate.count:
+                reports.append(self._report(self._over_rate))
+            self._over_rate = None
+        self.passed += 1
+        return True, reports
+
+    def expire(self, now: float) -> list[Event]:
+        """
+        Reports for runs whose deadline has passed; the runs themselves go on until
+        one stays quiet for a whole interval after its last report.
+        """
+        reports: list[Event] = []
+        for run in (self._repeat, self._over_rate):
+            if run is not None and run.count and now >= run.deadline:
+                reports.append(self._report(run))
+                run.count = 0
+                run.deadline = now + self.report_interval
+        if self._repeat is not None and self._quiet(self._repeat, now):
+            self._repeat = None
+        if self._over_rate is not None and self._quiet(self._over_rate, now):
+            self._over_rate = None
+        return reports
+
+    def flush(self) -> list[Event]:
+        """Reports for everything still withheld (at EOF)."""
+        runs = (self._repeat, self._over_rate)
+        reports = [self._report(r) for r in runs if r is not None and r.count]
+        self._repeat = self._over_rate = None
+        return reports
+
+    def _withhold(
+        self, run: _Run | None, reason: str, text: str, ts: float, now: float, reports: list[Event]
+    ) -> _Run:
+        self.suppressed += 1
+        if run is None or not run.count:
+            deadline = run.deadline if run is not None else now + self.report_interval
+            run = _Run(reason, text, 0, ts, ts, deadline)
+        run.text = text
+        run.count += 1
+        run.last_ts = ts
+        if now >= run.deadline:
+            reports.append(self._report(run))
+            run.count = 0
+            run.deadline = now + self.report_interval
+        return run
+
+    @staticmethod
+    def _quiet(run: _Run, now: float) -> bool:
+        return not run.count and now >= run.deadline
+
+    def _take_token(self, now: float) -> bool:
+        if self.rate <= 0:
+            return True
+        if self._refilled is not None:
+            self._tokens = min(self.burst, self._tokens + (now - self._refilled) * self.rate)
+        self._refilled = now
+        if self._tokens < 1.0:
+            return False
+        self._tokens -= 1.0
+        return True
+
+    def _report(self, run: _Run) -> Event:
+        return agent_stderr_suppressed(
+            ts=run.last_ts,
+            agent_id=self.agent_id,
+            reason=run.reason,
+            text=run.text,
+            count=run.count,
+            first_ts=run.first_ts,
+            last_ts=run.last_ts,
+        )
@@ -0,0 +1,135 @@
+from __future__ import annotations
+
+import asyncio
+from typing import Any
+
+DEFAULT_MAX_PENDING_BYTES = 8 * 1024 * 1024
+
+
+class StdinWriter:
+    """
+    Outbound queue for one agent's stdin, drained by a single writer task.
+
+    ``put()`` only enqueues, so senders return without waiting for the child to read;
+    they block only while more than *max_pending_bytes* are queued. The writer task
+    takes everything queued since its last write, sends it with one ``write()``, then
+    waits in ``drain()``. Messages go out whole and in ``put()`` order, however many
+    tasks are sending.
+
+    Once a write fails (the child closed its stdin or exited) or the writer is
+    cancelled, queued data is dropped, waiting senders and flushers are released, and
+    later ``put()`` calls raise ``RuntimeError``.
+    """
+
+    def __init__(
+        self,
+        stream: asyncio.StreamWriter,
+        *,
+        name: str = "agent",
+        max_pending_bytes: int = DEFAULT_MAX_PENDING_BYTES,
+    ) -> None:
+        self._stream = stream
+        self._name = name
+        self._max_pending_bytes = max_pending_bytes
+        self._pending: list[bytes] = []
+        self._pending_bytes = 0
+        self._ready = asyncio.Event()  # something is queued
+        self._room = asyncio.Event()  # below the high-water mark
+        self._idle = asyncio.Event()  # nothing queued or in flight
+        self._room.set()
+        self._idle.set()
+        self._error: BaseException | None = None
+        self._task: asyncio.Task[None] | None = None
+        # Counters for stats().
+        self.messages = 0
+        self.writes = 0
+        self.bytes = 0
+        self.max_depth = 0
+        self.drain_seconds = 0.0
+
+    def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def put(self, data: bytes) -> None:
+        while self._pending and self._pending_bytes >= self._max_pending_bytes:
+            self._check()
+            self._room.clear()
+            await self._room.wait()
+        self._check()
+        self._pending.append(data)
+        self._pending_bytes += len(data)
+        self.messages += 1
+        self.max_depth = max(self.max_depth, len(self._pending))
+        self._idle.clear()
+        self._ready.set()
+
+    async def flush(self) -> None:
+        """Wait until everything queued so far has been written and drained."""
+        await self._idle.wait()
+
+    async def close(self) -> None:
+        """Flush, stop the writer task, and close the stream (EOF for the child)."""
+        if self._task is not None and self._error is None:
+            await self.flush()
+        self.cancel()
+        try:
+            self._stream.close()
+            await self._stream.wait_closed()
+        except Exception:
+            pass
+
+    def cancel(self) -> None:
+        """Stop the writer task without flushing; queued data is dropped."""
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+        if self._error is None:
+            self._error = ConnectionAbortedError("stdin writer cancelled")
+        self._discard()
+
+    def stats(self) -> dict[str, Any]:
+        return {
+            "queued": len(self._pending),
+            "queued_bytes": self._pending_bytes,
+            "max_queued": self.max_depth,
+            "messages": self.messages,
+            "writes": self.writes,
+            "bytes": self.bytes,
+            "drain_blocked_s": round(self.drain_seconds, 6),
+        }
+
+    def _check(self) -> None:
+        if self._error is not None:
+            raise RuntimeError(f"stdin of {self._name} is closed") from self._error
+
+    def _discard(self) -> None:
+        """Drop whatever is queued and wake everyone waiting on the writer."""
+        self._pending.clear()
+        self._pending_bytes = 0
+        self._room.set()
+        self._idle.set()
+
+    async def _run(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            if not self._pending:
+                self._idle.set()
+                self._ready.clear()
+                await self._ready.wait()
+            batch = self._pending
+            self._pending = []
+            self._pending_bytes = 0
+            self._room.set()
+            data = batch[0] if len(batch) == 1 else b"".join(batch)
+            try:
+                self._stream.write(data)
+                started = loop.time()
+                await self._stream.drain()
+                self.drain_seconds += loop.time() - started
+            except (ConnectionError, OSError, RuntimeError) as exc:
+                self._error = exc
+                self._discard()
+                return
+            self.writes += 1
+            self.bytes += len(data)
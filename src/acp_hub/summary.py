@@ -0,0 +1,252 @@
+from __future__ import annotations
+
+import asyncio
+import json
+import os
+from collections.abc import Iterable
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from typing import Any
+
+from acp_hub.events import Event
+
+SUMMARY_VERSION = 1
+
+_PHASE_FIELDS = {
+    "agent.spawn_ms": "spawn_ms",
+    "agent.init_ms": "init_ms",
+    "agent.stop_ms": "stop_ms",
+}
+
+
+def _mib(nbytes: int) -> str:
+    return f"{nbytes / (1024 * 1024):.1f} MiB"
+
+
+def summary_path(journal_path: Path) -> Path:
+    """``runs/latest/events.jsonl`` → ``runs/latest/summary.json``."""
+    return journal_path.with_name("summary.json")
+
+
+@dataclass
+class AgentSummary:
+    stdout_lines: int = 0
+    stderr_lines: int = 0
+    stderr_suppressed: int = 0  # of stderr_lines, withheld as repeats or over the rate cap
+    jsonrpc_messages: int = 0
+    tool_invocations: int = 0
+    tool_failures: int = 0
+    started_ts: float | None = None
+    first_output_ts: float | None = None
+    exit_code: int | None = None
+    # Latest agent.spawn_ms / agent.init_ms / agent.stop_ms
+    spawn_ms: float | None = None
+    init_ms: float | None = None
+    stop_ms: float | None = None
+    # Latest agent.resources sample, and CPU/RSS peaks over the run
+    cpu_percent: float | None = None
+    rss_bytes: int | None = None
+    read_bytes: int = 0
+    write_bytes: int = 0
+    threads: int = 0
+    cpu_peak_percent: float = 0.0
+    rss_peak_bytes: int = 0
+
+    @property
+    def time_to_first_output_ms(self) -> float | None:
+        if self.started_ts is None or self.first_output_ts is None:
+            return None
+        return round((self.first_output_ts - self.started_ts) * 1000.0, 3)
+
+
+@dataclass
+class RunSummary:
+    """
+    Run-level aggregates, maintained one event at a time.
+
+    Holds what used to be recomputed by rescanning the journal after each run:
+    per-agent output and message counts, time to first output and exit code, tool
+    invocations and failures per tool, shell exit codes, and the set of files
+    touched (``fs.changed`` events and file-writing tool results).
+
+    A journal appended to by several invocations holds several runs, each opened by
+    a ``hub.started`` event; a summary covers only the latest one.
+    """
+
+    events: int = 0
+    first_ts: float | None = None
+    last_ts: float | None = None
+    agents: dict[str, AgentSummary] = field(default_factory=dict)
+    tools: dict[str, dict[str, int]] = field(default_factory=dict)
+    shell_exit_codes: dict[str, int] = field(default_factory=dict)
+    files_touched: set[str] = field(default_factory=set)
+    tasks: int = 0
+
+    @classmethod
+    def from_events(cls, events: Iterable[Event]) -> RunSummary:
+        """Build a summary from scratch, e.g. from ``iter_events`` of an old journal."""
+        summary = cls()
+        for event in events:
+            if event.kind == "hub.started":
+                summary = cls()
+            summary.apply(event)
+        return summary
+
+    def apply(self, event: Event) -> None:
+        self.events += 1
+        if self.first_ts is None:
+            self.first_ts = event.ts
+        self.last_ts = event.ts
+        kind = event.kind
+        payload = event.payload
+        agent = self._agent(event.agent_id) if event.agent_id is not None else None
+
+        if kind == "agent.stdout" and agent is not None:
+            agent.stdout_lines += payload.get("lines", 1)
+            if agent.first_output_ts is None:
+                agent.first_output_ts = event.ts
+        elif kind == "agent.stderr" and agent is not None:
+            agent.stderr_lines += payload.get("lines", 1)
+        elif kind == "agent.stderr_suppressed" and agent is not None:
+            agent.stderr_lines += payload.get("count", 0)
+            agent.stderr_suppressed += payload.get("count", 0)
+        elif kind == "agent.jsonrpc" and agent is not None:
+            agent.jsonrpc_messages += 1
+            if agent.first_output_ts is None:
+                agent.first_output_ts = event.ts
+        elif kind == "agent.started" and agent is not None:
+            if agent.started_ts is None:  # later restarts (multi-task runs) keep the first
+                agent.started_ts = event.ts
+        elif kind == "agent.exited" and agent is not None:
+            agent.exit_code = payload.get("exit_code")
+        elif kind == "agent.resources" and agent is not None:
+            agent.cpu_percent = payload.get("cpu_percent", 0.0)
+            agent.rss_bytes = payload.get("rss_bytes", 0)
+            agent.read_bytes = payload.get("read_bytes", 0)
+            agent.write_bytes = payload.get("write_bytes", 0)
+            agent.threads = payload.get("threads", 0)
+            agent.cpu_peak_percent = max(agent.cpu_peak_percent, agent.cpu_percent or 0.0)
+            agent.rss_peak_bytes = max(agent.rss_peak_bytes, agent.rss_bytes or 0)
+        elif kind in _PHASE_FIELDS and agent is not None:
+            setattr(agent, _PHASE_FIELDS[kind], payload.get("ms"))
+        elif kind == "tool.invocation":
+            self._tool(payload)["invocations"] += 1
+            if agent is not None:
+                agent.tool_invocations += 1
+        elif kind == "tool.result":
+            result = payload.get("result") or {}
+            if not payload.get("ok", False):
+                self._tool(payload)["failures"] += 1
+                if agent is not None:
+                    agent.tool_failures += 1
+            if "exit_code" in result:
+                code = str(result["exit_code"])
+                self.shell_exit_codes[code] = self.shell_exit_codes.get(code, 0) + 1
+            if "written" in result and "path" in result:
+                self.files_touched.add(str(result["path"]))
+        elif kind == "fs.changed":
+            self.files_touched.add(str(payload.get("path", "?")))
+        elif kind == "task.submitted":
+            self.tasks += 1
+
+    def to_dict(self) -> dict[str, Any]:
+        return {
+            "version": SUMMARY_VERSION,
+            "events": self.events,
+            "first_ts": self.first_ts,
+            "last_ts": self.last_ts,
+            "tasks": self.tasks,
+            "agents": {
+                aid: {**asdict(a), "time_to_first_output_ms": a.time_to_first_output_ms}
+                for aid, a in sorted(self.agents.items())
+            },
+            "tools": {name: dict(counts) for name, counts in sorted(self.tools.items())},
+            "shell_exit_codes": dict(sorted(self.shell_exit_codes.items())),
+            "files_touched": sorted(self.files_touched),
+        }
+
+    def save(self, path: Path) -> None:
+        """Write atomically, so readers never see a half-written file."""
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_name(path.name + ".tmp")
+        tmp.write_text(json.dumps(self.to_dict(), indent=2) + "\n", encoding="utf-8")
+        os.replace(tmp, path)
+
+    def describe(self) -> str:
+        """A few human-readable lines for the end of ``acp-hub run``."""
+        lines = [f"run summary: {self.events} events, {self.tasks} task(s)"]
+        for aid, a in sorted(self.agents.items()):
+            ttfo = a.time_to_first_output_ms
+            suppressed = f" ({a.stderr_suppressed} suppressed)" if a.stderr_suppressed else ""
+            lines.append(
+                f"  {aid}: {a.stdout_lines} stdout / {a.stderr_lines} stderr lines{suppressed}, "
+                f"{a.jsonrpc_messages} rpc, {a.tool_invocations} tools "
+                f"({a.tool_failures} failed), first output "
+                f"{'-' if ttfo is None else f'{ttfo:.0f}ms'}, exit {a.exit_code}"
+            )
+            if a.cpu_percent is not None:
+                lines.append(
+                    f"    cpu peak {a.cpu_peak_percent:.0f}%, rss peak {_mib(a.rss_peak_bytes)}, "
+                    f"io {_mib(a.read_bytes)} read / {_mib(a.write_bytes)} written, "
+                    f"{a.threads} threads"
+                )
+        if self.shell_exit_codes:
+            codes = ", ".join(f"{c} x{n}" for c, n in sorted(self.shell_exit_codes.items()))
+            lines.append(f"  shell exit codes: {codes}")
+        if self.files_touched:
+            lines.append(f"  files touched: {len(self.files_touched)}")
+        return "\n".join(lines)
+
+    def _agent(self, agent_id: str) -> AgentSummary:
+        agent = self.agents.get(agent_id)
+        if agent is None:
+            agent = self.agents[agent_id] = AgentSummary()
+        return agent
+
+    def _tool(self, payload: dict[str, Any]) -> dict[str, int]:
+        name = str(payload.get("tool", "?"))
+        counts = self.tools.get(name)
+        if counts is None:
+            counts = self.tools[name] = {"invocations": 0, "failures": 0}
+        return counts
+
+
+@dataclass
+class SummarySink:
+    """
+    EventBus subscriber that keeps a ``RunSummary`` current and checkpoints it.
+
+    ``run_checkpoints()`` rewrites *path* every *interval* seconds while there is
+    something new; ``close()`` writes the final state. Like ``RunSummary.from_events``,
+    it starts over at each ``hub.started``.
+    """
+
+    path: Path
+    summary: RunSummary = field(default_factory=RunSummary)
+    _saved_events: int = -1
+
+    async def __call__(self, event: Event) -> None:
+        if event.kind == "hub.started" and self.summary.events:
+            self.summary = RunSummary()
+        self.summary.apply(event)
+
+    def checkpoint(self) -> None:
+        if self.summary.events != self._saved_events:
+            self.summary.save(self.path)
+            self._saved_events = self.summary.events
+
+    async def run_checkpoints(self, interval: float) -> None:
+        while True:
+            await asyncio.sleep(interval)
+            self.checkpoint()
+
+    def close(self) -> None:
+        self.checkpoint()
+
+
+def load_summary(path: Path) -> dict[str, Any] | None:
+    """The checkpointed summary at *path* as plain data (None if there is none yet)."""
+    try:
+        return json.loads(path.read_text(encoding="utf-8"))
+    except FileNotFoundError:
+        return None
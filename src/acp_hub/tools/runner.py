@@ -7,6 +7,8 @@ from typing import Any
 
 from acp_hub.bus import EventBus
 from acp_hub.events import tool_invocation, tool_result
+from acp_hub.limits import NO_LIMITS, ResourceLimits
+from acp_hub.resources import ResourceSampler
 from acp_hub.tools.shell import ShellTool
 from acp_hub.tools.files import FilesTool
 
@@ -47,8 +49,10 @@ class ToolRunner:
         timeout: float = 30.0,
         shell_allowlist: tuple[str, ...] | list[str] = (),
         require_approval: bool = False,
+        sampler: ResourceSampler | None = None,
     ) -> None:
         self.bus = bus
+        self.sampler = sampler  # shell children are sampled under the requesting agent
         self.workspace_root = Path(workspace_root).resolve() if workspace_root else Path.cwd().resolve()
         self.timeout = timeout
         self.shell_allowlist: tuple[str, ...] = tuple(shell_allowlist)
@@ -75,12 +79,13 @@ class ToolRunner:
         correlation_id: str | None,
         *,
         sandbox: Path | None = None,
+        limits: ResourceLimits = NO_LIMITS,
     ) -> dict[str, Any]:
         """
         Execute a tool on behalf of *agent_id*.
 
         *sandbox* is the agent's sandbox directory — all file operations and
-        shell cwd are confined to it.
+        shell cwd are confined to it. *limits* apply to shell commands.
         """
         ts = time.time()
 
@@ -110,7 +115,9 @@ class ToolRunner:
         else:
             try:
                 effective_sandbox = sandbox or self.workspace_root
-                result = await self._dispatch(handler_key, args, effective_sandbox)
+                result = await self._dispatch(
+                    handler_key, args, effective_sandbox, agent_id, limits
+                )
                 ok = "error" not in result
             except PermissionError as exc:
                 result = {"error": f"blocked: {exc}"}
@@ -136,10 +143,15 @@ class ToolRunner:
     # ------------------------------------------------------------------
 
     async def _dispatch(
-        self, handler_key: str, args: dict[str, Any], sandbox: Path
+        self,
+        handler_key: str,
+        args: dict[str, Any],
+        sandbox: Path,
+        agent_id: str,
+        limits: ResourceLimits,
     ) -> dict[str, Any]:
         if handler_key == "shell":
-            return await self._run_shell(args, sandbox)
+            return await self._run_shell(args, sandbox, agent_id, limits)
         elif handler_key == "files_read":
             return self._run_file_read(args, sandbox)
         elif handler_key == "files_write":
@@ -154,7 +166,7 @@ class ToolRunner:
     # ------------------------------------------------------------------
 
     async def _run_shell(
-        self, args: dict[str, Any], sandbox: Path
+        self, args: dict[str, Any], sandbox: Path, agent_id: str, limits: ResourceLimits
     ) -> dict[str, Any]:
         command = args.get("command", args.get("argv", args.get("cmd", "")))
         if isinstance(command, list):
@@ -187,7 +199,11 @@ class ToolRunner:
             )
 
         # Enforce sandbox as cwd — agents can't choose arbitrary directories.
-        shell = ShellTool(cwd=str(sandbox), timeout=self.timeout)
+        shell = ShellTool(cwd=str(sandbox), timeout=self.timeout, limits=limits)
+        if self.sampler is not None:
+            sampler = self.sampler
+            shell.on_spawn = lambda pid: sampler.watch(agent_id, pid)
+            shell.on_exit = sampler.unwatch
         return await shell.run(argv, cwd=str(sandbox))
 
     # ------------------------------------------------------------------
@@ -2,17 +2,40 @@ from __future__ import annotations
 
 import asyncio
 import logging
+import signal
+from collections.abc import Callable
 from typing import Any
 
+from acp_hub.limits import NO_LIMITS, ResourceLimits, children_cpu_seconds, signal_group
+
 logger = logging.getLogger(__name__)
 
 
 class ShellTool:
-    """Execute shell commands with timeout and output capture."""
+    """
+    Execute shell commands with timeout and output capture.
+
+    The command runs in its own process group under *limits*; on timeout, and once it
+    exits, the whole group is killed, so nothing it started outlives the call.
 
-    def __init__(self, *, cwd: str | None = None, timeout: float = 30.0) -> None:
+    *on_spawn* / *on_exit* are called with the child's pid, e.g. to have it sampled
+    for resource use while it runs.
+    """
+
+    def __init__(
+        self,
+        *,
+        cwd: str | None = None,
+        timeout: float = 30.0,
+        limits: ResourceLimits = NO_LIMITS,
+        on_spawn: Callable[[int], None] | None = None,
+        on_exit: Callable[[int], None] | None = None,
+    ) -> None:
         self.cwd = cwd
         self.timeout = timeout
+        self.limits = limits
+        self.on_spawn = on_spawn
+        self.on_exit = on_exit
 
     async def run(
         self,
@@ -24,18 +47,25 @@ class ShellTool:
         """
         Run a command and return structured result.
 
-        Returns dict with: exit_code, stdout, stderr, argv, timed_out
+        Returns dict with: exit_code, stdout, stderr, argv, timed_out, and with limits
+        set: limits (the ones applied), limit_hit (the limit that most likely ended the
+        command, or None) and signal (name of the signal that killed it, or None).
         """
         effective_cwd = cwd or self.cwd
+        cpu_before = children_cpu_seconds() if self.limits.cpu_seconds is not None else None
 
         proc = await asyncio.create_subprocess_exec(
-            *argv,
+            *self.limits.wrap(argv),
             stdout=asyncio.subprocess.PIPE,
             stderr=asyncio.subprocess.PIPE,
             cwd=effective_cwd,
             env=env,
+            start_new_session=True,
         )
 
+        if self.on_spawn is not None:
+            self.on_spawn(proc.pid)
+
         timed_out = False
         try:
             stdout_bytes, stderr_bytes = await asyncio.wait_for(
@@ -43,8 +73,16 @@ class ShellTool:
             )
         except asyncio.TimeoutError:
             timed_out = True
-            proc.kill()
+            if proc.returncode is None:
+                signal_group(proc.pid, signal.SIGKILL)
             stdout_bytes, stderr_bytes = await proc.communicate()
+        finally:
+            # Cancelled mid-run: kill the group, but never once the leader is reaped
+            # (its pid, the group id, may have been reused).
+            if proc.returncode is None:
+                signal_group(proc.pid, signal.SIGKILL)
+            if self.on_exit is not None:
+                self.on_exit(proc.pid)
 
         stdout_text = stdout_bytes.decode("utf-8", errors="replace")
         stderr_text = stderr_bytes.decode("utf-8", errors="replace")
@@ -56,10 +94,22 @@ class ShellTool:
         if len(stderr_text) > max_chars:
             stderr_text = f"... (truncated {len(stderr_text) - max_chars} chars) ...\n" + stderr_text[-max_chars:]
 
-        return {
+        result: dict[str, Any] = {
             "exit_code": proc.returncode,
             "stdout": stdout_text,
             "stderr": stderr_text,
             "argv": argv,
             "timed_out": timed_out,
         }
+        if self.limits:
+            code = proc.returncode
+            result["limits"] = self.limits.to_dict()
+            # CPU used by the children reaped meanwhile: this command, plus any other
+            # tool that finished concurrently (an overestimate only).
+            cpu_used = None
+            if cpu_before is not None:
+                cpu_used = (children_cpu_seconds() or 0.0) - cpu_before
+            hit = self.limits.hit(code, stderr_text, cpu_used=cpu_used)
+            result["limit_hit"] = None if timed_out else hit
+            result["signal"] = signal.Signals(-code).name if code is not None and code < 0 else None
+        return result
@@ -1,11 +1,14 @@
 from __future__ import annotations
 
 import asyncio
+import contextlib
 import sys
 import time
+from pathlib import Path
 from typing import Any
 
 from acp_hub.bus import EventBus
+from acp_hub.codec import get_codec
 from acp_hub.config import HubConfig
 from acp_hub.events import Event
 from acp_hub.fs_watch import poll_fs_changes
@@ -13,11 +16,24 @@ from acp_hub.journal import JsonlJournal, journal_sink
 from acp_hub.proc import ManagedAgentProcess
 from acp_hub.protocols import get_adapter
 from acp_hub.protocols.base import ProtocolAdapter
+from acp_hub.replay import replay_journal
+from acp_hub.resources import ResourceSampler
 from acp_hub.router import Router
+from acp_hub.stderr_filter import describe_suppressed
+from acp_hub.summary import SummarySink, summary_path
 from acp_hub.tools.runner import ToolRunner
 
 
-def run_tui(cfg: HubConfig) -> int:
+def run_tui(
+    cfg: HubConfig, *, replay_path: Path | None = None, replay_speed: float | None = 1.0
+) -> int:
+    """
+    Run the Textual UI.
+
+    With *replay_path*, no agents are spawned and nothing is journaled: the recorded
+    journal is streamed through the bus into the panels at *replay_speed* (see
+    ``replay_events``), and the sustained rate is shown when it finishes.
+    """
     try:
         from textual.app import App, ComposeResult
         from textual.containers import Horizontal, Vertical
@@ -78,13 +94,33 @@ def run_tui(cfg: HubConfig) -> int:
         def __init__(self, hub_config: HubConfig) -> None:
             super().__init__()
             self.hub_config = hub_config
-            self.bus = EventBus()
-            self.journal = JsonlJournal(path=hub_config.journal_path)
+            self.bus = EventBus(
+                policies=hub_config.bus_policies,
+                slow_handler_budget=hub_config.slow_handler_budget_ms / 1000.0 or None,
+            )
+            self.journal = JsonlJournal(
+                path=hub_config.journal_path,
+                durability=hub_config.journal_durability,
+                flush_interval=hub_config.journal_flush_ms / 1000.0,
+                background=True,
+                rotate_bytes=int(hub_config.journal_rotate_mb * 1024 * 1024) or None,
+                rotate_interval=hub_config.journal_rotate_seconds or None,
+                compression=hub_config.journal_compression,
+                format=hub_config.journal_format,
+                codec=get_codec(hub_config.json_codec),
+            )
+            # The status bar is rendered from the live summary; in replay mode it is
+            # kept in memory only, so the recorded run's summary.json is left alone.
+            self.summary = SummarySink(summary_path(hub_config.journal_path))
+            self.sampler: ResourceSampler | None = None
+            if hub_config.resource_interval > 0:
+                self.sampler = ResourceSampler(self.bus, interval=hub_config.resource_interval)
             self.tool_runner = ToolRunner(
                 self.bus,
                 workspace_root=str(hub_config.workspace_root),
                 shell_allowlist=hub_config.shell_allowlist,
                 require_approval=hub_config.require_tool_approval,
+                sampler=self.sampler,
             )
             self._agents: dict[str, ManagedAgentProcess] = {}
             self._adapters: dict[str, ProtocolAdapter] = {}
@@ -104,14 +140,39 @@ def run_tui(cfg: HubConfig) -> int:
             yield Footer()
 
         async def on_mount(self) -> None:
+            if replay_path is not None:
+                self.sub_title = f"replay: {replay_path}"
+                self.bus.subscribe(self.summary, durable=True)
+                self.bus.subscribe(self._route_event_to_ui)
+                self._bg_tasks.append(asyncio.create_task(self._replay(replay_path)))
+                return
+
             self.sub_title = f"journal: {self.hub_config.journal_path}"
             self.journal.open()
-            self.bus.subscribe(journal_sink(self.journal))
+            self.bus.subscribe(journal_sink(self.journal), durable=True)
+            self.bus.subscribe(self.summary, durable=True)
             self.bus.subscribe(self._route_event_to_ui)
 
             # Spawn agents
             await self._spawn_agents()
 
+            if self.hub_config.metrics_interval > 0:
+                self._bg_tasks.append(
+                    asyncio.create_task(
+                        self.bus.run_metrics(
+                            self.hub_config.metrics_interval, extra=self._agent_metrics
+                        )
+                    )
+                )
+            if self.hub_config.summary_interval > 0:
+                self._bg_tasks.append(
+                    asyncio.create_task(
+                        self.summary.run_checkpoints(self.hub_config.summary_interval)
+                    )
+                )
+            if self.sampler is not None:
+                self._bg_tasks.append(asyncio.create_task(self.sampler.run()))
+
             # Start fs watcher
             if self.hub_config.watch_paths:
                 task = asyncio.create_task(
@@ -122,15 +183,41 @@ def run_tui(cfg: HubConfig) -> int:
                 )
                 self._bg_tasks.append(task)
 
+        def _agent_metrics(self) -> dict[str, Any]:
+            return {
+                "agents": {
+                    aid: {**p.memory_usage(), "stdin": p.stdin_stats()}
+                    for aid, p in self._agents.items()
+                }
+            }
+
+        async def _replay(self, path: Path) -> None:
+            stats = await replay_journal(
+                path, self.bus, speed=replay_speed, codec=self.journal.codec
+            )
+            self._log_transcript(f"[dim]{stats.describe()}[/dim]")
+            with contextlib.suppress(Exception):
+                self.query_one("#status-bar", Static).update(stats.describe())
+
         async def _spawn_agents(self) -> None:
             for spec in self.hub_config.agents:
-                proc = ManagedAgentProcess(spec=spec, bus=self.bus)
+                proc = ManagedAgentProcess(
+                    spec=spec,
+                    bus=self.bus,
+                    max_line_bytes=int(self.hub_config.max_line_mb * 1024 * 1024),
+                    spill_dir=self.hub_config.journal_path.parent / "spill",
+                    spill_cap_bytes=int(self.hub_config.spill_max_mb * 1024 * 1024) or None,
+                    codec=get_codec(self.hub_config.json_codec),
+                    journal=self.journal,
+                )
                 adapter_cls = get_adapter(spec.protocol)
                 adapter = adapter_cls(proc)
                 self._agents[spec.id] = proc
                 self._adapters[spec.id] = adapter
                 try:
                     await proc.start()
+                    if self.sampler is not None:
+                        self.sampler.watch(spec.id, proc.pid)
                     await adapter.initialize()
                     self._log_transcript(f"[green]Agent '{spec.id}' started[/green]")
                 except Exception as exc:
@@ -159,20 +246,43 @@ def run_tui(cfg: HubConfig) -> int:
             # Update status bar
             try:
                 status = self.query_one("#status-bar", Static)
+                summary = self.summary.summary
                 agents_str = ", ".join(
-                    f"{aid}({'ok' if p.running else 'exit'})"
-                    for aid, p in self._agents.items()
+                    f"{aid}({'exit ' + str(a.exit_code) if a.exit_code is not None else 'ok'},"
+                    f" {a.jsonrpc_messages} rpc"
+                    + (
+                        f", {a.cpu_percent:.0f}% cpu {(a.rss_bytes or 0) / 2**20:.0f} MiB"
+                        if a.cpu_percent is not None
+                        else ""
+                    )
+                    + ")"
+                    for aid, a in sorted(summary.agents.items())
+                )
+                tools = sum(t["invocations"] for t in summary.tools.values())
+                failed = sum(t["failures"] for t in summary.tools.values())
+                status.update(
+                    f"Agents: {agents_str} | tools: {tools} ({failed} failed)"
+                    f" | files: {len(summary.files_touched)}"
+                    f" | journal: {self.hub_config.journal_path}"
                 )
-                status.update(f"Agents: {agents_str} | journal: {self.hub_config.journal_path}")
             except Exception:
                 pass
 
         def _handle_agent_event(self, event: Event) -> None:
             aid = event.agent_id or "?"
             if event.kind == "agent.stdout":
-                self._log_transcript(f"[cyan][{aid}][/cyan] {event.payload.get('text', '')}")
+                # Coalesced chunks are written in one go, with the prefix on every line.
+                prefix = f"[cyan][{aid}][/cyan] "
+                text = event.payload.get("text", "").replace("\n", "\n" + prefix)
+                self._log_transcript(prefix + text)
             elif event.kind == "agent.stderr":
-                self._log_transcript(f"[yellow][{aid}:err][/yellow] {event.payload.get('text', '')}")
+                prefix = f"[yellow][{aid}:err][/yellow] "
+                text = event.payload.get("text", "").replace("\n", "\n" + prefix)
+                self._log_transcript(prefix + text)
+            elif event.kind == "agent.stderr_suppressed":
+                self._log_transcript(
+                    f"[yellow][{aid}:err][/yellow] [dim]{describe_suppressed(event.payload)}[/dim]"
+                )
             elif event.kind == "agent.jsonrpc":
                 msg = event.payload.get("message", {})
                 method = msg.get("method", "response")
@@ -223,6 +333,7 @@ def run_tui(cfg: HubConfig) -> int:
             result = await self.tool_runner.execute(
                 agent_id, tool_name, args, corr_id,
                 sandbox=agent_proc.spec.sandbox,
+                limits=agent_proc.spec.tool_limits,
             )
             ok = "error" not in result
             await adapter.send_tool_result(corr_id, result, ok=ok)
@@ -273,7 +384,10 @@ def run_tui(cfg: HubConfig) -> int:
                     await proc.terminate()
                 except Exception:
                     pass
+            await self.bus.aclose()
             self.journal.close()
+            if replay_path is None:
+                self.summary.close()
 
     HubApp(cfg).run()
     return 0
@@ -8,7 +8,7 @@ from pathlib import Path
 
 sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "src"))
 
-from acp_hub.bus import EventBus
+from acp_hub.bus import DeliveryPolicy, EventBus, LatencyHistogram
 from acp_hub.events import Event
 
 
@@ -37,6 +37,7 @@ class TestEventBus(unittest.TestCase):
         async def run() -> None:
             for e in events:
                 await bus.publish(e)
+            await bus.drain()
 
         asyncio.run(run())
 
@@ -58,8 +59,10 @@ class TestEventBus(unittest.TestCase):
 
         async def run() -> None:
             await bus.publish(e1)
+            await bus.drain()
             unsub()
             await bus.publish(e2)
+            await bus.drain()
 
         asyncio.run(run())
 
@@ -82,6 +85,7 @@ class TestEventBus(unittest.TestCase):
         async def run() -> None:
             for e in [e1, e2, e3]:
                 await bus.publish(e)
+            await bus.drain()
 
         asyncio.run(run())
 
@@ -105,6 +109,7 @@ class TestEventBus(unittest.TestCase):
 
         async def run() -> None:
             await bus.publish(e)
+            await bus.drain()
 
         asyncio.run(run())
 
@@ -122,6 +127,481 @@ class TestEventBus(unittest.TestCase):
         unsub()
         self.assertEqual(bus.handler_count, 0)
 
+    def test_same_handler_subscribed_twice(self) -> None:
+        """Each subscription is independent, even for the same handler object."""
+        bus = EventBus()
+        received: list[Event] = []
+
+        async def handler(event: Event) -> None:
+            received.append(event)
+
+        unsub_all = bus.subscribe(handler)
+        bus.subscribe(handler, kind_prefix="agent.")
+
+        e1 = Event(ts=1.0, kind="agent.stdout", payload={})
+        e2 = Event(ts=2.0, kind="tool.result", payload={})
+
+        async def run() -> None:
+            await bus.publish(e1)
+            await bus.drain()
+            unsub_all()
+            await bus.publish(e1)
+            await bus.publish(e2)
+            await bus.drain()
+
+        asyncio.run(run())
+
+        self.assertEqual(received, [e1, e1, e1])
+
+    def test_dispatch_index_tracks_subscriptions(self) -> None:
+        """Subscribing after a kind was cached still routes new events to the newcomer."""
+        bus = EventBus(delivery="sequential")
+        first: list[str] = []
+        late: list[str] = []
+
+        async def h_first(event: Event) -> None:
+            first.append(event.kind)
+
+        async def h_late(event: Event) -> None:
+            late.append(event.kind)
+
+        bus.subscribe(h_first, kind_prefix="tool.")
+
+        async def run() -> None:
+            await bus.publish(Event(ts=1.0, kind="tool.result", payload={}))
+            bus.subscribe(h_late, kind_prefix="tool.res")
+            await bus.publish(Event(ts=2.0, kind="tool.result", payload={}))
+            await bus.publish(Event(ts=3.0, kind="tool.invocation", payload={}))
+            await bus.publish(Event(ts=4.0, kind="agent.stdout", payload={}))
+
+        asyncio.run(run())
+
+        self.assertEqual(first, ["tool.result", "tool.result", "tool.invocation"])
+        self.assertEqual(late, ["tool.result"])
+
+    def test_slow_handler_does_not_block_publish(self) -> None:
+        """In concurrent mode publish returns before a slow handler finishes."""
+        bus = EventBus()
+        release = asyncio.Event()
+        fast: list[Event] = []
+        slow: list[Event] = []
+
+        async def slow_handler(event: Event) -> None:
+            await release.wait()
+            slow.append(event)
+
+        async def fast_handler(event: Event) -> None:
+            fast.append(event)
+
+        bus.subscribe(slow_handler)
+        bus.subscribe(fast_handler)
+
+        events = [Event(ts=float(i), kind="test", payload={"n": i}) for i in range(5)]
+
+        async def run() -> None:
+            for e in events:
+                await bus.publish(e)
+            await asyncio.sleep(0)
+            self.assertEqual(fast, events)
+            self.assertEqual(slow, [])
+            release.set()
+            await bus.drain()
+
+        asyncio.run(run())
+
+        self.assertEqual(slow, events)
+
+    def test_full_queue_applies_backpressure(self) -> None:
+        """publish waits for room once a subscriber's queue is full."""
+        bus = EventBus(queue_size=2)
+        release = asyncio.Event()
+        received: list[Event] = []
+
+        async def handler(event: Event) -> None:
+            await release.wait()
+            received.append(event)
+
+        bus.subscribe(handler)
+        events = [Event(ts=float(i), kind="test", payload={}) for i in range(4)]
+
+        async def publish_all() -> None:
+            for e in events:
+                await bus.publish(e)
+
+        async def run() -> None:
+            publisher = asyncio.create_task(publish_all())
+            await asyncio.sleep(0.01)
+            self.assertFalse(publisher.done())
+            release.set()
+            await publisher
+            await bus.aclose()
+
+        asyncio.run(run())
+
+        self.assertEqual(received, events)
+
+    def test_nested_publish_from_handler(self) -> None:
+        """A handler may publish into its own full queue without deadlocking."""
+        bus = EventBus(queue_size=1)
+        received: list[str] = []
+
+        async def handler(event: Event) -> None:
+            received.append(event.kind)
+            if event.kind == "start":
+                for i in range(3):
+                    await bus.publish(Event(ts=0.0, kind=f"child.{i}", payload={}))
+
+        bus.subscribe(handler)
+
+        async def run() -> None:
+            await bus.publish(Event(ts=0.0, kind="start", payload={}))
+            await asyncio.wait_for(bus.drain(), timeout=2.0)
+
+        asyncio.run(run())
+
+        self.assertEqual(received, ["start", "child.0", "child.1", "child.2"])
+
+    def test_task_spawned_by_handler_respects_bounds(self) -> None:
+        """Only the worker itself skips backpressure; a task a handler spawns waits."""
+        bus = EventBus(queue_size=1)
+        release = asyncio.Event()
+        spawned: list[asyncio.Task[None]] = []
+
+        async def slow(event: Event) -> None:
+            if event.kind == "child":
+                await release.wait()
+
+        async def spawner(event: Event) -> None:
+            async def flood() -> None:
+                for _ in range(5):
+                    await bus.publish(Event(ts=0.0, kind="child", payload={}))
+
+            spawned.append(asyncio.create_task(flood()))
+
+        bus.subscribe(slow, kind_prefix="child")
+        bus.subscribe(spawner, kind_prefix="start")
+
+        async def run() -> int:
+            await bus.publish(Event(ts=0.0, kind="start", payload={}))
+            while not spawned:
+                await asyncio.sleep(0.01)
+            await asyncio.sleep(0.05)
+            self.assertFalse(spawned[0].done())   # blocked on the full queue
+            queued = max(h["queued"] for h in bus.stats()["handlers"])
+            release.set()
+            await spawned[0]
+            await bus.aclose()
+            return queued
+
+        self.assertLessEqual(asyncio.run(run()), 1)
+
+    def test_sequential_mode(self) -> None:
+        """Sequential mode delivers inline, before publish returns."""
+        bus = EventBus(delivery="sequential")
+        received: list[Event] = []
+
+        async def handler(event: Event) -> None:
+            received.append(event)
+
+        bus.subscribe(handler)
+        e = Event(ts=1.0, kind="test", payload={})
+
+        asyncio.run(bus.publish(e))
+
+        self.assertEqual(received, [e])
+
+    def test_unknown_delivery_mode(self) -> None:
+        with self.assertRaises(ValueError):
+            EventBus(delivery="bogus")
+
+    def test_drop_oldest_bounds_flooding_output(self) -> None:
+        """A stuck subscriber keeps only the newest stdout events and reports drops."""
+        bus = EventBus(
+            policies={"agent.stdout": DeliveryPolicy(capacity=4, overflow="drop-oldest")},
+            drop_report_interval=0.01,
+        )
+        release = asyncio.Event()
+        received: list[Event] = []
+        reports: list[Event] = []
+
+        async def stuck(event: Event) -> None:
+            await release.wait()
+            received.append(event)
+
+        async def monitor(event: Event) -> None:
+            reports.append(event)
+
+        bus.subscribe(stuck, kind_prefix="agent.")
+        bus.subscribe(monitor, kind_prefix="bus.")
+
+        async def run() -> None:
+            for i in range(100):
+                await bus.publish(Event(ts=0.0, kind="agent.stdout", payload={"n": i}))
+                if i == 0:
+                    await asyncio.sleep(0)  # worker picks up the first event
+            await asyncio.sleep(0.05)
+            release.set()
+            await bus.aclose()
+
+        asyncio.run(run())
+
+        # The first event was already in the handler; the queue kept the newest four.
+        self.assertEqual([e.payload["n"] for e in received], [0, 96, 97, 98, 99])
+        self.assertEqual(bus.dropped_total, {"agent.stdout": 95})
+        self.assertTrue(reports)
+        self.assertEqual(sum(e.payload["total"] for e in reports), 95)
+
+    def test_durable_subscriber_gets_every_event(self) -> None:
+        """Drop-oldest sheds events for a stuck UI subscriber, never for a durable one."""
+        bus = EventBus(
+            policies={"agent.stdout": DeliveryPolicy(capacity=4, overflow="drop-oldest")}
+        )
+        journal_ready = asyncio.Event()
+        ui_ready = asyncio.Event()
+        journal: list[int] = []
+        ui: list[int] = []
+
+        async def slow_journal(event: Event) -> None:
+            await journal_ready.wait()
+            journal.append(event.payload["n"])
+
+        async def stuck_ui(event: Event) -> None:
+            await ui_ready.wait()
+            ui.append(event.payload["n"])
+
+        bus.subscribe(slow_journal, durable=True)
+        bus.subscribe(stuck_ui)
+
+        async def run() -> None:
+            async def flood() -> None:
+                for i in range(50):
+                    await bus.publish(Event(ts=0.0, kind="agent.stdout", payload={"n": i}))
+
+            publisher = asyncio.create_task(flood())
+            await asyncio.sleep(0.05)
+            self.assertFalse(publisher.done())   # held back by the durable subscriber
+            journal_ready.set()
+            await publisher
+            ui_ready.set()
+            await bus.aclose()
+
+        asyncio.run(run())
+
+        self.assertEqual(journal, list(range(50)))
+        self.assertLess(len(ui), 50)
+        self.assertEqual(bus.dropped_total["agent.stdout"], 50 - len(ui))
+
+    def test_block_policy_never_drops(self) -> None:
+        """Protocol-critical kinds block the publisher instead of dropping."""
+        bus = EventBus(policies={"agent.jsonrpc": DeliveryPolicy(capacity=2)})
+        received: list[int] = []
+
+        async def slow(event: Event) -> None:
+            await asyncio.sleep(0.001)
+            received.append(event.payload["n"])
+
+        bus.subscribe(slow)
+
+        async def run() -> None:
+            for i in range(20):
+                await bus.publish(Event(ts=0.0, kind="agent.jsonrpc", payload={"n": i}))
+            await bus.drain()
+
+        asyncio.run(run())
+
+        self.assertEqual(received, list(range(20)))
+        self.assertEqual(bus.dropped_total, {})
+
+    def test_coalesce_replaces_same_path(self) -> None:
+        """fs.changed coalesces repeated changes to the same path under pressure."""
+        bus = EventBus(policies={"fs.changed": DeliveryPolicy(capacity=2, overflow="coalesce")})
+        release = asyncio.Event()
+        received: list[tuple[str, str]] = []
+
+        async def stuck(event: Event) -> None:
+            await release.wait()
+            received.append((event.payload["path"], event.payload["change"]))
+
+        bus.subscribe(stuck)
+
+        def fs(path: str, change: str) -> Event:
+            return Event(ts=0.0, kind="fs.changed", payload={"path": path, "change": change})
+
+        async def run() -> None:
+            await bus.publish(fs("/x", "created"))
+            await asyncio.sleep(0)  # worker picks up the first event
+            await bus.publish(fs("/a", "created"))
+            await bus.publish(fs("/b", "created"))
+            await bus.publish(fs("/a", "modified"))
+            await bus.publish(fs("/a", "deleted"))
+            release.set()
+            await bus.drain()
+
+        asyncio.run(run())
+
+        self.assertEqual(received, [("/x", "created"), ("/a", "deleted"), ("/b", "created")])
+
+    def test_order_preserved_across_policy_lanes(self) -> None:
+        """Events in different policy classes are still delivered in publish order."""
+        bus = EventBus()
+        received: list[str] = []
+
+        async def handler(event: Event) -> None:
+            received.append(event.kind)
+
+        bus.subscribe(handler)
+        kinds = ["agent.stdout", "agent.jsonrpc", "tool.result", "agent.stdout", "hub.stopped"]
+
+        async def run() -> None:
+            for kind in kinds:
+                await bus.publish(Event(ts=0.0, kind=kind, payload={}))
+            await bus.drain()
+
+        asyncio.run(run())
+
+        self.assertEqual(received, kinds)
+
+    def test_publish_many_preserves_order(self) -> None:
+        bus = EventBus()
+        received: list[Event] = []
+
+        async def handler(event: Event) -> None:
+            received.append(event)
+
+        bus.subscribe(handler)
+        events = [Event(ts=float(i), kind="test", payload={"n": i}) for i in range(10)]
+
+        async def run() -> None:
+            await bus.publish_many(events)
+            await bus.drain()
+
+        asyncio.run(run())
+
+        self.assertEqual(received, events)
+
+    def test_per_line_subscription_splits_chunks(self) -> None:
+        """per_line=True handlers see one event per line of a coalesced chunk."""
+        bus = EventBus()
+        chunks: list[Event] = []
+        lines: list[str] = []
+
+        async def chunk_handler(event: Event) -> None:
+            chunks.append(event)
+
+        async def line_handler(event: Event) -> None:
+            lines.append(event.payload["text"])
+
+        bus.subscribe(chunk_handler)
+        bus.subscribe(line_handler, per_line=True)
+
+        async def run() -> None:
+            await bus.publish(
+                Event(ts=1.0, kind="agent.stdout", payload={"text": "a\nb\nc", "lines": 3})
+            )
+            await bus.publish(Event(ts=2.0, kind="agent.stdout", payload={"text": "d"}))
+            await bus.drain()
+
+        asyncio.run(run())
+
+        self.assertEqual(len(chunks), 2)
+        self.assertEqual(lines, ["a", "b", "c", "d"])
+
+    def test_stats_counts_calls_errors_and_latency(self) -> None:
+        bus = EventBus()
+
+        async def ok_handler(event: Event) -> None:
+            await asyncio.sleep(0.002)
+
+        async def bad_handler(event: Event) -> None:
+            raise RuntimeError("boom")
+
+        bus.subscribe(ok_handler)
+        bus.subscribe(bad_handler, kind_prefix="test.bad")
+
+        async def run() -> None:
+            for kind in ("test.ok", "test.bad", "test.ok"):
+                await bus.publish(Event(ts=0.0, kind=kind, payload={}))
+            await bus.drain()
+
+        asyncio.run(run())
+
+        stats = {h["handler"].rsplit(".", 1)[-1]: h for h in bus.stats()["handlers"]}
+        self.assertEqual(stats["ok_handler"]["calls"], 3)
+        self.assertEqual(stats["ok_handler"]["errors"], 0)
+        self.assertGreaterEqual(stats["ok_handler"]["latency"]["max_ms"], 2.0)
+        self.assertEqual(stats["ok_handler"]["lag"]["count"], 3)
+        self.assertEqual(stats["bad_handler"]["calls"], 1)
+        self.assertEqual(stats["bad_handler"]["errors"], 1)
+        self.assertEqual(stats["bad_handler"]["kind_prefix"], "test.bad")
+
+    def test_slow_handler_logged_by_name(self) -> None:
+        bus = EventBus(slow_handler_budget=0.001)
+
+        async def sluggish_handler(event: Event) -> None:
+            await asyncio.sleep(0.01)
+
+        bus.subscribe(sluggish_handler)
+
+        async def run() -> None:
+            await bus.publish(Event(ts=0.0, kind="test", payload={}))
+            await bus.drain()
+
+        with self.assertLogs("acp_hub.bus", level="WARNING") as logs:
+            asyncio.run(run())
+
+        self.assertIn("sluggish_handler", logs.output[0])
+        self.assertEqual(bus.stats()["handlers"][0]["slow"], 1)
+
+    def test_failing_per_line_handler_logged_by_name(self) -> None:
+        """The error log names the subscriber, not the per-line wrapper around it."""
+        bus = EventBus()
+
+        async def broken_handler(event: Event) -> None:
+            raise RuntimeError("boom")
+
+        bus.subscribe(broken_handler, per_line=True)
+
+        async def run() -> None:
+            await bus.publish(Event(ts=0.0, kind="test", payload={}))
+            await bus.drain()
+
+        with self.assertLogs("acp_hub.bus", level="ERROR") as logs:
+            asyncio.run(run())
+
+        self.assertIn("broken_handler", logs.output[0])
+        self.assertNotIn("<function", logs.output[0])
+
+    def test_run_metrics_publishes_snapshots(self) -> None:
+        bus = EventBus()
+        snapshots: list[Event] = []
+
+        async def collector(event: Event) -> None:
+            snapshots.append(event)
+
+        bus.subscribe(collector, kind_prefix="hub.metrics")
+
+        async def run() -> None:
+            task = asyncio.create_task(bus.run_metrics(0.01))
+            await asyncio.sleep(0.05)
+            task.cancel()
+            await bus.drain()
+
+        asyncio.run(run())
+
+        self.assertTrue(snapshots)
+        self.assertIn("handlers", snapshots[0].payload)
+
+    def test_latency_histogram_percentiles(self) -> None:
+        hist = LatencyHistogram()
+        for _ in range(90):
+            hist.record(0.0008)  # 0.8 ms -> 1 ms bucket
+        for _ in range(10):
+            hist.record(0.2)  # 200 ms -> 250 ms bucket
+        self.assertEqual(hist.count, 100)
+        self.assertEqual(hist.percentile(0.5), 1.0)
+        self.assertEqual(hist.percentile(0.95), 200.0)  # capped at the max seen
+        self.assertAlmostEqual(hist.to_dict()["max_ms"], 200.0)
+
 
 if __name__ == "__main__":
     unittest.main()
@@ -0,0 +1,112 @@
+"""Tests for the pluggable JSON codec."""
+
+from __future__ import annotations
+
+import contextlib
+import json
+import sys
+import unittest
+from pathlib import Path
+from typing import Any
+from unittest import mock
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "src"))
+
+from acp_hub.codec import (
+    CODEC_NAMES,
+    STDLIB,
+    JsonCodec,
+    bench_transcript,
+    get_codec,
+    looks_like_json,
+)
+
+
+def _refuse(text: str) -> Any:
+    raise ValueError(f"unsupported constant {text}")
+
+
+def _int64(text: str) -> int:
+    value = int(text)
+    if not -(1 << 63) <= value < 1 << 64:
+        raise ValueError(f"integer out of range: {text}")
+    return value
+
+
+_DECODER = json.JSONDecoder(parse_constant=_refuse, parse_int=_int64)
+
+
+def _strict(data: str | bytes) -> Any:
+    """Stands in for orjson/msgspec: refuses NaN/Infinity and integers beyond 64 bits."""
+    return _DECODER.decode(data if isinstance(data, str) else data.decode("utf-8"))
+
+
+def _available() -> list:
+    codecs = []
+    for name in CODEC_NAMES[1:]:
+        with contextlib.suppress(ValueError):
+            codecs.append(get_codec(name))
+    return codecs
+
+
+class TestCodec(unittest.TestCase):
+    def test_sniff(self) -> None:
+        for text in ('{"a": 1}', "[1]", '  {"a": 1}', b'{"a": 1}', b"\t[1]"):
+            self.assertTrue(looks_like_json(text), text)
+        for text in ("hello", "", "   ", "42", '"s"', b"plain", b"", "null"):
+            self.assertFalse(looks_like_json(text), text)
+
+    def test_codecs_agree_with_stdlib(self) -> None:
+        doc = (
+            '{"jsonrpc":"2.0","id":7,"params":{"t":"é ✓","n":[1,2.5,null,true]},"big":'
+            + str(1 << 80)
+            + "}"
+        )
+        expected = json.loads(doc)
+        for codec in _available():
+            with self.subTest(codec=codec.name):
+                self.assertEqual(codec.loads(doc), expected)
+                self.assertEqual(codec.loads(doc.encode()), expected)
+                self.assertEqual(json.loads(codec.dumps(expected)), expected)
+                self.assertNotIn(b"\n", codec.dumps(expected))
+                with self.assertRaises(ValueError):
+                    codec.loads("{not json")
+
+    def test_stdlib_retry_only_for_what_the_backend_refuses(self) -> None:
+        codec = JsonCodec("strict", _strict, STDLIB.dumps, (ValueError,))
+        big = str(1 << 80)
+        with mock.patch("acp_hub.codec.json.loads", wraps=json.loads) as stdlib_loads:
+            self.assertEqual(codec.loads('{"n": ' + big + "}"), {"n": 1 << 80})
+            self.assertEqual(codec.loads('{"x": Infinity}'), {"x": float("inf")})
+            self.assertEqual(stdlib_loads.call_count, 2)
+            for text in ("{", '{"a": 1', "plain text"):
+                with self.assertRaises(ValueError):
+                    codec.loads(text)
+            self.assertEqual(stdlib_loads.call_count, 2)
+
+    def test_backend_errors_become_value_errors(self) -> None:
+        class DecodeError(Exception):
+            pass
+
+        def loads(data: str | bytes) -> Any:
+            raise DecodeError("bad")
+
+        codec = JsonCodec("odd", loads, STDLIB.dumps, (DecodeError,))
+        with self.assertRaises(ValueError):
+            codec.loads("{")
+
+    def test_get_codec(self) -> None:
+        self.assertIs(get_codec("stdlib"), STDLIB)
+        self.assertIn(get_codec("auto").name, CODEC_NAMES)
+        with self.assertRaises(ValueError):
+            get_codec("simplejson")
+
+    def test_bench_transcript(self) -> None:
+        lines = ["plain text", '{"method":"x"}', "{broken"] * 10
+        result = bench_transcript(lines, STDLIB, repeat=1)
+        self.assertEqual((result.codec, result.lines), ("stdlib", 30))
+        self.assertIn("stdlib: 30 lines", result.describe())
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -124,3 +124,171 @@ class TestConfig(unittest.TestCase):
             cfg = load_config(p)
             self.assertTrue(cfg.require_tool_approval)
             self.assertEqual(cfg.shell_allowlist, ("git ", "npm "))
+
+    def test_bus_policies(self) -> None:
+        """bus_policies are parsed into DeliveryPolicy objects and validated."""
+        with tempfile.TemporaryDirectory() as td:
+            p = Path(td) / "acp-hub.json"
+            base = {
+                "workspace_root": td,
+                "journal_path": "runs/latest/events.jsonl",
+                "watch_paths": ["."],
+                "agents": [{"id": "e", "agent": "echo"}],
+            }
+            p.write_text(
+                json.dumps(
+                    {
+                        **base,
+                        "bus_policies": {
+                            "agent.stdout": {"capacity": 64, "overflow": "coalesce"}
+                        },
+                    }
+                ),
+                encoding="utf-8",
+            )
+            cfg = load_config(p)
+            policy = cfg.bus_policies["agent.stdout"]
+            self.assertEqual((policy.capacity, policy.overflow), (64, "coalesce"))
+            self.assertEqual(
+                cfg.to_dict()["bus_policies"],
+                {"agent.stdout": {"capacity": 64, "overflow": "coalesce"}},
+            )
+
+            p.write_text(
+                json.dumps(
+                    {**base, "bus_policies": {"tool.": {"capacity": 8, "overflow": "lossy"}}}
+                ),
+                encoding="utf-8",
+            )
+            with self.assertRaises(ConfigError):
+                load_config(p)
+
+    def test_journal_rotation(self) -> None:
+        """Journal rotation settings have defaults and compression is validated."""
+        with tempfile.TemporaryDirectory() as td:
+            p = Path(td) / "acp-hub.json"
+            base = {
+                "workspace_root": td,
+                "journal_path": "runs/latest/events.jsonl",
+                "watch_paths": ["."],
+                "agents": [{"id": "e", "agent": "echo"}],
+            }
+            p.write_text(json.dumps(base), encoding="utf-8")
+            cfg = load_config(p)
+            self.assertEqual(
+                (cfg.journal_rotate_mb, cfg.journal_rotate_seconds, cfg.journal_compression),
+                (256.0, 0.0, "gzip"),
+            )
+
+            p.write_text(json.dumps({**base, "journal_compression": "zstd"}), encoding="utf-8")
+            with self.assertRaises(ConfigError):
+                load_config(p)
+
+    def test_json_codec(self) -> None:
+        """json_codec defaults to auto and rejects unknown names."""
+        with tempfile.TemporaryDirectory() as td:
+            p = Path(td) / "acp-hub.json"
+            base = {
+                "workspace_root": td,
+                "journal_path": "runs/latest/events.jsonl",
+                "watch_paths": ["."],
+                "agents": [{"id": "e", "agent": "echo"}],
+            }
+            p.write_text(json.dumps(base), encoding="utf-8")
+            self.assertEqual(load_config(p).json_codec, "auto")
+
+            p.write_text(json.dumps({**base, "json_codec": "stdlib"}), encoding="utf-8")
+            self.assertEqual(load_config(p).json_codec, "stdlib")
+
+            p.write_text(json.dumps({**base, "json_codec": "simplejson"}), encoding="utf-8")
+            with self.assertRaises(ConfigError):
+                load_config(p)
+
+    def test_agent_retention(self) -> None:
+        """Per-agent output retention has defaults and can be overridden per agent."""
+        with tempfile.TemporaryDirectory() as td:
+            p = Path(td) / "acp-hub.json"
+            agent = {"id": "e", "agent": "echo"}
+            base = {
+                "workspace_root": td,
+                "journal_path": "runs/latest/events.jsonl",
+                "watch_paths": ["."],
+            }
+            p.write_text(json.dumps({**base, "agents": [agent]}), encoding="utf-8")
+            spec = load_config(p).agents[0]
+            self.assertEqual((spec.retain_items, spec.retain_mb), (10_000, 16.0))
+
+            tuned = {**agent, "retain_items": 0, "retain_mb": 0.5}
+            p.write_text(json.dumps({**base, "agents": [tuned]}), encoding="utf-8")
+            spec = load_config(p).agents[0]
+            self.assertEqual((spec.retain_items, spec.retain_mb), (0, 0.5))
+
+            bad = {**agent, "retain_items": 1.5}
+            p.write_text(json.dumps({**base, "agents": [bad]}), encoding="utf-8")
+            with self.assertRaises(ConfigError):
+                load_config(p)
+
+    def test_resource_limits(self) -> None:
+        """Agent and tool limits are parsed; per-agent tool limits override the hub's."""
+        with tempfile.TemporaryDirectory() as td:
+            p = Path(td) / "acp-hub.json"
+            base = {
+                "workspace_root": td,
+                "journal_path": "runs/latest/events.jsonl",
+                "watch_paths": ["."],
+                "tool_limits": {"cpu_seconds": 60, "nice": 10},
+            }
+            agent = {
+                "id": "e",
+                "agent": "echo",
+                "limits": {"address_space_mb": 2048, "open_files": 256},
+                "tool_limits": {"nice": 15},
+            }
+            p.write_text(json.dumps({**base, "agents": [agent]}), encoding="utf-8")
+            spec = load_config(p).agents[0]
+            self.assertEqual(spec.limits.to_dict(), {"address_space_mb": 2048.0, "open_files": 256})
+            self.assertEqual(spec.tool_limits.to_dict(), {"cpu_seconds": 60, "nice": 15})
+
+            p.write_text(
+                json.dumps({**base, "agents": [{**agent, "limits": {"nice": 0}}]}),
+                encoding="utf-8",
+            )
+            self.assertEqual(load_config(p).agents[0].limits.to_dict(), {"nice": 0})
+
+            zeros = [
+                {name: 0}
+                for name in ("cpu_seconds", "address_space_mb", "open_files", "max_processes")
+            ]
+            for bad in ({"nice": 20}, {"cpu_seconds": -1}, {"stack_mb": 8}, *zeros):
+                p.write_text(
+                    json.dumps({**base, "agents": [{**agent, "limits": bad}]}), encoding="utf-8"
+                )
+                with self.assertRaises(ConfigError):
+                    load_config(p)
+
+    def test_stderr_rate(self) -> None:
+        """stderr_rate defaults to no cap; rate and burst are validated per agent."""
+        with tempfile.TemporaryDirectory() as td:
+            p = Path(td) / "acp-hub.json"
+            base = {
+                "workspace_root": td,
+                "journal_path": "runs/latest/events.jsonl",
+                "watch_paths": ["."],
+            }
+            agents = [
+                {"id": "a", "agent": "echo"},
+                {"id": "b", "agent": "echo", "stderr_rate": 20, "stderr_burst": 50},
+            ]
+            p.write_text(json.dumps({**base, "agents": agents}), encoding="utf-8")
+            a, b = load_config(p).agents
+            self.assertEqual((a.stderr_rate, a.stderr_burst), (0.0, 1000))
+            self.assertEqual((b.stderr_rate, b.stderr_burst), (20.0, 50))
+            self.assertEqual(b.to_dict()["stderr_burst"], 50)
+
+            for bad in ({"stderr_rate": -1}, {"stderr_burst": 1.5}):
+                p.write_text(
+                    json.dumps({**base, "agents": [{"id": "a", "agent": "echo", **bad}]}),
+                    encoding="utf-8",
+                )
+                with self.assertRaises(ConfigError):
+                    load_config(p)
@@ -11,8 +11,11 @@ from acp_hub.events import (
     Event,
     agent_exited,
     agent_jsonrpc,
+    agent_phase_timing,
+    agent_resources,
     agent_started,
     agent_stderr,
+    agent_stderr_suppressed,
     agent_stdout,
     file_changed,
     hub_started,
@@ -43,9 +46,17 @@ class TestEvents(unittest.TestCase):
         factories = [
             lambda: agent_stdout(ts=1, agent_id="a", text="hi"),
             lambda: agent_stderr(ts=1, agent_id="a", text="err"),
+            lambda: agent_stderr_suppressed(
+                ts=1, agent_id="a", reason="repeat", text="err", count=2, first_ts=0.5, last_ts=1,
+            ),
             lambda: agent_jsonrpc(ts=1, agent_id="a", message={"m": 1}),
             lambda: agent_started(ts=1, agent_id="a", command=["echo"]),
             lambda: agent_exited(ts=1, agent_id="a", exit_code=0),
+            lambda: agent_phase_timing(ts=1, agent_id="a", phase="spawn", ms=1.5),
+            lambda: agent_resources(
+                ts=1, agent_id="a", cpu_percent=1.0, rss_bytes=1, read_bytes=0,
+                write_bytes=0, threads=1, processes=1,
+            ),
             lambda: tool_invocation(ts=1, agent_id="a", tool_name="t", args={}, correlation_id="c"),
             lambda: tool_result(ts=1, agent_id="a", tool_name="t", ok=True, result={}, correlation_id="c"),
             lambda: file_changed(ts=1, path="/x", change="created"),
@@ -62,6 +73,45 @@ class TestEvents(unittest.TestCase):
             self.assertIn("kind", d)
             self.assertIn("ts", d)
 
+    def test_event_is_slotted(self) -> None:
+        e = Event(ts=1.0, kind="test", payload={})
+        self.assertFalse(hasattr(e, "__dict__"))
+
+    def test_seq_and_monotonic_order(self) -> None:
+        """seq and mono_ns increase in creation order, independent of wall-clock ts."""
+        first = agent_stdout(ts=5.0, agent_id="a", text="x")
+        second = agent_stdout(ts=1.0, agent_id="b", text="y")
+        self.assertLess(first.seq, second.seq)
+        self.assertLessEqual(first.mono_ns, second.mono_ns)
+        self.assertEqual(first.to_dict()["seq"], first.seq)
+        self.assertNotIn("mono_ns", first.to_dict())
+
+    def test_equality_ignores_ordering_fields(self) -> None:
+        first = agent_stdout(ts=1.0, agent_id="a", text="x")
+        second = agent_stdout(ts=1.0, agent_id="a", text="x")
+        self.assertNotEqual(first.seq, second.seq)
+        self.assertEqual(first, second)
+        self.assertNotEqual(first, agent_stdout(ts=1.0, agent_id="a", text="y"))
+
+    def test_agent_phase_timing(self) -> None:
+        e = agent_phase_timing(ts=1, agent_id="a", phase="init", ms=12.34567, error="boom")
+        self.assertEqual(e.kind, "agent.init_ms")
+        self.assertEqual(e.payload, {"ms": 12.346, "error": "boom"})
+        stop = agent_phase_timing(ts=1, agent_id="a", phase="stop", ms=1)
+        self.assertNotIn("error", stop.payload)
+
+    def test_from_dict_round_trip(self) -> None:
+        e = Event(ts=1.5, kind="tool.result", payload={"ok": True}, agent_id="a1")
+        back = Event.from_dict(e.to_dict())
+        self.assertEqual(back.to_dict(), e.to_dict())
+
+    def test_from_dict_legacy_line_without_seq(self) -> None:
+        """Journal lines written before seq existed still load, with a fresh seq."""
+        e = Event.from_dict({"ts": 1.0, "kind": "agent.stdout", "payload": {"text": "hi"}})
+        self.assertEqual(e.kind, "agent.stdout")
+        self.assertIsNone(e.agent_id)
+        self.assertGreater(e.seq, 0)
+
 
 if __name__ == "__main__":
     unittest.main()
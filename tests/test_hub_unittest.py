@@ -0,0 +1,125 @@
+"""Tests for Hub agent lifecycle — spawns real child processes."""
+
+from __future__ import annotations
+
+import asyncio
+import contextlib
+import io
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+from unittest import mock
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "src"))
+
+from acp_hub.config import AgentSpec, HubConfig
+from acp_hub.hub import Hub
+from acp_hub.journal import iter_events
+
+# ACP agent that answers acp/sendMessage and ignores SIGTERM, so stopping it takes
+# the whole grace period.
+STUBBORN_AGENT = """
+import json, signal, sys
+signal.signal(signal.SIGTERM, signal.SIG_IGN)
+for line in sys.stdin:
+    msg = json.loads(line)
+    if msg.get("method") == "acp/sendMessage":
+        reply = {"role": "assistant", "content": {"type": "text", "text": "ok"}}
+        print(json.dumps({"jsonrpc": "2.0", "id": msg["id"], "result": {"message": reply}}),
+              flush=True)
+"""
+
+
+def _make_spec(id: str, sandbox: Path, command: tuple[str, ...]) -> AgentSpec:
+    return AgentSpec(id=id, agent="fake", protocol="acp", command=command, sandbox=sandbox)
+
+
+def _make_config(td: str, *specs: AgentSpec) -> HubConfig:
+    return HubConfig(
+        workspace_root=Path(td),
+        journal_path=Path(td) / "runs" / "events.jsonl",
+        watch_paths=(),
+        agents=specs,
+        metrics_interval=0,
+        summary_interval=0,
+        agent_stop_timeout=0.5,
+    )
+
+
+class TestHubLifecycle(unittest.TestCase):
+    def test_agents_stop_concurrently(self) -> None:
+        """Shutdown costs one grace period, not one per agent; phases are timed."""
+        with tempfile.TemporaryDirectory() as td:
+            command = ("python3", "-c", STUBBORN_AGENT)
+            cfg = _make_config(td, *(_make_spec(f"a{i}", Path(td), command) for i in range(3)))
+            hub = Hub(cfg)
+            out = io.StringIO()
+            with contextlib.redirect_stdout(out):
+                rc = asyncio.run(hub.run_task("go", route="broadcast"))
+            self.assertEqual(rc, 0)
+            self.assertIn("run summary:", out.getvalue())
+
+            events = list(iter_events(cfg.journal_path))
+            by_kind: dict[str, list] = {}
+            for e in events:
+                by_kind.setdefault(e.kind, []).append(e)
+            for kind in ("agent.spawn_ms", "agent.init_ms", "agent.stop_ms"):
+                self.assertEqual(sorted(e.agent_id for e in by_kind[kind]), ["a0", "a1", "a2"])
+            stops = by_kind["agent.stop_ms"]
+            self.assertTrue(all(e.payload["ms"] >= 450 for e in stops))
+            # Finished together: the three grace periods overlapped.
+            self.assertLess(max(e.ts for e in stops) - min(e.ts for e in stops), 0.3)
+            self.assertIsNotNone(hub.summary.summary.agents["a0"].stop_ms)
+
+    def test_spawn_failures_are_collected(self) -> None:
+        """Every agent that fails to spawn is reported; the ones that started are stopped."""
+        with tempfile.TemporaryDirectory() as td:
+            cfg = _make_config(
+                td,
+                _make_spec("good", Path(td), ("python3", "-c", STUBBORN_AGENT)),
+                _make_spec("bad1", Path(td), (str(Path(td) / "missing-1"),)),
+                _make_spec("bad2", Path(td), (str(Path(td) / "missing-2"),)),
+            )
+            hub = Hub(cfg)
+            out = io.StringIO()
+            with contextlib.redirect_stdout(out), contextlib.redirect_stderr(io.StringIO()):
+                rc = asyncio.run(hub.run_task("go", route="broadcast"))
+            self.assertEqual(rc, 1)
+            # A failed run ends with its error, not a summary.
+            self.assertNotIn("run summary:", out.getvalue())
+
+            spawns = {
+                e.agent_id: e.payload
+                for e in iter_events(cfg.journal_path, kinds={"agent.spawn_ms"})
+            }
+            self.assertNotIn("error", spawns["good"])
+            self.assertIn("FileNotFoundError", spawns["bad1"]["error"])
+            self.assertIn("FileNotFoundError", spawns["bad2"]["error"])
+            self.assertFalse(hub._agents["good"].running)
+
+    def test_cancelled_start_terminates_the_agent(self) -> None:
+        """Cancelling a start mid-handshake (e.g. at shutdown) does not leak the child."""
+        started = []
+
+        async def hang(proc, adapter) -> None:
+            started.append(proc)
+            await asyncio.Event().wait()
+
+        async def run(hub: Hub) -> None:
+            task = asyncio.create_task(hub._start_agent(hub.config.agents[0]))
+            while not started:
+                await asyncio.sleep(0.01)
+            task.cancel()
+            with self.assertRaises(asyncio.CancelledError):
+                await task
+
+        with tempfile.TemporaryDirectory() as td:
+            cfg = _make_config(td, _make_spec("a", Path(td), ("python3", "-c", STUBBORN_AGENT)))
+            with mock.patch("acp_hub.hub._handshake", hang):
+                asyncio.run(run(Hub(cfg)))
+        self.assertFalse(started[0].running)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,158 @@
+"""Tests for the binary journal format."""
+
+from __future__ import annotations
+
+import contextlib
+import io
+import json
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "src"))
+
+from acp_hub.cli import main
+from acp_hub.events import Event, agent_jsonrpc
+from acp_hub.journal import JsonlJournal, convert_journal, iter_events, journal_format
+from acp_hub.journal_binary import MAGIC
+
+
+def _events() -> list[Event]:
+    return [
+        Event(ts=1.5, kind="hub.started", payload={"agents": ["a", "b"]}),
+        Event(ts=2.0, kind="agent.stdout", payload={"text": "héllo\n", "lines": 2}, agent_id="a"),
+        agent_jsonrpc(
+            ts=3.25,
+            agent_id="b",
+            message={"jsonrpc": "2.0", "id": 7, "result": {"ok": True, "n": None, "f": 0.1}},
+            raw='{"jsonrpc":"2.0","id":7,"result":{"ok":true,"n":null,"f":0.1}}',
+        ),
+        Event(ts=4.0, kind="agent.stdout", payload={"big": 2**70, "neg": -3}, agent_id="a"),
+    ]
+
+
+class TestBinaryJournal(unittest.TestCase):
+    def test_round_trip_matches_to_dict(self) -> None:
+        with tempfile.TemporaryDirectory() as td:
+            p = Path(td) / "events.acpj"
+            written = _events()
+            with JsonlJournal(path=p, format="binary") as journal:
+                for e in written:
+                    journal.write(e)
+
+            self.assertTrue(p.read_bytes().startswith(MAGIC))
+            self.assertEqual(journal_format(p), "binary")
+            self.assertEqual(
+                [e.to_dict() for e in journal.read_all()], [e.to_dict() for e in written]
+            )
+            self.assertEqual(
+                [e.ts for e in iter_events(p, kinds=["agent.stdout"], since_ts=3.0)], [4.0]
+            )
+            with JsonlJournal(path=p, format="binary") as journal:
+                self.assertEqual([e.ts for e in journal.lookup(agent_id="b")], [3.25])
+
+    def test_append_session_resets_string_table(self) -> None:
+        with tempfile.TemporaryDirectory() as td:
+            p = Path(td) / "events.acpj"
+            with JsonlJournal(path=p, format="binary") as journal:
+                journal.write(Event(ts=1.0, kind="one", payload={}, agent_id="x"))
+            with JsonlJournal(path=p, format="binary") as journal:
+                journal.write(Event(ts=2.0, kind="two", payload={}, agent_id="y"))
+
+            self.assertEqual(
+                [(e.kind, e.agent_id) for e in iter_events(p)], [("one", "x"), ("two", "y")]
+            )
+
+    def test_truncated_final_record(self) -> None:
+        with tempfile.TemporaryDirectory() as td:
+            p = Path(td) / "events.acpj"
+            with JsonlJournal(path=p, format="binary") as journal:
+                for e in _events():
+                    journal.write(e)
+            p.write_bytes(p.read_bytes()[:-5])
+
+            self.assertEqual(len(list(iter_events(p))), 3)
+
+    def test_record_larger_than_read_chunk(self) -> None:
+        with tempfile.TemporaryDirectory() as td:
+            p = Path(td) / "events.acpj"
+            text = "x" * (3 << 20)
+            with JsonlJournal(path=p, format="binary") as journal:
+                journal.write(Event(ts=1.0, kind="agent.stdout", payload={"text": text}))
+                journal.write(Event(ts=2.0, kind="agent.stdout", payload={}))
+
+            events = list(iter_events(p))
+
+        self.assertEqual(len(events[0].payload["text"]), len(text))
+        self.assertEqual([e.ts for e in events], [1.0, 2.0])
+
+    def test_append_in_other_format_is_refused(self) -> None:
+        with tempfile.TemporaryDirectory() as td:
+            jsonl = Path(td) / "events.jsonl"
+            binary = Path(td) / "events.acpj"
+            with JsonlJournal(path=jsonl) as journal:
+                journal.write(Event(ts=1.0, kind="x", payload={}))
+            with JsonlJournal(path=binary, format="binary") as journal:
+                journal.write(Event(ts=1.0, kind="x", payload={}))
+
+            with self.assertRaisesRegex(ValueError, "is a jsonl journal"):
+                JsonlJournal(path=jsonl, format="binary").open()
+            with self.assertRaisesRegex(ValueError, "is a binary journal"):
+                JsonlJournal(path=binary).open()
+            self.assertEqual(journal_format(jsonl), "jsonl")
+            self.assertEqual(journal_format(binary), "binary")
+
+    def test_unsupported_version_is_reported(self) -> None:
+        with tempfile.TemporaryDirectory() as td:
+            p = Path(td) / "events.acpj"
+            p.write_bytes(MAGIC[:-1] + b"\x01" + b"\x01R")
+
+            with self.assertRaisesRegex(ValueError, "unsupported binary journal version 1"):
+                list(iter_events(p))
+
+    def test_convert_both_ways_is_lossless(self) -> None:
+        with tempfile.TemporaryDirectory() as td:
+            src = Path(td) / "events.jsonl"
+            with JsonlJournal(path=src) as journal:
+                for e in _events():
+                    journal.write(e)
+            binary = Path(td) / "events.acpj"
+            back = Path(td) / "back.jsonl"
+
+            self.assertEqual(convert_journal(src, binary, to="binary"), 4)
+            self.assertEqual(convert_journal(binary, back, to="jsonl"), 4)
+
+            original = [json.loads(line) for line in src.read_text(encoding="utf-8").splitlines()]
+            restored = [json.loads(line) for line in back.read_text(encoding="utf-8").splitlines()]
+            self.assertEqual(restored, original)
+            self.assertLess(binary.stat().st_size, src.stat().st_size)
+
+    def test_rotated_binary_segments(self) -> None:
+        with tempfile.TemporaryDirectory() as td:
+            p = Path(td) / "events.acpj"
+            with JsonlJournal(path=p, format="binary", rotate_interval=0.0) as journal:
+                for e in _events():
+                    journal.write(e)
+
+            self.assertEqual([e.ts for e in iter_events(p)], [e.ts for e in _events()])
+            self.assertEqual([e.ts for e in iter_events(p, agent_id="a")], [2.0, 4.0])
+
+    def test_cli_convert(self) -> None:
+        with tempfile.TemporaryDirectory() as td:
+            src = Path(td) / "events.jsonl"
+            with JsonlJournal(path=src) as journal:
+                journal.write(Event(ts=1.0, kind="x", payload={}))
+            dst = Path(td) / "out.acpj"
+            out = io.StringIO()
+            with contextlib.redirect_stdout(out):
+                code = main(["journal", "convert", str(src), str(dst)])
+
+            self.assertEqual(code, 0)
+            self.assertIn("(jsonl) ->", out.getvalue())
+            self.assertEqual(journal_format(dst), "binary")
+            self.assertEqual(main(["journal", "convert", str(Path(td) / "nope"), str(dst)]), 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,169 @@
+"""Tests for the journal sidecar index."""
+
+from __future__ import annotations
+
+import json
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "src"))
+
+from acp_hub.events import Event, agent_jsonrpc, tool_result
+from acp_hub.journal import JsonlJournal, iter_events
+from acp_hub.journal_index import JournalIndex, index_path
+
+
+def _write_run(journal: JsonlJournal, n: int = 200) -> None:
+    for i in range(n):
+        agent = "codex" if i % 3 else "claude"
+        if i % 10 == 0:
+            journal.write(
+                tool_result(
+                    ts=float(i),
+                    agent_id=agent,
+                    tool_name="shell",
+                    ok=True,
+                    result={},
+                    correlation_id=f"c{i}",
+                )
+            )
+        else:
+            journal.write(
+                Event(ts=float(i), kind="agent.stdout", payload={"text": "é"}, agent_id=agent)
+            )
+
+
+class TestJournalIndex(unittest.TestCase):
+    def test_sidecar_offsets_point_at_lines(self) -> None:
+        with tempfile.TemporaryDirectory() as td:
+            p = Path(td) / "events.jsonl"
+            with JsonlJournal(path=p) as journal:
+                _write_run(journal, 20)
+                journal.write(
+                    agent_jsonrpc(ts=99.0, agent_id="a", message={"x": "ü"}, raw='{"x": "ü"}')
+                )
+
+            data = p.read_bytes()
+            records = index_path(p).read_text(encoding="utf-8").splitlines()[1:]
+            self.assertEqual(len(records), 21)
+            for rec in records:
+                offset, length, ts, kind, _agent, _corr = json.loads(rec)
+                line = data[offset : offset + length]
+                self.assertTrue(line.endswith(b"\n"))
+                self.assertEqual((json.loads(line)["ts"], json.loads(line)["kind"]), (ts, kind))
+
+    def test_lookup_matches_linear_scan(self) -> None:
+        with tempfile.TemporaryDirectory() as td:
+            p = Path(td) / "events.jsonl"
+            journal = JsonlJournal(path=p, background=True)
+            journal.open()
+            _write_run(journal)
+
+            corr = list(journal.lookup(correlation_id="c40"))
+            codex_after = [e.ts for e in journal.lookup(since_ts=150.0, agent_id="codex")]
+            results = [e.ts for e in journal.lookup(kind="tool.result", agent_id="claude")]
+            missing = list(journal.lookup(kind="no.such.kind"))
+            journal.close()
+
+            expected_after = [e.ts for e in iter_events(p, since_ts=150.0, agent_id="codex")]
+            expected_results = [
+                e.ts for e in iter_events(p, kinds=["tool.result"], agent_id="claude")
+            ]
+
+        self.assertEqual([(e.kind, e.ts) for e in corr], [("tool.result", 40.0)])
+        self.assertEqual(codex_after, expected_after)
+        self.assertEqual(results, expected_results)
+        self.assertTrue(results)
+        self.assertEqual(missing, [])
+
+    def test_missing_sidecar_is_indexed_in_memory(self) -> None:
+        with tempfile.TemporaryDirectory() as td:
+            p = Path(td) / "events.jsonl"
+            with JsonlJournal(path=p) as journal:
+                _write_run(journal, 50)
+            index_path(p).unlink()
+
+            index = JournalIndex.open(p)
+
+            self.assertFalse(index_path(p).exists())
+            self.assertEqual(index.count, 50)
+            self.assertEqual([e.ts for e in index.find(correlation_id="c20")], [20.0])
+
+    def test_stale_sidecar_catches_up_or_rebuilds(self) -> None:
+        with tempfile.TemporaryDirectory() as td:
+            p = Path(td) / "events.jsonl"
+            with JsonlJournal(path=p) as journal:
+                _write_run(journal, 10)
+            index = JournalIndex.open(p)
+
+            # Appended behind the index's back.
+            with p.open("a", encoding="utf-8") as fh:
+                fh.write(json.dumps(Event(ts=500.0, kind="late", payload={}).to_dict()) + "\n")
+            index.refresh()
+            self.assertEqual([e.ts for e in index.find(kind="late")], [500.0])
+            self.assertEqual([e.ts for e in JournalIndex.open(p).find(kind="late")], [500.0])
+
+            # Replaced with a shorter file.
+            p.write_text(json.dumps(Event(ts=1.0, kind="fresh", payload={}).to_dict()) + "\n")
+            index.refresh()
+            self.assertEqual([e.kind for e in index.find()], ["fresh"])
+            self.assertEqual(list(index.find(kind="late")), [])
+
+    def test_reopen_appends_with_correct_offsets(self) -> None:
+        with tempfile.TemporaryDirectory() as td:
+            p = Path(td) / "events.jsonl"
+            with JsonlJournal(path=p) as journal:
+                _write_run(journal, 5)
+            with JsonlJournal(path=p) as journal:
+                journal.write(Event(ts=7.5, kind="second.run", payload={"text": "ñ"}))
+                found = list(journal.lookup(kind="second.run"))
+
+        self.assertEqual([e.ts for e in found], [7.5])
+
+    def test_open_leaves_missing_sidecar_to_lookup(self) -> None:
+        """Reopening a journal does not index it; lookup() does, without writing the sidecar."""
+        with tempfile.TemporaryDirectory() as td:
+            p = Path(td) / "events.jsonl"
+            with JsonlJournal(path=p) as journal:
+                _write_run(journal, 50)
+            index_path(p).unlink()
+
+            with JsonlJournal(path=p) as journal:
+                journal.write(Event(ts=60.0, kind="second.run", payload={}))
+                journal.flush()
+                built_on_open = index_path(p).exists()
+                found = [e.ts for e in journal.lookup(since_ts=49.0)]
+            written = index_path(p).exists()
+
+        self.assertFalse(built_on_open)
+        self.assertEqual(found, [49.0, 60.0])
+        self.assertFalse(written)
+
+    def test_refresh_while_writer_appends_leaves_sidecar_to_writer(self) -> None:
+        with tempfile.TemporaryDirectory() as td:
+            p = Path(td) / "events.jsonl"
+            journal = JsonlJournal(path=p, background=True, flush_interval=0.001)
+            journal.open()
+            index = JournalIndex.open(p)
+            for i in range(2000):
+                journal.write(Event(ts=float(i), kind="agent.stdout", payload={"i": i}))
+                if i % 50 == 0:
+                    index.refresh()
+            journal.close()
+            index.refresh()
+
+            records = index_path(p).read_text(encoding="utf-8").splitlines()[1:]
+            offsets = [json.loads(rec)[0] for rec in records]
+            reopened = JournalIndex.open(p)
+
+        self.assertEqual(len(offsets), 2000)
+        self.assertEqual(offsets, sorted(set(offsets)))
+        self.assertEqual(index.count, 2000)
+        self.assertEqual(reopened.count, 2000)
+        self.assertEqual(index.kinds["agent.stdout"], offsets)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,155 @@
+"""Tests for journal queries."""
+
+from __future__ import annotations
+
+import contextlib
+import io
+import json
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+from typing import Any
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "src"))
+
+from acp_hub.cli import main
+from acp_hub.events import Event, agent_jsonrpc, tool_invocation, tool_result
+from acp_hub.journal import JsonlJournal, iter_events
+from acp_hub.journal_query import QueryFilter, query_journal
+
+
+def _write(journal: JsonlJournal, n: int = 400) -> None:
+    for i in range(n):
+        agent = "codex" if i % 2 else "claude"
+        if i % 20 == 0:
+            corr = f"c{i}"
+            journal.write(
+                tool_invocation(
+                    ts=float(i), agent_id=agent, tool_name="shell", args={}, correlation_id=corr
+                )
+            )
+            journal.write(
+                tool_result(
+                    ts=i + 0.01 * (i // 20 + 1),
+                    agent_id=agent,
+                    tool_name="shell",
+                    ok=True,
+                    result={},
+                    correlation_id=corr,
+                )
+            )
+        else:
+            payload = {"text": f"out {i} ü"}
+            journal.write(Event(ts=float(i), kind="agent.stdout", payload=payload, agent_id=agent))
+
+
+class TestJournalQuery(unittest.TestCase):
+    def test_parallel_ranges_match_sequential_scan(self) -> None:
+        with tempfile.TemporaryDirectory() as td:
+            p = Path(td) / "events.jsonl"
+            with JsonlJournal(path=p) as journal:
+                _write(journal)
+            flt = QueryFilter(agent_id="codex", since_ts=100.0, until_ts=300.0)
+
+            # Tiny ranges so that many of them start mid-line.
+            lines = list(query_journal(p, flt, jobs=4, chunk_bytes=997))
+            inline = list(query_journal(p, flt, jobs=1, chunk_bytes=997))
+            expected = [
+                e.ts for e in iter_events(p, agent_id="codex", since_ts=100.0) if e.ts < 300.0
+            ]
+
+        self.assertEqual(lines, inline)
+        self.assertEqual([json.loads(line)["ts"] for line in lines], expected)
+
+    def test_filters(self) -> None:
+        with tempfile.TemporaryDirectory() as td:
+            p = Path(td) / "events.jsonl"
+            with JsonlJournal(path=p, rotate_bytes=8192) as journal:
+                _write(journal)
+
+            def ts(**kw: Any) -> list[float]:
+                return [json.loads(x)["ts"] for x in query_journal(p, QueryFilter(**kw), jobs=1)]
+
+            invocations = frozenset({"tool.invocation"})
+            self.assertEqual(ts(correlation_id="c40", kinds=invocations), [40.0])
+            self.assertEqual(ts(contains="out 7 ü"), [7.0])
+            self.assertEqual(ts(contains="out 7 ü", agent_id="claude"), [])
+
+    def test_contains_matches_escaped_raw_line(self) -> None:
+        with tempfile.TemporaryDirectory() as td:
+            p = Path(td) / "events.jsonl"
+            with JsonlJournal(path=p) as journal:
+                journal.write(
+                    agent_jsonrpc(
+                        ts=1.0,
+                        agent_id="a",
+                        message={"method": "A/b"},
+                        raw='{"method": "\\u0041\\/b"}',
+                    )
+                )
+            self.assertNotIn(b"A/b", p.read_bytes())
+
+            found = list(query_journal(p, QueryFilter(contains="A/b"), jobs=1))
+
+        self.assertEqual([json.loads(line)["ts"] for line in found], [1.0])
+
+    def test_aggregates(self) -> None:
+        with tempfile.TemporaryDirectory() as td:
+            p = Path(td) / "events.jsonl"
+            with JsonlJournal(path=p) as journal:
+                _write(journal, 200)
+
+            def aggregate(name: str, **kw: Any) -> list[Any]:
+                return list(query_journal(p, QueryFilter(), aggregate=name, **kw))
+
+            counts = {r["kind"]: r["count"] for r in aggregate("counts")}
+            latency = aggregate("latency", jobs=2, chunk_bytes=512)
+            per_agent = {r["agent_id"]: r["bytes"] for r in aggregate("bytes")}
+            size = p.stat().st_size
+
+        self.assertEqual(counts, {"agent.stdout": 190, "tool.invocation": 10, "tool.result": 10})
+        self.assertEqual(latency[0]["tool"], "shell")
+        self.assertEqual(latency[0]["count"], 10)
+        self.assertAlmostEqual(latency[0]["p50_ms"], 50.0, places=3)
+        self.assertAlmostEqual(latency[0]["p95_ms"], 100.0, places=3)
+        self.assertEqual(sum(per_agent.values()), size)
+
+    def test_cli_query(self) -> None:
+        with tempfile.TemporaryDirectory() as td:
+            p = Path(td) / "events.jsonl"
+            with JsonlJournal(path=p) as journal:
+                _write(journal, 50)
+
+            out = io.StringIO()
+            with contextlib.redirect_stdout(out):
+                code = main(
+                    ["journal", "query", str(p), "--kind", "tool.result", "--format", "table"]
+                )
+            self.assertEqual(code, 0)
+            table = out.getvalue().splitlines()
+            self.assertEqual(table[0].split(), ["time", "kind", "agent", "payload"])
+            self.assertEqual(len(table), 4)
+
+            out = io.StringIO()
+            with contextlib.redirect_stdout(out):
+                main(["journal", "query", str(p), "--limit", "2", "--since", "10"])
+            first = [json.loads(x)["ts"] for x in out.getvalue().splitlines()]
+            self.assertEqual(first, [10.0, 11.0])
+
+            out = io.StringIO()
+            with contextlib.redirect_stdout(out):
+                main(["journal", "query", str(p), "--aggregate", "counts"])
+            self.assertIn('{"kind": "agent.stdout", "count": 47}', out.getvalue())
+
+            # Bad arguments are usage errors, reported by argparse with exit status 2.
+            for bad in (["--since", "yesterday"], ["--aggregate", "sum"]):
+                err = io.StringIO()
+                with contextlib.redirect_stderr(err), self.assertRaises(SystemExit) as exit_:
+                    main(["journal", "query", str(p), *bad])
+                self.assertEqual(exit_.exception.code, 2)
+                self.assertIn(bad[0], err.getvalue())
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,150 @@
+"""Tests for journal segment rotation and compression."""
+
+from __future__ import annotations
+
+import json
+import os
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+from unittest import mock
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "src"))
+
+from acp_hub.events import Event, tool_result
+from acp_hub.journal import JsonlJournal, iter_events
+from acp_hub.journal_segments import (
+    Segment,
+    cold_segments,
+    compress_segment,
+    manifest_path,
+    read_manifest,
+    rotate,
+    segment_name,
+    write_manifest,
+)
+
+
+def _event(i: int) -> Event:
+    if i % 25 == 0:
+        return tool_result(
+            ts=float(i), agent_id="a", tool_name="t", ok=True, result={}, correlation_id=f"c{i}"
+        )
+    agent = "a" if i % 2 else "b"
+    return Event(ts=float(i), kind="agent.stdout", payload={"text": "x" * 50}, agent_id=agent)
+
+
+class TestJournalSegments(unittest.TestCase):
+    def test_size_rotation_compresses_and_reads_across_segments(self) -> None:
+        with tempfile.TemporaryDirectory() as td:
+            p = Path(td) / "events.jsonl"
+            # Rotation happens between commits, so keep batches small.
+            journal = JsonlJournal(path=p, rotate_bytes=4096, flush_bytes=1024, background=True)
+            journal.open()
+            for i in range(300):
+                journal.write(_event(i))
+            journal.close()
+
+            segments = read_manifest(p)
+            self.assertGreater(len(segments), 3)
+            for seg in segments:
+                self.assertEqual(seg.compression, "gzip")
+                self.assertTrue((Path(td) / (seg.name + ".gz")).exists())
+                self.assertFalse((Path(td) / seg.name).exists())
+            hot_lines = len(p.read_text().splitlines())
+            self.assertEqual(sum(s.events or 0 for s in segments) + hot_lines, 300)
+
+            self.assertEqual([e.ts for e in journal.read_all()], [float(i) for i in range(300)])
+            self.assertEqual(
+                [e.ts for e in iter_events(p, kinds=["tool.result"])],
+                [float(i) for i in range(0, 300, 25)],
+            )
+            with JsonlJournal(path=p) as reopened:
+                found = list(reopened.lookup(correlation_id="c50"))
+                after = [e.ts for e in reopened.lookup(since_ts=290.0, agent_id="a")]
+            self.assertEqual([e.ts for e in found], [50.0])
+            self.assertEqual(after, [291.0, 293.0, 295.0, 297.0, 299.0])
+
+    def test_interval_rotation_with_lzma(self) -> None:
+        with tempfile.TemporaryDirectory() as td:
+            p = Path(td) / "events.jsonl"
+            with JsonlJournal(path=p, rotate_interval=0.0, compression="lzma") as journal:
+                for i in range(3):
+                    journal.write(_event(i))
+
+            segments = read_manifest(p)
+            self.assertEqual([s.events for s in segments], [1, 1, 1])
+            self.assertTrue((Path(td) / (segments[0].name + ".xz")).exists())
+            self.assertEqual([e.ts for e in iter_events(p)], [0.0, 1.0, 2.0])
+
+    def test_manifest_summary_prunes_segments(self) -> None:
+        with tempfile.TemporaryDirectory() as td:
+            p = Path(td) / "events.jsonl"
+            with JsonlJournal(path=p, rotate_bytes=2048) as journal:
+                for i in range(100):
+                    journal.write(_event(i))
+
+            segments = read_manifest(p)
+            late = cold_segments(p, since_ts=segments[-1].first_ts)
+            self.assertEqual([s.name for s in late], [segments[-1].name])
+            self.assertEqual(cold_segments(p, kinds=["no.such.kind"]), [])
+            self.assertEqual(segments[0].first_ts, 0.0)
+            self.assertEqual(segments[0].kinds, ["agent.stdout", "tool.result"])
+
+    def test_unfinished_compression_resumes_on_open(self) -> None:
+        with tempfile.TemporaryDirectory() as td:
+            p = Path(td) / "events.jsonl"
+            with JsonlJournal(path=p) as journal:
+                journal.write(_event(1))
+            seg = rotate(p)  # as if the hub died before compressing
+            self.assertIsNone(read_manifest(p)[0].events)
+            self.assertEqual([e.ts for e in iter_events(p)], [1.0])
+
+            with JsonlJournal(path=p) as journal:
+                journal.write(_event(2))
+
+            self.assertEqual(read_manifest(p)[0].events, 1)
+            self.assertFalse((Path(td) / seg.name).exists())
+            self.assertEqual([e.ts for e in iter_events(p)], [1.0, 2.0])
+
+    def test_compress_segment_is_idempotent(self) -> None:
+        with tempfile.TemporaryDirectory() as td:
+            p = Path(td) / "events.jsonl"
+            with JsonlJournal(path=p) as journal:
+                journal.write(_event(1))
+            seg = rotate(p)
+            compress_segment(p, seg.name, "gzip")
+            compress_segment(p, seg.name, "gzip")
+            self.assertTrue(manifest_path(p).exists())
+            self.assertEqual([e.ts for e in iter_events(p)], [1.0])
+
+    def test_rotation_by_another_process_during_read(self) -> None:
+        """A rotation between the manifest read and opening the hot file loses nothing."""
+        with tempfile.TemporaryDirectory() as td:
+            p = Path(td) / "events.jsonl"
+            with JsonlJournal(path=p) as journal:
+                journal.write(_event(1))
+            real_read = read_manifest
+            rotated = False
+
+            def read_then_rotate(path: Path) -> list[Segment]:
+                nonlocal rotated
+                segments = real_read(path)
+                if not rotated:
+                    # What another process's writer does, without our manifest lock.
+                    rotated = True
+                    name = segment_name(p, 1)
+                    os.replace(p, p.with_name(name))
+                    write_manifest(p, [Segment(name=name)])
+                    p.write_text(json.dumps(_event(2).to_dict()) + "\n", encoding="utf-8")
+                return segments
+
+            with mock.patch("acp_hub.journal_segments.read_manifest", read_then_rotate):
+                seen = [e.ts for e in iter_events(p)]
+
+        self.assertEqual(seen, [1.0, 2.0])
+
+
+if __name__ == "__main__":
+    unittest.main()
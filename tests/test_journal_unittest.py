@@ -5,13 +5,16 @@ import asyncio
 import json
 import sys
 import tempfile
+import threading
 import unittest
 from pathlib import Path
+from unittest import mock
 
 sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "src"))
 
-from acp_hub.events import Event
-from acp_hub.journal import JsonlJournal, journal_sink
+from acp_hub.codec import DEFAULT_CODEC
+from acp_hub.events import Event, agent_jsonrpc
+from acp_hub.journal import JsonlJournal, encode_event, iter_events, journal_sink
 
 
 class TestJournal(unittest.TestCase):
@@ -79,6 +82,273 @@ class TestJournal(unittest.TestCase):
             self.assertEqual(len(events), 1)
             self.assertEqual(events[0].payload["k"], "v")
 
+    def test_jsonrpc_raw_passthrough(self) -> None:
+        """agent.jsonrpc events are journaled with the agent's original text."""
+        raw = '{"id":7,  "method":"tools/call","params":{"b":1,"a":"\\u00e9"}}'
+        msg = json.loads(raw)
+        e = agent_jsonrpc(ts=1.0, agent_id="a1", message=msg, raw=raw)
+
+        line = encode_event(e)
+        self.assertIn(raw, line)
+        self.assertEqual(json.loads(line), json.loads(json.dumps(e.to_dict())))
+
+        with tempfile.TemporaryDirectory() as td:
+            journal = JsonlJournal(path=Path(td) / "events.jsonl")
+            journal.write(e)
+            journal.close()
+            events = journal.read_all()
+
+        self.assertEqual(events[0].payload["message"], msg)
+        self.assertEqual(events[0].agent_id, "a1")
+
+    def test_encode_without_raw_matches_json_dumps(self) -> None:
+        e = agent_jsonrpc(ts=1.0, agent_id="a1", message={"method": "x"})
+        self.assertEqual(encode_event(e), json.dumps(e.to_dict(), sort_keys=True))
+
+    def test_group_commit_batches_until_interval(self) -> None:
+        """Inside an event loop, lines are committed together after flush_interval."""
+        with tempfile.TemporaryDirectory() as td:
+            p = Path(td) / "events.jsonl"
+            journal = JsonlJournal(path=p, flush_interval=0.02)
+
+            async def run() -> tuple[int, int]:
+                for i in range(5):
+                    journal.write(Event(ts=float(i), kind="agent.stdout", payload={}))
+                before = len(p.read_text(encoding="utf-8").splitlines())
+                await asyncio.sleep(0.05)
+                after = len(p.read_text(encoding="utf-8").splitlines())
+                return before, after
+
+            before, after = asyncio.run(run())
+            journal.close()
+
+        self.assertEqual(before, 0)
+        self.assertEqual(after, 5)
+
+    def test_commit_points_and_byte_threshold(self) -> None:
+        """agent.exited/hub.stopped and the byte threshold commit immediately."""
+        with tempfile.TemporaryDirectory() as td:
+            p = Path(td) / "events.jsonl"
+            journal = JsonlJournal(path=p, flush_interval=60.0, flush_bytes=1 << 20)
+
+            def lines() -> int:
+                return len(p.read_text(encoding="utf-8").splitlines())
+
+            async def run() -> list[int]:
+                seen = []
+                journal.write(Event(ts=1.0, kind="agent.stdout", payload={}))
+                seen.append(lines())
+                journal.write(Event(ts=2.0, kind="agent.exited", payload={}, agent_id="a"))
+                seen.append(lines())
+                journal.flush_bytes = 10
+                journal.write(Event(ts=3.0, kind="agent.stdout", payload={"text": "x" * 20}))
+                seen.append(lines())
+                return seen
+
+            seen = asyncio.run(run())
+            journal.close()
+
+        self.assertEqual(seen, [0, 2, 3])
+
+    def test_fsync_durability(self) -> None:
+        with tempfile.TemporaryDirectory() as td:
+            p = Path(td) / "events.jsonl"
+            with JsonlJournal(path=p, durability="fsync-per-batch") as j:
+                j.write(Event(ts=1.0, kind="x", payload={}))
+            self.assertEqual(len(JsonlJournal(path=p).read_all()), 1)
+
+    def test_unknown_durability_rejected(self) -> None:
+        with self.assertRaises(ValueError):
+            JsonlJournal(path=Path("unused.jsonl"), durability="eventually")
+
+    def test_background_writer_drains_on_close(self) -> None:
+        with tempfile.TemporaryDirectory() as td:
+            p = Path(td) / "events.jsonl"
+            journal = JsonlJournal(path=p, background=True, queue_size=64)
+            journal.open()
+            for i in range(1000):
+                journal.write(Event(ts=float(i), kind="agent.stdout", payload={"n": i}))
+            journal.close()
+
+            events = journal.read_all()
+
+        self.assertEqual([e.payload["n"] for e in events], list(range(1000)))
+
+    def test_background_writer_drops_unencodable_event(self) -> None:
+        with tempfile.TemporaryDirectory() as td:
+            p = Path(td) / "events.jsonl"
+            journal = JsonlJournal(path=p, background=True)
+            journal.write(Event(ts=1.0, kind="x", payload={}))
+            with self.assertLogs("acp_hub.journal", "ERROR"):
+                journal.write(Event(ts=2.0, kind="x", payload={"bad": object()}))
+                journal.flush()
+            journal.write(Event(ts=3.0, kind="x", payload={}))
+            journal.close()
+            events = journal.read_all()
+
+        self.assertEqual([e.ts for e in events], [1.0, 3.0])
+
+    def test_background_writer_failure_is_raised(self) -> None:
+        """A dead writer fails later calls instead of leaving them blocked on the queue."""
+        with tempfile.TemporaryDirectory() as td:
+            p = Path(td) / "events.jsonl"
+            journal = JsonlJournal(path=p, background=True, queue_size=1)
+            journal.open()
+            with (
+                mock.patch.object(journal, "_commit", side_effect=OSError("disk full")),
+                self.assertLogs("acp_hub.journal", "ERROR"),
+            ):
+                journal.write(Event(ts=1.0, kind="x", payload={}))
+                with self.assertRaises(OSError):
+                    journal.flush()
+            with self.assertRaises(OSError):
+                for i in range(3):
+                    journal.write(Event(ts=float(i), kind="x", payload={}))
+            with self.assertRaises(OSError):
+                journal.close()
+
+        self.assertIsNone(journal._fh)
+
+    def test_background_flush_is_synchronous(self) -> None:
+        with tempfile.TemporaryDirectory() as td:
+            p = Path(td) / "events.jsonl"
+            journal = JsonlJournal(path=p, background=True, flush_interval=60.0)
+            journal.write(Event(ts=1.0, kind="agent.stdout", payload={}))
+            journal.flush()
+            lines = p.read_text(encoding="utf-8").splitlines()
+            journal.close()
+
+        self.assertEqual(len(lines), 1)
+
+    def test_background_flush_without_wait_does_not_block(self) -> None:
+        """flush(wait=False) only queues a commit; the atexit hook is registered once."""
+        with tempfile.TemporaryDirectory() as td:
+            p = Path(td) / "events.jsonl"
+            journal = JsonlJournal(path=p, background=True, flush_interval=60.0)
+            with mock.patch("acp_hub.journal.atexit") as fake_atexit:
+                journal.open()
+                journal.open()
+                gate = threading.Event()
+                assert journal._queue is not None
+                journal._queue.put(_Stall(gate))
+                journal.write(Event(ts=1.0, kind="agent.stdout", payload={}))
+                journal.flush(wait=False)  # returns although the writer is stalled
+                gate.set()
+                journal.close()
+            lines = p.read_text(encoding="utf-8").splitlines()
+
+        self.assertEqual(fake_atexit.register.call_count, 1)
+        self.assertEqual(fake_atexit.unregister.call_count, 1)
+        self.assertEqual(len(lines), 1)
+
+    def test_background_full_queue_overflow(self) -> None:
+        """try_write refuses when the queue is full; journal_sink still gets it written."""
+        with tempfile.TemporaryDirectory() as td:
+            p = Path(td) / "events.jsonl"
+            journal = JsonlJournal(path=p, background=True, queue_size=1, flush_interval=60.0)
+            journal.open()
+            gate = threading.Event()
+            assert journal._queue is not None
+            journal._queue.put(_Stall(gate))  # writer thread sleeps on the gate
+            journal._queue.put(Event(ts=0.0, kind="x", payload={}))  # queue now full
+
+            refused = not journal.try_write(Event(ts=1.0, kind="x", payload={}))
+
+            async def run() -> None:
+                pending = asyncio.ensure_future(
+                    journal_sink(journal)(Event(ts=2.0, kind="x", payload={}))
+                )
+                await asyncio.sleep(0.01)
+                self.assertFalse(pending.done())
+                gate.set()
+                await pending
+
+            asyncio.run(run())
+            journal.close()
+            events = journal.read_all()
+
+        self.assertTrue(refused)
+        self.assertEqual([e.ts for e in events], [0.0, 2.0])
+
+    def test_iter_events_filters(self) -> None:
+        with tempfile.TemporaryDirectory() as td:
+            p = Path(td) / "events.jsonl"
+            with JsonlJournal(path=p) as journal:
+                for i in range(10):
+                    journal.write(
+                        Event(
+                            ts=float(i),
+                            kind="agent.stdout" if i % 2 else "agent.stderr",
+                            payload={"kind": "agent.stdout", "ts": 99.0},
+                            agent_id="a" if i < 5 else "b",
+                        )
+                    )
+
+            since = [e.ts for e in iter_events(p, since_ts=7.0)]
+            by_kind = [e.ts for e in iter_events(p, kinds=["agent.stdout"])]
+            by_agent = [e.ts for e in iter_events(p, agent_id="b", kinds={"agent.stderr"})]
+
+        self.assertEqual(since, [7.0, 8.0, 9.0])
+        self.assertEqual(by_kind, [1.0, 3.0, 5.0, 7.0, 9.0])
+        self.assertEqual(by_agent, [6.0, 8.0])
+
+    def test_iter_events_skips_lines_before_decoding(self) -> None:
+        with tempfile.TemporaryDirectory() as td:
+            p = Path(td) / "events.jsonl"
+            with JsonlJournal(path=p) as journal:
+                for i in range(100):
+                    journal.write(Event(ts=float(i), kind="agent.stdout", payload={}))
+                journal.write(Event(ts=100.0, kind="hub.stopped", payload={}))
+
+            codec = mock.Mock(wraps=DEFAULT_CODEC)
+            events = list(iter_events(p, kinds=["hub.stopped"], codec=codec))
+            self.assertEqual(codec.loads.call_count, 1)
+            codec.loads.reset_mock()
+            self.assertEqual(len(list(iter_events(p, since_ts=95.0, codec=codec))), 6)
+            self.assertEqual(codec.loads.call_count, 6)
+
+        self.assertEqual([e.kind for e in events], ["hub.stopped"])
+
+    def test_reads_use_the_journal_codec(self) -> None:
+        with tempfile.TemporaryDirectory() as td:
+            codec = mock.Mock(wraps=DEFAULT_CODEC)
+            with JsonlJournal(path=Path(td) / "events.jsonl", codec=codec) as journal:
+                journal.write(Event(ts=1.0, kind="x", payload={}))
+                self.assertEqual(len(journal.read_all()), 1)
+                self.assertEqual(codec.loads.call_count, 1)
+                self.assertEqual(len(list(journal.lookup(kind="x"))), 1)
+                self.assertGreater(codec.loads.call_count, 1)
+
+    def test_iter_events_truncated_final_line(self) -> None:
+        with tempfile.TemporaryDirectory() as td:
+            p = Path(td) / "events.jsonl"
+            with JsonlJournal(path=p) as journal:
+                journal.write(Event(ts=1.0, kind="x", payload={}))
+            with p.open("a", encoding="utf-8") as fh:
+                fh.write('\n{"kind": "x", "payload": {"te')
+
+            self.assertEqual([e.ts for e in iter_events(p)], [1.0])
+
+            p.write_text('{"kind": "x"\n{"kind": "y"}\n', encoding="utf-8")
+            with self.assertRaises(ValueError):
+                list(iter_events(p))
+
+    def test_iter_events_missing_file(self) -> None:
+        with tempfile.TemporaryDirectory() as td:
+            self.assertEqual(list(iter_events(Path(td) / "nope.jsonl")), [])
+
+
+class _Stall(threading.Event):
+    """Writer-thread control item that blocks the writer until *gate* is set."""
+
+    def __init__(self, gate: threading.Event) -> None:
+        super().__init__()
+        self._gate = gate
+
+    def set(self) -> None:
+        self._gate.wait()
+        super().set()
+
 
 if __name__ == "__main__":
     unittest.main()
@@ -0,0 +1,179 @@
+"""Tests for rlimits and process groups on shell tools and agents."""
+
+from __future__ import annotations
+
+import asyncio
+import os
+import signal
+import sys
+import tempfile
+import time
+import unittest
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "src"))
+
+from acp_hub.bus import EventBus
+from acp_hub.config import AgentSpec
+from acp_hub.events import Event
+from acp_hub.limits import NO_LIMITS, ResourceLimits
+from acp_hub.proc import ManagedAgentProcess
+from acp_hub.tools.runner import ToolRunner
+from acp_hub.tools.shell import ShellTool
+
+
+def _alive(pid: int, wait: float = 2.0) -> bool:
+    """Still running after *wait* seconds (gone or a zombie counts as dead)."""
+    deadline = time.monotonic() + wait
+    while True:
+        try:
+            stat = Path(f"/proc/{pid}/stat").read_text()
+        except OSError:
+            return False
+        if stat[stat.rfind(")") + 2] in "ZX":
+            return False
+        if time.monotonic() > deadline:
+            return True
+        time.sleep(0.05)
+
+
+def _run(argv: list[str], limits: ResourceLimits, timeout: float = 10.0) -> dict:
+    return asyncio.run(ShellTool(timeout=timeout, limits=limits).run(argv))
+
+
+class TestResourceLimits(unittest.TestCase):
+    def test_merged_and_dict(self) -> None:
+        base = ResourceLimits(cpu_seconds=10, nice=5)
+        merged = base.merged(ResourceLimits(nice=10, open_files=64))
+        self.assertEqual(merged.to_dict(), {"cpu_seconds": 10, "open_files": 64, "nice": 10})
+        self.assertFalse(NO_LIMITS)
+        self.assertEqual(NO_LIMITS.wrap(["true"]), ["true"])
+
+    def test_hit_attributes_sigkill_by_cpu_used(self) -> None:
+        """SIGKILL is the hard CPU limit only when the child used its CPU allowance."""
+        limits = ResourceLimits(cpu_seconds=2)
+        self.assertEqual(limits.hit(-signal.SIGXCPU), "cpu_seconds")
+        self.assertIsNone(limits.hit(-signal.SIGKILL))
+        self.assertIsNone(limits.hit(-signal.SIGKILL, cpu_used=0.1))
+        self.assertEqual(limits.hit(-signal.SIGKILL, cpu_used=2.0), "cpu_seconds")
+
+    def test_missing_command_under_limits(self) -> None:
+        result = _run(["no-such-command-here"], ResourceLimits(open_files=64))
+        self.assertEqual(result["exit_code"], 127)
+        self.assertIn("no-such-command-here", result["stderr"])
+
+    def test_without_limits_result_is_unchanged(self) -> None:
+        result = _run(["sh", "-c", "echo hi"], NO_LIMITS)
+        self.assertEqual(result["exit_code"], 0)
+        self.assertNotIn("limit_hit", result)
+
+    def test_cpu_limit(self) -> None:
+        result = _run([sys.executable, "-c", "while True: pass"], ResourceLimits(cpu_seconds=1))
+        self.assertEqual(result["limit_hit"], "cpu_seconds")
+        self.assertEqual(result["signal"], "SIGXCPU")
+        self.assertEqual(result["limits"], {"cpu_seconds": 1})
+
+    def test_open_files_limit(self) -> None:
+        script = "fs = [open('/dev/null') for _ in range(100)]"
+        result = _run([sys.executable, "-c", script], ResourceLimits(open_files=16))
+        self.assertNotEqual(result["exit_code"], 0)
+        self.assertEqual(result["limit_hit"], "open_files")
+        self.assertIsNone(result["signal"])
+
+    def test_address_space_limit(self) -> None:
+        script = "b = bytearray(2 * 1024 ** 3)"
+        result = _run([sys.executable, "-c", script], ResourceLimits(address_space_mb=512))
+        self.assertEqual(result["limit_hit"], "address_space_mb")
+
+    def test_nice(self) -> None:
+        base = os.nice(0)
+        script = "import os; print(os.nice(0))"
+        result = _run([sys.executable, "-c", script], ResourceLimits(nice=5))
+        self.assertEqual(int(result["stdout"]), min(base + 5, 19))
+        self.assertIsNone(result["limit_hit"])
+
+    def test_timeout_kills_process_group(self) -> None:
+        """A background child holding the pipes dies with the command on timeout."""
+        with tempfile.TemporaryDirectory() as td:
+            pid_file = Path(td) / "pid"
+            started = time.monotonic()
+            result = _run(
+                ["sh", "-c", f"sleep 30 & echo $! > {pid_file}; wait"], NO_LIMITS, timeout=0.5
+            )
+            self.assertTrue(result["timed_out"])
+            self.assertLess(time.monotonic() - started, 5)
+            self.assertFalse(_alive(int(pid_file.read_text())))
+
+    def test_limit_hit_in_tool_result_event(self) -> None:
+        bus = EventBus()
+        events: list[Event] = []
+
+        async def handler(e: Event) -> None:
+            events.append(e)
+
+        bus.subscribe(handler, kind_prefix="tool.result")
+        with tempfile.TemporaryDirectory() as td:
+            runner = ToolRunner(bus, workspace_root=td, shell_allowlist=("python",))
+
+            async def run() -> None:
+                await runner.execute(
+                    "a",
+                    "shell/execute",
+                    {"command": ["python3", "-c", "while True: pass"]},
+                    "c1",
+                    sandbox=Path(td),
+                    limits=ResourceLimits(cpu_seconds=1),
+                )
+                await bus.drain()
+
+            asyncio.run(run())
+
+        (event,) = events
+        self.assertTrue(event.payload["ok"])
+        self.assertEqual(event.payload["result"]["limit_hit"], "cpu_seconds")
+
+
+class TestAgentProcessGroup(unittest.TestCase):
+    def test_terminate_kills_agent_tree(self) -> None:
+        """terminate() reaches processes the agent spawned, even if the agent ignores SIGTERM."""
+        script = (
+            "import signal, subprocess, sys, time\n"
+            "signal.signal(signal.SIGTERM, signal.SIG_IGN)\n"
+            "child = subprocess.Popen(['sleep', '30'])\n"
+            "print(child.pid, flush=True)\n"
+            "time.sleep(30)\n"
+        )
+        bus = EventBus()
+        pids: list[int] = []
+
+        async def handler(e: Event) -> None:
+            if e.kind == "agent.stdout":
+                pids.append(int(e.payload["text"]))
+
+        bus.subscribe(handler, per_line=True)
+        with tempfile.TemporaryDirectory() as td:
+            spec = AgentSpec(
+                id="tree",
+                agent="echo",
+                protocol="echo",
+                command=(sys.executable, "-c", script),
+                sandbox=Path(td),
+                limits=ResourceLimits(nice=1),
+            )
+            proc = ManagedAgentProcess(spec=spec, bus=bus, coalesce_window=0)
+
+            async def run() -> None:
+                await proc.start()
+                while not pids:
+                    await asyncio.sleep(0.05)
+                await proc.terminate(timeout=0.5)
+                await bus.aclose()
+
+            asyncio.run(run())
+
+        self.assertFalse(proc.running)
+        self.assertFalse(_alive(pids[0]))
+
+
+if __name__ == "__main__":
+    unittest.main()
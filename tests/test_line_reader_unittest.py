@@ -0,0 +1,109 @@
+"""Tests for the block-based line reader."""
+
+from __future__ import annotations
+
+import asyncio
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "src"))
+
+from acp_hub.line_reader import LineReader, SpilledLine, prune_spill_dir
+
+
+async def _read_all(reader: LineReader) -> list[str | SpilledLine]:
+    out: list[str | SpilledLine] = []
+    while (line := await reader.readline()) is not None:
+        out.append(line)
+    return out
+
+
+def _stream(*chunks: bytes) -> asyncio.StreamReader:
+    stream = asyncio.StreamReader()
+    for chunk in chunks:
+        stream.feed_data(chunk)
+    stream.feed_eof()
+    return stream
+
+
+class TestLineReader(unittest.TestCase):
+    def test_lines_across_block_boundaries(self) -> None:
+        lines = [f"line {i} " + "x" * (i % 37) for i in range(2000)]
+        data = ("\n".join(lines) + "\n").encode()
+
+        async def run() -> list[str | SpilledLine]:
+            # Odd block size so lines straddle blocks; feed in small uneven chunks too.
+            chunks = [data[i : i + 1000] for i in range(0, len(data), 1000)]
+            return await _read_all(LineReader(_stream(*chunks), block_size=313))
+
+        self.assertEqual(asyncio.run(run()), lines)
+
+    def test_long_line_beyond_streamreader_limit(self) -> None:
+        big = "{" + '"k":"' + "v" * 1_000_000 + '"}'
+
+        async def run() -> list[str | SpilledLine]:
+            return await _read_all(LineReader(_stream(f"a\n{big}\nb".encode())))
+
+        self.assertEqual(asyncio.run(run()), ["a", big, "b"])
+
+    def test_oversize_line_is_spilled(self) -> None:
+        big = b"z" * 50_000
+
+        async def run(spill_dir: Path | None) -> list[str | SpilledLine]:
+            stream = _stream(b"before\n", big[:20_000], big[20_000:] + b"\nafter\n")
+            reader = LineReader(stream, block_size=4096, max_line=10_000, spill_dir=spill_dir)
+            return await _read_all(reader)
+
+        with tempfile.TemporaryDirectory() as td:
+            before, spilled, after = asyncio.run(run(Path(td) / "spill"))
+            self.assertEqual((before, after), ("before", "after"))
+            assert isinstance(spilled, SpilledLine) and spilled.path is not None
+            self.assertEqual(spilled.nbytes, len(big))
+            self.assertEqual(spilled.path.read_bytes(), big)
+
+        _, dropped, _ = asyncio.run(run(None))
+        self.assertEqual(dropped, SpilledLine(path=None, nbytes=len(big)))
+
+    def test_spill_dir_is_capped(self) -> None:
+        """Once the spill files exceed the cap, the oldest go; the newest always stays."""
+        big = b"z" * 5_000
+
+        async def run(spill_dir: Path) -> list[str | SpilledLine]:
+            stream = _stream(*(big + b"\n" for _ in range(5)))
+            reader = LineReader(stream, max_line=1_000, spill_dir=spill_dir, spill_cap=12_000)
+            return await _read_all(reader)
+
+        with tempfile.TemporaryDirectory() as td:
+            spill_dir = Path(td) / "spill"
+            spilled = asyncio.run(run(spill_dir))
+            paths = [s.path for s in spilled if isinstance(s, SpilledLine)]
+            self.assertEqual(len(paths), 5)
+            self.assertEqual(sorted(spill_dir.iterdir()), sorted(p for p in paths[-2:] if p))
+
+            self.assertEqual(prune_spill_dir(spill_dir, 0, keep=paths[-1]), 1)
+            self.assertEqual(list(spill_dir.iterdir()), [paths[-1]])
+
+    def test_unterminated_final_line(self) -> None:
+        async def run() -> list[str | SpilledLine]:
+            return await _read_all(LineReader(_stream(b"one\ntw", b"o")))
+
+        self.assertEqual(asyncio.run(run()), ["one", "two"])
+
+    def test_cancelled_read_loses_nothing(self) -> None:
+        async def run() -> list[str | SpilledLine]:
+            stream = asyncio.StreamReader()
+            reader = LineReader(stream)
+            stream.feed_data(b"par")
+            with self.assertRaises(asyncio.TimeoutError):
+                await asyncio.wait_for(reader.readline(), timeout=0.01)
+            stream.feed_data(b"tial\nnext\n")
+            stream.feed_eof()
+            return await _read_all(reader)
+
+        self.assertEqual(asyncio.run(run()), ["partial", "next"])
+
+
+if __name__ == "__main__":
+    unittest.main()
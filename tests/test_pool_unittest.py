@@ -0,0 +1,225 @@
+"""Tests for AgentPool and pooled Hub.run_tasks — spawns real child processes."""
+
+from __future__ import annotations
+
+import asyncio
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "src"))
+
+from acp_hub.bus import EventBus
+from acp_hub.config import AgentSpec, HubConfig
+from acp_hub.hub import Hub
+from acp_hub.journal import iter_events
+from acp_hub.pool import AgentPool
+from acp_hub.proc import ManagedAgentProcess
+from acp_hub.protocols import get_adapter
+
+# Minimal ACP agent: slow to boot, answers every acp/sendMessage as the assistant.
+FAKE_AGENT = """
+import json, sys, time
+time.sleep(0.2)
+for line in sys.stdin:
+    msg = json.loads(line)
+    if msg.get("method") == "acp/sendMessage":
+        text = msg["params"]["message"]["content"]["text"]
+        reply = {"role": "assistant", "content": {"type": "text", "text": text.upper()}}
+        print(json.dumps({"jsonrpc": "2.0", "id": msg["id"], "result": {"message": reply}}),
+              flush=True)
+"""
+
+
+def _make_spec(id: str, sandbox: Path) -> AgentSpec:
+    return AgentSpec(
+        id=id,
+        agent="fake",
+        protocol="acp",
+        command=("python3", "-c", FAKE_AGENT),
+        sandbox=sandbox,
+    )
+
+
+def _starter(bus: EventBus, started: list[ManagedAgentProcess]):
+    async def start(spec: AgentSpec):
+        proc = ManagedAgentProcess(spec=spec, bus=bus)
+        adapter = get_adapter(spec.protocol)(proc)
+        await proc.start()
+        await adapter.initialize()
+        started.append(proc)
+        return proc, adapter
+
+    return start
+
+
+class TestAgentPool(unittest.TestCase):
+    def test_lease_reuses_warm_agent(self) -> None:
+        """After warm(), leases are hits and released agents are handed out again."""
+        bus = EventBus()
+        started: list[ManagedAgentProcess] = []
+
+        with tempfile.TemporaryDirectory() as td:
+            spec = _make_spec("a", Path(td))
+            pool = AgentPool(_starter(bus, started), size=1)
+
+            async def run() -> dict:
+                await pool.warm([spec])
+                first = await pool.lease(spec)
+                await pool.release(first)
+                second = await pool.lease(spec)
+                self.assertIs(second, first)
+                self.assertEqual(second.tasks, 1)
+                await pool.release(second)
+                stats = pool.stats()
+                await pool.close()
+                await bus.aclose()
+                return stats
+
+            stats = asyncio.run(run())
+
+        self.assertEqual(len(started), 1)
+        self.assertEqual(
+            stats["a"], {"idle": 1, "leased": 0, "hits": 2, "misses": 0, "recycled": 0}
+        )
+        self.assertFalse(started[0].running)
+
+    def test_released_agent_is_leased_again_with_same_process(self) -> None:
+        """A healthy agent released without retire is the next lease: same pid, no restart."""
+        bus = EventBus()
+        started: list[ManagedAgentProcess] = []
+
+        with tempfile.TemporaryDirectory() as td:
+            spec = _make_spec("a", Path(td))
+            pool = AgentPool(_starter(bus, started), size=1)
+
+            async def run() -> tuple[int | None, int | None, bool]:
+                first = await pool.lease(spec)
+                pid = first.process.pid
+                await pool.release(first)
+                second = await pool.lease(spec)
+                running = second.process.running
+                reused_pid = second.process.pid
+                await pool.release(second)
+                await pool.close()
+                await bus.aclose()
+                return pid, reused_pid, running
+
+            pid, reused_pid, running = asyncio.run(run())
+
+        self.assertIsNotNone(pid)
+        self.assertEqual(reused_pid, pid)
+        self.assertTrue(running)
+        self.assertEqual(len(started), 1)
+        self.assertEqual(pool.stats()["a"]["hits"], 1)
+        self.assertEqual(pool.stats()["a"]["recycled"], 0)
+
+    def test_recycles_by_task_count_and_exit(self) -> None:
+        """Agents past max_tasks are replaced in the background; dead idle agents are skipped."""
+        bus = EventBus()
+        started: list[ManagedAgentProcess] = []
+
+        with tempfile.TemporaryDirectory() as td:
+            spec = _make_spec("a", Path(td))
+            pool = AgentPool(_starter(bus, started), size=1, max_tasks=1)
+
+            async def run() -> dict:
+                await pool.warm([spec])
+                first = await pool.lease(spec)
+                await pool.release(first)  # one task done: retired, refill scheduled
+                self.assertFalse(first.process.running)
+                while pool.stats()["a"]["idle"] == 0:
+                    await asyncio.sleep(0.01)
+
+                # The replacement dies while idle; the next lease starts a fresh one.
+                (replacement,) = started[1:]
+                await replacement.terminate()
+                third = await pool.lease(spec)
+                self.assertTrue(third.process.running)
+                await pool.release(third)
+                await pool.close()
+                await bus.aclose()
+                return pool.stats()
+
+            stats = asyncio.run(run())
+
+        self.assertEqual(stats["a"]["hits"], 1)
+        self.assertEqual(stats["a"]["misses"], 1)
+        self.assertGreaterEqual(stats["a"]["recycled"], 3)
+        self.assertTrue(all(not p.running for p in started))
+
+    def test_recycles_by_age(self) -> None:
+        """An idle agent older than max_age is not leased."""
+        bus = EventBus()
+        started: list[ManagedAgentProcess] = []
+
+        with tempfile.TemporaryDirectory() as td:
+            spec = _make_spec("a", Path(td))
+            pool = AgentPool(_starter(bus, started), size=1, max_age=0.05)
+
+            async def run() -> None:
+                await pool.warm([spec])
+                await asyncio.sleep(0.1)
+                agent = await pool.lease(spec)
+                self.assertIsNot(agent.process, started[0])
+                self.assertFalse(started[0].running)
+                await pool.close()
+                await bus.aclose()
+
+            asyncio.run(run())
+
+        self.assertEqual(pool.stats()["a"]["misses"], 1)
+        self.assertTrue(all(not p.running for p in started))
+        with self.assertRaises(RuntimeError):
+            asyncio.run(pool.lease(spec))
+
+    def test_release_with_retire_stops_healthy_agent(self) -> None:
+        """A lease whose task failed or timed out is retired, not handed out again."""
+        bus = EventBus()
+        started: list[ManagedAgentProcess] = []
+
+        with tempfile.TemporaryDirectory() as td:
+            spec = _make_spec("a", Path(td))
+            pool = AgentPool(_starter(bus, started), size=1)
+
+            async def run() -> None:
+                await pool.warm([spec])
+                first = await pool.lease(spec)
+                await pool.release(first, retire=True)
+                self.assertFalse(first.process.running)
+                second = await pool.lease(spec)
+                self.assertIsNot(second, first)
+                await pool.close()
+                await bus.aclose()
+
+            asyncio.run(run())
+
+        self.assertEqual(pool.stats()["a"]["recycled"], 1)
+
+
+class TestPooledHub(unittest.TestCase):
+    def test_run_tasks_reuses_agents(self) -> None:
+        """With agent_pool_size set, several tasks run on one pre-started agent."""
+        with tempfile.TemporaryDirectory() as td:
+            cfg = HubConfig(
+                workspace_root=Path(td),
+                journal_path=Path(td) / "runs" / "events.jsonl",
+                watch_paths=(),
+                agents=(_make_spec("fake", Path(td)),),
+                metrics_interval=0,
+                summary_interval=0,
+                agent_pool_size=1,
+            )
+            hub = Hub(cfg)
+            rc = asyncio.run(hub.run_tasks(["one", "two", "three"]))
+
+            self.assertEqual(rc, 0)
+            self.assertEqual(len(hub.task_latencies), 3)
+            self.assertEqual(hub.summary.summary.agents["fake"].jsonrpc_messages, 3)
+            starts = list(iter_events(cfg.journal_path, kinds={"agent.started"}))
+            self.assertEqual(len(starts), 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
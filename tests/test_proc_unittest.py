@@ -2,20 +2,27 @@
 from __future__ import annotations
 
 import asyncio
+import json
+import signal
 import sys
 import tempfile
 import unittest
 from pathlib import Path
+from unittest import mock
 
 sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "src"))
 
 from acp_hub.bus import EventBus
 from acp_hub.config import AgentSpec
 from acp_hub.events import Event
+from acp_hub.journal import JsonlJournal, journal_sink
+from acp_hub.limits import signal_group
 from acp_hub.proc import ManagedAgentProcess
 
 
-def _make_spec(id: str, command: tuple[str, ...], sandbox: Path) -> AgentSpec:
+def _make_spec(
+    id: str, command: tuple[str, ...], sandbox: Path, *, retain_items: int = 10_000
+) -> AgentSpec:
     """Build an AgentSpec for testing with the required new fields."""
     return AgentSpec(
         id=id,
@@ -23,19 +30,20 @@ def _make_spec(id: str, command: tuple[str, ...], sandbox: Path) -> AgentSpec:
         protocol="echo",
         command=command,
         sandbox=sandbox,
+        retain_items=retain_items,
     )
 
 
 class TestManagedAgentProcess(unittest.TestCase):
     def test_stdout_events(self) -> None:
-        """Plain stdout lines produce agent.stdout events."""
+        """Plain stdout lines produce agent.stdout events (one per line when opted in)."""
         bus = EventBus()
         received: list[Event] = []
 
         async def handler(e: Event) -> None:
             received.append(e)
 
-        bus.subscribe(handler)
+        bus.subscribe(handler, per_line=True)
 
         with tempfile.TemporaryDirectory() as td:
             spec = _make_spec(
@@ -48,6 +56,7 @@ class TestManagedAgentProcess(unittest.TestCase):
             async def run() -> None:
                 await proc.start()
                 await proc.wait()
+                await bus.drain()
 
             asyncio.run(run())
 
@@ -56,6 +65,72 @@ class TestManagedAgentProcess(unittest.TestCase):
         self.assertEqual(stdout_events[0].payload["text"], "hello")
         self.assertEqual(stdout_events[1].payload["text"], "world")
 
+    def test_stdout_burst_is_coalesced(self) -> None:
+        """A burst of plain lines becomes one chunk event with a line count."""
+        bus = EventBus()
+        received: list[Event] = []
+
+        async def handler(e: Event) -> None:
+            received.append(e)
+
+        bus.subscribe(handler)
+
+        with tempfile.TemporaryDirectory() as td:
+            spec = _make_spec(
+                "test-burst",
+                (
+                    "python3",
+                    "-c",
+                    "import json\n"
+                    "for i in range(100): print(f'line {i}')\n"
+                    "print(json.dumps({'method': 'x'}))\n"
+                    "print('tail')",
+                ),
+                Path(td),
+            )
+            proc = ManagedAgentProcess(spec=spec, bus=bus, coalesce_window=5.0)
+
+            async def run() -> None:
+                await proc.start()
+                await proc.wait()
+                await bus.drain()
+
+            asyncio.run(run())
+
+        kinds = [e.kind for e in received if e.kind in ("agent.stdout", "agent.jsonrpc")]
+        self.assertEqual(kinds, ["agent.stdout", "agent.jsonrpc", "agent.stdout"])
+        chunk = received[[e.kind for e in received].index("agent.stdout")]
+        self.assertEqual(chunk.payload["lines"], 100)
+        self.assertEqual(chunk.payload["text"].split("\n")[-1], "line 99")
+        self.assertEqual(len(proc.stdout_lines), 101)
+
+    def test_coalescing_disabled(self) -> None:
+        """coalesce_window=0 publishes one event per line."""
+        bus = EventBus()
+        received: list[Event] = []
+
+        async def handler(e: Event) -> None:
+            received.append(e)
+
+        bus.subscribe(handler, kind_prefix="agent.stdout")
+
+        with tempfile.TemporaryDirectory() as td:
+            spec = _make_spec(
+                "test-nocoalesce",
+                ("python3", "-c", "print('a'); print('b'); print('c')"),
+                Path(td),
+            )
+            proc = ManagedAgentProcess(spec=spec, bus=bus, coalesce_window=0)
+
+            async def run() -> None:
+                await proc.start()
+                await proc.wait()
+                await bus.drain()
+
+            asyncio.run(run())
+
+        self.assertEqual([e.payload for e in received], [{"text": t} for t in "abc"])
+
     def test_stderr_events(self) -> None:
         """stderr lines produce agent.stderr events."""
         bus = EventBus()
@@ -77,6 +152,7 @@ class TestManagedAgentProcess(unittest.TestCase):
             async def run() -> None:
                 await proc.start()
                 await proc.wait()
+                await bus.drain()
 
             asyncio.run(run())
 
@@ -84,6 +160,43 @@ class TestManagedAgentProcess(unittest.TestCase):
         self.assertEqual(len(stderr_events), 1)
         self.assertEqual(stderr_events[0].payload["text"], "oops")
 
+    def test_stderr_flood_is_collapsed(self) -> None:
+        """Thousands of repeated stderr lines become one line plus one suppression report."""
+        bus = EventBus()
+        received: list[Event] = []
+
+        async def handler(e: Event) -> None:
+            received.append(e)
+
+        bus.subscribe(handler)
+
+        script = (
+            "import sys\n"
+            "for i in range(5000): print(f'warning: retry {i}', file=sys.stderr)\n"
+            "print('giving up', file=sys.stderr)\n"
+        )
+        with tempfile.TemporaryDirectory() as td:
+            spec = _make_spec("test-flood", ("python3", "-c", script), Path(td))
+            proc = ManagedAgentProcess(spec=spec, bus=bus)
+
+            async def run() -> None:
+                await proc.start()
+                await proc.wait()
+                await bus.drain()
+
+            asyncio.run(run())
+
+        stderr_events = [e for e in received if e.kind.startswith("agent.stderr")]
+        self.assertEqual(
+            [(e.kind, e.payload["text"]) for e in stderr_events],
+            [
+                ("agent.stderr", "warning: retry 0"),
+                ("agent.stderr_suppressed", "warning: retry 4999"),
+                ("agent.stderr", "giving up"),
+            ],
+        )
+        self.assertEqual(stderr_events[1].payload["count"], 4999)
+
     def test_jsonrpc_detection(self) -> None:
         """JSON dict on stdout produces agent.jsonrpc event."""
         bus = EventBus()
@@ -109,12 +222,16 @@ class TestManagedAgentProcess(unittest.TestCase):
             async def run() -> None:
                 await proc.start()
                 await proc.wait()
+                await bus.drain()
 
             asyncio.run(run())
 
         jsonrpc_events = [e for e in received if e.kind == "agent.jsonrpc"]
         self.assertEqual(len(jsonrpc_events), 1)
         self.assertEqual(jsonrpc_events[0].payload["message"]["method"], "test")
+        raw = jsonrpc_events[0].raw
+        assert raw is not None
+        self.assertEqual(json.loads(raw), {"jsonrpc": "2.0", "method": "test"})
 
     def test_agent_lifecycle_events(self) -> None:
         """start/exit events are emitted."""
@@ -133,6 +250,7 @@ class TestManagedAgentProcess(unittest.TestCase):
             async def run() -> None:
                 await proc.start()
                 await proc.wait()
+                await bus.drain()
 
             asyncio.run(run())
 
@@ -140,6 +258,32 @@ class TestManagedAgentProcess(unittest.TestCase):
         self.assertIn("agent.started", kinds)
         self.assertIn("agent.exited", kinds)
 
+    def test_terminate_signals_group_only_while_unreaped(self) -> None:
+        """A running agent's group gets SIGTERM; an exited one is not signalled at all."""
+        bus = EventBus()
+
+        with tempfile.TemporaryDirectory() as td:
+            sleeper = ("python3", "-c", "import time; time.sleep(30)")
+            running = ManagedAgentProcess(spec=_make_spec("sleeper", sleeper, Path(td)), bus=bus)
+            exited = ManagedAgentProcess(
+                spec=_make_spec("quick", ("python3", "-c", "pass"), Path(td)), bus=bus
+            )
+
+            async def run() -> None:
+                await running.start()
+                await exited.start()
+                await exited.wait()
+                with mock.patch("acp_hub.proc.signal_group", wraps=signal_group) as sent:
+                    await exited.terminate()
+                    self.assertEqual(sent.call_args_list, [])
+                    await running.terminate()
+                    self.assertEqual(
+                        sent.call_args_list, [mock.call(running.pid, signal.SIGTERM)]
+                    )
+                await bus.aclose()
+
+            asyncio.run(run())
+
     def test_send_text_and_receive(self) -> None:
         """Can send text to stdin and receive it back."""
         bus = EventBus()
@@ -163,12 +307,143 @@ class TestManagedAgentProcess(unittest.TestCase):
                 await proc.send_text("ping")
                 await proc.close_stdin()
                 await proc.wait()
+                await bus.drain()
 
             asyncio.run(run())
 
         stdout_events = [e for e in received if e.kind == "agent.stdout"]
         self.assertTrue(any(e.payload["text"] == "ping" for e in stdout_events))
 
+    def test_long_jsonrpc_line_and_spill(self) -> None:
+        """A JSON-RPC line past the 64 KiB StreamReader limit parses; oversize lines spill."""
+        bus = EventBus()
+        received: list[Event] = []
+
+        async def handler(e: Event) -> None:
+            received.append(e)
+
+        bus.subscribe(handler)
+
+        with tempfile.TemporaryDirectory() as td:
+            spec = _make_spec(
+                "test-long",
+                (
+                    "python3",
+                    "-c",
+                    "import json\n"
+                    "print(json.dumps({'result': {'content': 'x' * 500_000}}))\n"
+                    "print('y' * 3_000_000)\n"
+                    "print('done')",
+                ),
+                Path(td),
+            )
+            spill_dir = Path(td) / "spill"
+            proc = ManagedAgentProcess(
+                spec=spec, bus=bus, max_line_bytes=1_000_000, spill_dir=spill_dir
+            )
+
+            async def run() -> None:
+                await proc.start()
+                await proc.wait()
+                await bus.drain()
+
+            asyncio.run(run())
+
+            rpc = [e for e in received if e.kind == "agent.jsonrpc"]
+            self.assertEqual(len(rpc), 1)
+            self.assertEqual(len(rpc[0].payload["message"]["result"]["content"]), 500_000)
+            (spilled,) = [e for e in received if e.kind == "agent.line_spilled"]
+            self.assertEqual(spilled.payload["bytes"], 3_000_000)
+            self.assertEqual(Path(spilled.payload["path"]).stat().st_size, 3_000_000)
+        texts = [e.payload["text"] for e in received if e.kind == "agent.stdout"]
+        self.assertEqual(texts, ["done"])
+
+    def test_burst_sends_are_queued_in_order(self) -> None:
+        """Concurrent senders don't wait on the child; messages arrive whole and in order."""
+        bus = EventBus()
+        received: list[Event] = []
+
+        async def handler(e: Event) -> None:
+            received.append(e)
+
+        bus.subscribe(handler)
+
+        with tempfile.TemporaryDirectory() as td:
+            spec = _make_spec(
+                "test-burst-in",
+                ("python3", "-c", "import sys\nfor line in sys.stdin: sys.stdout.write(line)"),
+                Path(td),
+            )
+            proc = ManagedAgentProcess(spec=spec, bus=bus)
+
+            async def run() -> dict:
+                await proc.start()
+                await asyncio.gather(*(proc.send_json({"id": i}) for i in range(500)))
+                await proc.close_stdin()
+                stats = proc.stdin_stats()
+                await proc.wait()
+                await bus.drain()
+                return stats
+
+            stats = asyncio.run(run())
+
+        ids = [e.payload["message"]["id"] for e in received if e.kind == "agent.jsonrpc"]
+        self.assertEqual(ids, list(range(500)))
+        self.assertEqual((stats["messages"], stats["queued"]), (500, 0))
+        self.assertLess(stats["writes"], 500)
+
+    def test_retention_and_evicted_history(self) -> None:
+        """Output buffers keep the newest items; older ones come back from the journal."""
+        bus = EventBus()
+
+        with tempfile.TemporaryDirectory() as td:
+            spec = _make_spec(
+                "test-ring",
+                (
+                    "python3",
+                    "-c",
+                    "import json\n"
+                    "for i in range(50): print(f'line {i}')\n"
+                    "for i in range(30): print(json.dumps({'id': i}))",
+                ),
+                Path(td),
+                retain_items=10,
+            )
+            # Nothing is committed on its own before the reads below, so they must flush:
+            # a long batch window, and no agent.exited (which commits at once).
+            journal = JsonlJournal(
+                path=Path(td) / "events.jsonl", background=True, flush_interval=60.0
+            )
+            journal.open()
+            sink = journal_sink(journal)
+
+            async def handler(event: Event) -> None:
+                if event.kind != "agent.exited":
+                    await sink(event)
+
+            bus.subscribe(handler)
+            proc = ManagedAgentProcess(spec=spec, bus=bus, journal=journal)
+
+            async def run() -> None:
+                await proc.start()
+                await proc.wait()
+                await bus.aclose()
+
+            asyncio.run(run())
+
+            self.assertEqual(list(proc.stdout_lines), [f"line {i}" for i in range(40, 50)])
+            self.assertEqual([m["id"] for m in proc.jsonrpc_messages], list(range(20, 30)))
+            usage = proc.memory_usage()
+            self.assertEqual(usage["stdout_lines"]["items"], 10)
+            self.assertEqual(usage["stdout_lines"]["evicted"], 40)
+            self.assertEqual(
+                usage["jsonrpc_messages"]["bytes"],
+                sum(len(json.dumps({"id": i})) for i in range(20, 30)),
+            )
+            self.assertEqual(proc.evicted_stdout_lines(), [f"line {i}" for i in range(40)])
+            self.assertEqual([m["id"] for m in proc.evicted_jsonrpc_messages()], list(range(20)))
+            journal.close()
+
 
 if __name__ == "__main__":
     unittest.main()
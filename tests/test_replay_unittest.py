@@ -0,0 +1,116 @@
+"""Tests for journal replay."""
+
+from __future__ import annotations
+
+import asyncio
+import contextlib
+import io
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "src"))
+
+from acp_hub.bus import EventBus
+from acp_hub.cli import main
+from acp_hub.events import Event
+from acp_hub.journal import JsonlJournal, iter_events
+from acp_hub.replay import replay_events, replay_journal
+
+
+def _record(path: Path, n: int = 50, spacing: float = 0.0) -> list[Event]:
+    events = [
+        Event(ts=100.0 + i * spacing, kind="agent.stdout", payload={"text": f"l{i}"}, agent_id="a")
+        for i in range(n)
+    ]
+    with JsonlJournal(path=path) as journal:
+        for e in events:
+            journal.write(e)
+    return events
+
+
+class TestReplay(unittest.TestCase):
+    def test_fast_replay_delivers_everything_in_order(self) -> None:
+        async def run() -> tuple[list[Event], float]:
+            with tempfile.TemporaryDirectory() as td:
+                p = Path(td) / "events.jsonl"
+                recorded = _record(p, 500)
+                bus = EventBus()
+                seen: list[Event] = []
+
+                async def handler(event: Event) -> None:
+                    seen.append(event)
+
+                bus.subscribe(handler)
+                stats = await replay_journal(p, bus, speed=None)
+                await bus.aclose()
+                self.assertEqual(stats.events, 500)
+                self.assertEqual(
+                    [(e.ts, e.payload) for e in seen], [(e.ts, e.payload) for e in recorded]
+                )
+                return seen, stats.rate
+
+        seen, rate = asyncio.run(run())
+        self.assertGreater(rate, 0)
+        self.assertEqual([e.seq for e in seen], sorted(e.seq for e in seen))
+
+    def test_replayed_journal_keeps_recorded_seqs(self) -> None:
+        async def run(source: Path, target: Path) -> None:
+            bus = EventBus()
+            with JsonlJournal(path=target) as journal:
+
+                async def handler(event: Event) -> None:
+                    journal.write(event)
+
+                bus.subscribe(handler)
+                await replay_journal(source, bus, speed=None)
+                await bus.aclose()
+
+        with tempfile.TemporaryDirectory() as td:
+            source, target = Path(td) / "events.jsonl", Path(td) / "replayed.jsonl"
+            recorded = _record(source, 20)
+            asyncio.run(run(source, target))
+            replayed = list(iter_events(target))
+
+        self.assertEqual([e.seq for e in replayed], [e.seq for e in recorded])
+
+    def test_speed_scales_recorded_timing(self) -> None:
+        events = [Event(ts=10.0 + i * 0.2, kind="x", payload={}) for i in range(3)]
+
+        async def run(speed: float) -> float:
+            bus = EventBus()
+            stats = await replay_events(events, bus, speed=speed)
+            await bus.aclose()
+            return stats.elapsed
+
+        self.assertGreaterEqual(asyncio.run(run(1.0)), 0.39)
+        self.assertLess(asyncio.run(run(10.0)), 0.2)
+
+    def test_cli_replay(self) -> None:
+        with tempfile.TemporaryDirectory() as td:
+            p = Path(td) / "events.jsonl"
+            _record(p, 20)
+            out_journal = Path(td) / "copy.jsonl"
+            out, err = io.StringIO(), io.StringIO()
+            with contextlib.redirect_stdout(out), contextlib.redirect_stderr(err):
+                code = main(
+                    [
+                        "--config",
+                        str(Path(td) / "none.json"),
+                        "replay",
+                        str(p),
+                        "--fast",
+                        "--journal-out",
+                        str(out_journal),
+                    ]
+                )
+
+            self.assertEqual(code, 0)
+            self.assertIn("[a] l19", out.getvalue())
+            self.assertIn("replayed 20 events", err.getvalue())
+            self.assertEqual(len(JsonlJournal(path=out_journal).read_all()), 20)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,118 @@
+"""Tests for the /proc resource sampler — spawns real child processes."""
+
+from __future__ import annotations
+
+import asyncio
+import os
+import subprocess
+import sys
+import tempfile
+import time
+import unittest
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "src"))
+
+from acp_hub.bus import EventBus
+from acp_hub.resources import ProcStat, ResourceSampler, process_tree, read_io, read_stat
+from acp_hub.tools.shell import ShellTool
+
+HAVE_PROC = Path("/proc/self/stat").exists()
+
+# Busy parent with one sleeping child: two processes, measurable CPU.
+BUSY_TREE = """
+import subprocess, sys, time
+child = subprocess.Popen([sys.executable, "-c", "import time; time.sleep(30)"])
+print("ready", flush=True)
+end = time.time() + 30
+while time.time() < end:
+    pass
+"""
+
+
+class TestProcParsing(unittest.TestCase):
+    def test_stat_with_awkward_comm(self) -> None:
+        """comm may contain spaces and parentheses; fields are taken after the last ')'."""
+        with tempfile.TemporaryDirectory() as td:
+            (Path(td) / "42").mkdir()
+            fields = ["S", "7"] + ["0"] * 9 + ["10", "20", "3", "4"] + ["0"] * 2 + ["5"]
+            fields += ["0"] * 3 + ["100"]
+            (Path(td) / "42" / "stat").write_text("42 (a) b (c)) " + " ".join(fields))
+            (Path(td) / "42" / "io").write_text("rchar: 9\nread_bytes: 4096\nwrite_bytes: 8192\n")
+            st = read_stat(42, Path(td))
+            assert st is not None
+            self.assertEqual((st.ppid, st.cpu_ticks, st.threads), (7, 30, 5))
+            self.assertEqual(st.rss_bytes, 100 * os.sysconf("SC_PAGE_SIZE"))
+            self.assertEqual(read_io(42, Path(td)), (4096, 8192))
+            self.assertIsNone(read_stat(43, Path(td)))
+            self.assertEqual(read_io(43, Path(td)), (0, 0))
+
+    def test_process_tree(self) -> None:
+        pairs = [(1, 0), (2, 1), (3, 2), (4, 1), (5, 9)]
+        stats = [ProcStat(pid, ppid, 0, 1, 0) for pid, ppid in pairs]
+        children: dict[int, list[int]] = {}
+        for st in stats:
+            children.setdefault(st.ppid, []).append(st.pid)
+        self.assertEqual(sorted(process_tree(2, children)), [2, 3])
+        self.assertEqual(sorted(process_tree(1, children)), [1, 2, 3, 4])
+
+    @unittest.skipUnless(HAVE_PROC, "needs /proc")
+    def test_read_own_stat(self) -> None:
+        st = read_stat(os.getpid())
+        assert st is not None
+        self.assertEqual(st.ppid, os.getppid())
+        self.assertGreaterEqual(st.threads, 1)
+        self.assertGreater(st.rss_bytes, 0)
+
+
+@unittest.skipUnless(HAVE_PROC, "needs /proc")
+class TestResourceSampler(unittest.TestCase):
+    def test_samples_process_tree(self) -> None:
+        """CPU, RSS and process count cover the watched process and its children."""
+        proc = subprocess.Popen(
+            [sys.executable, "-c", BUSY_TREE], stdout=subprocess.PIPE, text=True
+        )
+        assert proc.stdout is not None
+        try:
+            self.assertEqual(proc.stdout.readline().strip(), "ready")
+            sampler = ResourceSampler(EventBus())
+            sampler.watch("busy", proc.pid)
+            self.assertEqual(sampler.sample(), [])  # first round is the CPU baseline
+            time.sleep(0.5)
+            (event,) = sampler.sample()
+        finally:
+            proc.kill()
+            proc.wait()
+            proc.stdout.close()
+
+        self.assertEqual(event.kind, "agent.resources")
+        self.assertEqual(event.agent_id, "busy")
+        self.assertEqual(event.payload["processes"], 2)
+        self.assertGreater(event.payload["cpu_percent"], 20)
+        self.assertGreater(event.payload["rss_bytes"], 0)
+        self.assertGreaterEqual(event.payload["threads"], 2)
+
+    def test_exited_roots_are_dropped(self) -> None:
+        proc = subprocess.Popen([sys.executable, "-c", "pass"])
+        proc.wait()
+        sampler = ResourceSampler(EventBus())
+        sampler.watch("gone", proc.pid)
+        self.assertEqual(sampler.sample(), [])
+        self.assertEqual(sampler._watches, {})
+
+    def test_shell_children_are_watched_while_running(self) -> None:
+        """ShellTool reports its child's pid on spawn and exit."""
+        seen: list[tuple[str, int]] = []
+        shell = ShellTool(
+            timeout=5,
+            on_spawn=lambda pid: seen.append(("spawn", pid)),
+            on_exit=lambda pid: seen.append(("exit", pid)),
+        )
+        result = asyncio.run(shell.run(["sh", "-c", "echo hi"]))
+        self.assertEqual(result["exit_code"], 0)
+        self.assertEqual([k for k, _ in seen], ["spawn", "exit"])
+        self.assertEqual(seen[0][1], seen[1][1])
+
+
+if __name__ == "__main__":
+    unittest.main()
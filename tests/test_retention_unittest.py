@@ -0,0 +1,44 @@
+"""Tests for the bounded output ring buffer."""
+
+from __future__ import annotations
+
+import sys
+import unittest
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "src"))
+
+from acp_hub.retention import RingBuffer
+
+
+class TestRingBuffer(unittest.TestCase):
+    def test_item_bound(self) -> None:
+        ring: RingBuffer[int] = RingBuffer(max_items=3)
+        for i in range(10):
+            ring.append(i, 1)
+        self.assertEqual(list(ring), [7, 8, 9])
+        self.assertEqual((ring[0], ring[-1], len(ring)), (7, 9, 3))
+        self.assertEqual(ring.usage(), {"items": 3, "bytes": 3, "evicted": 7, "evicted_bytes": 7})
+
+    def test_byte_bound_keeps_newest_item(self) -> None:
+        ring: RingBuffer[str] = RingBuffer(max_bytes=10)
+        for text in ("aaaa", "bbbb", "cccc"):
+            ring.append(text, len(text))
+        self.assertEqual(list(ring), ["bbbb", "cccc"])
+        ring.append("x" * 50, 50)  # larger than the bound on its own: still retained
+        self.assertEqual(list(ring), ["x" * 50])
+        self.assertEqual((ring.nbytes, ring.evicted, ring.evicted_bytes), (50, 3, 12))
+
+    def test_unbounded_and_clear(self) -> None:
+        ring: RingBuffer[int] = RingBuffer()
+        for i in range(1000):
+            ring.append(i, 8)
+        self.assertEqual((len(ring), ring.evicted), (1000, 0))
+        ring.clear()
+        self.assertEqual(
+            ring.usage(), {"items": 0, "bytes": 0, "evicted": 1000, "evicted_bytes": 8000}
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
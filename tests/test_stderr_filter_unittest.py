@@ -0,0 +1,117 @@
+"""Tests for StderrFilter repeat suppression and rate capping."""
+
+from __future__ import annotations
+
+import sys
+import unittest
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "src"))
+
+from acp_hub.stderr_filter import StderrFilter, describe_suppressed, line_key
+
+
+class TestStderrFilter(unittest.TestCase):
+    def test_line_key_masks_numbers(self) -> None:
+        self.assertEqual(
+            line_key("retry 12 at 0x7ffd3a after 250ms"),
+            line_key("retry 13 at 0x7ffe00 after 260ms"),
+        )
+        self.assertNotEqual(line_key("retry failed"), line_key("retry ok"))
+
+    def test_repeats_collapse_into_one_report(self) -> None:
+        """The first line passes; the run is reported with a count when a new line arrives."""
+        f = StderrFilter("a", report_interval=10.0)
+        self.assertEqual(f.feed("warning: x", 1.0, 0.0), (True, []))
+        for i in range(99):
+            keep, reports = f.feed("warning: x", 2.0 + i, 0.001 * i)
+            self.assertFalse(keep)
+            self.assertEqual(reports, [])
+        self.assertIsNotNone(f.deadline)
+
+        keep, reports = f.feed("done", 200.0, 0.2)
+        self.assertTrue(keep)
+        (report,) = reports
+        self.assertEqual(report.kind, "agent.stderr_suppressed")
+        self.assertEqual(
+            report.payload,
+            {
+                "reason": "repeat",
+                "text": "warning: x",
+                "count": 99,
+                "first_ts": 2.0,
+                "last_ts": 100.0,
+            },
+        )
+        self.assertEqual(describe_suppressed(report.payload), "(last line repeated 99 times)")
+        self.assertIsNone(f.deadline)
+        self.assertEqual((f.passed, f.suppressed), (2, 99))
+
+    def test_near_identical_lines_are_repeats(self) -> None:
+        f = StderrFilter("a")
+        self.assertTrue(f.feed("tick 1", 1.0, 0.0)[0])
+        self.assertFalse(f.feed("tick 2", 2.0, 0.0)[0])
+        self.assertFalse(f.feed("tick 3", 3.0, 0.0)[0])
+        self.assertEqual(f.flush()[0].payload["text"], "tick 3")
+        self.assertEqual(f.flush(), [])
+
+    def test_reported_run_ends_without_empty_report(self) -> None:
+        """A new line right after an interval report adds no report with a zero count."""
+        f = StderrFilter("a", report_interval=1.0)
+        f.feed("x", 0.0, 0.0)
+        f.feed("x", 0.5, 0.5)
+        (report,) = f.feed("x", 2.0, 2.0)[1]
+        self.assertEqual(report.payload["count"], 2)
+        self.assertEqual(f.feed("y", 2.1, 2.1), (True, []))
+
+    def test_long_run_is_reported_every_interval(self) -> None:
+        """A run that never ends is still reported, once per report_interval."""
+        f = StderrFilter("a", report_interval=1.0)
+        f.feed("spin", 0.0, 0.0)
+        reports = []
+        for i in range(1, 3501):  # 3500 repeats over 3.5 seconds
+            reports += f.feed("spin", i / 1000, i / 1000)[1]
+        self.assertEqual(len(reports), 3)
+        reports += f.flush()
+        self.assertEqual(sum(r.payload["count"] for r in reports), 3500)
+
+    def test_expire_reports_quiet_runs(self) -> None:
+        f = StderrFilter("a", report_interval=0.5)
+        f.feed("x", 0.0, 0.0)
+        f.feed("x", 0.1, 0.1)
+        self.assertEqual(f.expire(0.2), [])
+        deadline = f.deadline
+        assert deadline is not None
+        (report,) = f.expire(deadline)
+        self.assertEqual(report.payload["count"], 1)
+        # Nothing more was withheld: the next deadline ends the run.
+        deadline = f.deadline
+        assert deadline is not None
+        self.assertEqual(f.expire(deadline), [])
+        self.assertIsNone(f.deadline)
+
+    def test_rate_cap_drops_and_counts(self) -> None:
+        """Distinct lines beyond the burst are dropped until tokens refill."""
+        f = StderrFilter("a", rate=10.0, burst=5, report_interval=10.0)
+        kept = [f.feed(f"line {chr(97 + i)}", 0.0, 0.0)[0] for i in range(20)]
+        self.assertEqual(kept.count(True), 5)
+
+        keep, reports = f.feed("after refill", 1.0, 1.0)  # 10 tokens back (capped at 5)
+        self.assertTrue(keep)
+        (report,) = reports
+        self.assertEqual(report.payload["reason"], "rate")
+        self.assertEqual(report.payload["count"], 15)
+        self.assertEqual(report.payload["text"], "line t")
+        self.assertIn("15 lines dropped", describe_suppressed(report.payload))
+
+    def test_repeats_do_not_use_rate_tokens(self) -> None:
+        f = StderrFilter("a", rate=1.0, burst=2)
+        self.assertTrue(f.feed("a", 0.0, 0.0)[0])
+        for _ in range(100):
+            f.feed("a", 0.0, 0.0)
+        self.assertTrue(f.feed("b", 0.0, 0.0)[0])
+        self.assertFalse(f.feed("c", 0.0, 0.0)[0])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,127 @@
+"""Tests for the coalescing stdin writer."""
+
+from __future__ import annotations
+
+import asyncio
+import sys
+import unittest
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "src"))
+
+from acp_hub.stdin_writer import StdinWriter
+
+
+class _FakeStream:
+    """StreamWriter stand-in whose drain() waits for the test to open a gate."""
+
+    def __init__(self) -> None:
+        self.writes: list[bytes] = []
+        self.gate = asyncio.Event()
+        self.closed = False
+        self.fail: BaseException | None = None
+
+    def write(self, data: bytes) -> None:
+        self.writes.append(data)
+
+    async def drain(self) -> None:
+        await self.gate.wait()
+        if self.fail is not None:
+            raise self.fail
+
+    def close(self) -> None:
+        self.closed = True
+
+    async def wait_closed(self) -> None:
+        pass
+
+
+class TestStdinWriter(unittest.TestCase):
+    def test_pending_messages_coalesce_into_one_write(self) -> None:
+        async def run() -> tuple[_FakeStream, dict]:
+            stream = _FakeStream()
+            writer = StdinWriter(stream)  # type: ignore[arg-type]
+            writer.start()
+            await writer.put(b"first\n")
+            await asyncio.sleep(0)  # writer picks up "first" and blocks in drain
+            # Concurrent senders return immediately even though drain is blocked.
+            await asyncio.gather(*(writer.put(b"m%d\n" % i) for i in range(100)))
+            self.assertEqual(writer.stats()["queued"], 100)
+            stream.gate.set()
+            await writer.flush()
+            stats = writer.stats()
+            await writer.close()
+            return stream, stats
+
+        stream, stats = asyncio.run(run())
+        self.assertEqual(stream.writes[0], b"first\n")
+        self.assertEqual(stream.writes[1], b"".join(b"m%d\n" % i for i in range(100)))
+        self.assertEqual((stats["messages"], stats["writes"], stats["max_queued"]), (101, 2, 100))
+        self.assertEqual(stats["queued"], 0)
+        self.assertTrue(stream.closed)
+
+    def test_put_blocks_above_high_water_mark(self) -> None:
+        async def run() -> list[str]:
+            stream = _FakeStream()
+            writer = StdinWriter(stream, max_pending_bytes=10)  # type: ignore[arg-type]
+            writer.start()
+            order: list[str] = []
+            await writer.put(b"x" * 4)
+            await asyncio.sleep(0)  # in flight, drain blocked
+            await writer.put(b"y" * 10)  # queue was empty: accepted
+
+            async def late() -> None:
+                await writer.put(b"z")
+                order.append("queued z")
+
+            task = asyncio.create_task(late())
+            await asyncio.sleep(0.01)
+            order.append("released")
+            stream.gate.set()
+            await task
+            await writer.flush()
+            self.assertEqual(b"".join(stream.writes), b"xxxx" + b"y" * 10 + b"z")
+            return order
+
+        self.assertEqual(asyncio.run(run()), ["released", "queued z"])
+
+    def test_broken_pipe_fails_later_puts(self) -> None:
+        async def run() -> None:
+            stream = _FakeStream()
+            stream.fail = BrokenPipeError()
+            stream.gate.set()
+            writer = StdinWriter(stream, name="agent a")  # type: ignore[arg-type]
+            writer.start()
+            await writer.put(b"lost\n")
+            await writer.flush()
+            with self.assertRaises(RuntimeError):
+                await writer.put(b"more\n")
+
+        asyncio.run(run())
+
+    def test_cancel_releases_waiters_and_fails_later_puts(self) -> None:
+        async def run() -> None:
+            stream = _FakeStream()
+            writer = StdinWriter(stream, max_pending_bytes=4)  # type: ignore[arg-type]
+            writer.start()
+            await writer.put(b"in flight\n")
+            await asyncio.sleep(0)  # drain never returns
+            await writer.put(b"queued\n")
+            blocked = asyncio.create_task(writer.put(b"waiting\n"))
+            flushing = asyncio.create_task(writer.flush())
+            await asyncio.sleep(0)
+            writer.cancel()
+            with self.assertRaises(RuntimeError):
+                await asyncio.wait_for(blocked, 1.0)
+            await asyncio.wait_for(flushing, 1.0)
+            self.assertEqual(writer.stats()["queued"], 0)
+            with self.assertRaises(RuntimeError):
+                await writer.put(b"more\n")
+            await asyncio.wait_for(writer.close(), 1.0)
+            self.assertTrue(stream.closed)
+
+        asyncio.run(run())
+
+
+if __name__ == "__main__":
+    unittest.main()
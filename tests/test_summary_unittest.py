@@ -0,0 +1,185 @@
+"""Tests for the incremental run summary."""
+
+from __future__ import annotations
+
+import asyncio
+import contextlib
+import io
+import json
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "src"))
+
+from acp_hub.bus import EventBus
+from acp_hub.cli import main
+from acp_hub.events import (
+    Event,
+    agent_exited,
+    agent_jsonrpc,
+    agent_resources,
+    agent_started,
+    agent_stderr,
+    agent_stderr_suppressed,
+    agent_stdout,
+    file_changed,
+    hub_started,
+    task_submitted,
+    tool_invocation,
+    tool_result,
+)
+from acp_hub.journal import JsonlJournal
+from acp_hub.summary import RunSummary, SummarySink, load_summary, summary_path
+
+
+def _run_events() -> list[Event]:
+    return [
+        task_submitted(ts=99.0, task="t", route="single"),
+        agent_started(ts=100.0, agent_id="a", command=["echo"]),
+        agent_stdout(ts=100.25, agent_id="a", text="x\ny\nz", lines=3),
+        agent_jsonrpc(ts=100.5, agent_id="a", message={"jsonrpc": "2.0", "method": "m"}),
+        tool_invocation(ts=101.0, agent_id="a", tool_name="shell", args={}, correlation_id="1"),
+        tool_result(
+            ts=101.1,
+            agent_id="a",
+            tool_name="shell",
+            ok=True,
+            result={"exit_code": 0, "stdout": "", "stderr": ""},
+            correlation_id="1",
+        ),
+        tool_invocation(ts=102.0, agent_id="a", tool_name="shell", args={}, correlation_id="2"),
+        tool_result(
+            ts=102.1,
+            agent_id="a",
+            tool_name="shell",
+            ok=False,
+            result={"exit_code": 2, "stdout": "", "stderr": "no"},
+            correlation_id="2",
+        ),
+        tool_invocation(ts=103.0, agent_id="a", tool_name="files", args={}, correlation_id="3"),
+        tool_result(
+            ts=103.1,
+            agent_id="a",
+            tool_name="files",
+            ok=True,
+            result={"path": "out.txt", "written": 3},
+            correlation_id="3",
+        ),
+        file_changed(ts=103.2, path="notes.md", change="modified"),
+        agent_exited(ts=104.0, agent_id="a", exit_code=0),
+    ]
+
+
+class TestRunSummary(unittest.TestCase):
+    def test_aggregates(self) -> None:
+        d = RunSummary.from_events(_run_events()).to_dict()
+        self.assertEqual(d["events"], 12)
+        self.assertEqual(d["tasks"], 1)
+        a = d["agents"]["a"]
+        self.assertEqual(a["stdout_lines"], 3)
+        self.assertEqual(a["jsonrpc_messages"], 1)
+        self.assertEqual((a["tool_invocations"], a["tool_failures"]), (3, 1))
+        self.assertEqual(a["time_to_first_output_ms"], 250.0)
+        self.assertEqual(a["exit_code"], 0)
+        self.assertEqual(d["tools"]["shell"], {"invocations": 2, "failures": 1})
+        self.assertEqual(d["shell_exit_codes"], {"0": 1, "2": 1})
+        self.assertEqual(d["files_touched"], ["notes.md", "out.txt"])
+
+    def test_resources(self) -> None:
+        """The latest agent.resources sample is kept, with CPU and RSS peaks."""
+        samples = [
+            agent_resources(
+                ts=100.0 + i,
+                agent_id="a",
+                cpu_percent=cpu,
+                rss_bytes=rss,
+                read_bytes=i,
+                write_bytes=2 * i,
+                threads=3,
+                processes=1,
+            )
+            for i, (cpu, rss) in enumerate([(10.0, 5 << 20), (90.0, 7 << 20), (5.0, 6 << 20)])
+        ]
+        summary = RunSummary.from_events(samples)
+        a = summary.to_dict()["agents"]["a"]
+        self.assertEqual((a["cpu_percent"], a["rss_bytes"]), (5.0, 6 << 20))
+        self.assertEqual((a["cpu_peak_percent"], a["rss_peak_bytes"]), (90.0, 7 << 20))
+        self.assertEqual((a["read_bytes"], a["write_bytes"], a["threads"]), (2, 4, 3))
+        self.assertIn("cpu peak 90%, rss peak 7.0 MiB", summary.describe())
+
+    def test_suppressed_stderr_is_counted(self) -> None:
+        summary = RunSummary.from_events(
+            [
+                agent_stderr(ts=1.0, agent_id="a", text="spin"),
+                agent_stderr_suppressed(
+                    ts=2.0,
+                    agent_id="a",
+                    reason="repeat",
+                    text="spin",
+                    count=999,
+                    first_ts=1.1,
+                    last_ts=2.0,
+                ),
+            ]
+        )
+        a = summary.agents["a"]
+        self.assertEqual((a.stderr_lines, a.stderr_suppressed), (1000, 999))
+        self.assertIn("1000 stderr lines (999 suppressed)", summary.describe())
+
+    def test_sink_checkpoints_only_when_changed(self) -> None:
+        async def run(path: Path) -> None:
+            bus = EventBus()
+            sink = SummarySink(path)
+            bus.subscribe(sink)
+            for e in _run_events():
+                await bus.publish(e)
+            await bus.drain()
+            sink.checkpoint()
+            mtime = path.stat().st_mtime_ns
+            sink.checkpoint()
+            self.assertEqual(path.stat().st_mtime_ns, mtime)
+            await bus.aclose()
+            sink.close()
+
+        with tempfile.TemporaryDirectory() as td:
+            path = summary_path(Path(td) / "events.jsonl")
+            self.assertEqual(path.name, "summary.json")
+            asyncio.run(run(path))
+            self.assertEqual(load_summary(path), RunSummary.from_events(_run_events()).to_dict())
+            self.assertFalse(path.with_name("summary.json.tmp").exists())
+
+    def test_new_run_starts_over(self) -> None:
+        """Rebuilt and live summaries both cover only the journal's latest run."""
+        earlier = [hub_started(ts=1.0, agents=["a"]), agent_stdout(ts=2.0, agent_id="a", text="x")]
+        latest = [hub_started(ts=90.0, agents=["a"]), *_run_events()]
+
+        async def live() -> RunSummary:
+            sink = SummarySink(Path("unused.json"))
+            for e in earlier + latest:
+                await sink(e)
+            return sink.summary
+
+        rebuilt = RunSummary.from_events(earlier + latest)
+        self.assertEqual(rebuilt.to_dict(), RunSummary.from_events(latest).to_dict())
+        self.assertEqual(rebuilt.first_ts, 90.0)
+        self.assertEqual(rebuilt.agents["a"].stdout_lines, 3)
+        self.assertEqual(asyncio.run(live()).to_dict(), rebuilt.to_dict())
+
+    def test_cli_rebuilds_missing_summary(self) -> None:
+        with tempfile.TemporaryDirectory() as td:
+            journal_path = Path(td) / "events.jsonl"
+            with JsonlJournal(path=journal_path) as journal:
+                for e in _run_events():
+                    journal.write(e)
+            out = io.StringIO()
+            with contextlib.redirect_stdout(out):
+                self.assertEqual(main(["journal", "summary", str(journal_path)]), 0)
+            printed = json.loads(out.getvalue())
+            self.assertEqual(printed["tools"]["files"], {"invocations": 1, "failures": 0})
+            self.assertEqual(load_summary(summary_path(journal_path)), printed)
+
+
+if __name__ == "__main__":
+    unittest.main()
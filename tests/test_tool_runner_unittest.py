@@ -34,13 +34,15 @@ class TestToolRunner(unittest.TestCase):
             )
 
             async def run() -> dict:
-                return await runner.execute(
+                result = await runner.execute(
                     "test-agent",
                     "shell/execute",
                     {"command": "echo hi"},
                     "corr-1",
                     sandbox=sandbox,
                 )
+                await bus.drain()
+                return result
 
             result = asyncio.run(run())
 